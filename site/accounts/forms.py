@@ -8,7 +8,7 @@ from django.core.exceptions import ValidationError
 from django.forms import BooleanField, Form, ModelForm, ModelMultipleChoiceField
 from django.urls import reverse
 
-from common.constants.models import Constant
+from common.constants.models import INSTRUMENT_GROUP_LEADER_GROUP_NAME
 from common.forms.widgets import (
     AutocompleteSelect,
     AutocompleteSelectMultiple,
@@ -187,11 +187,8 @@ class InstrumentGroupLeadersForm(Form):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        instrument_group_leader_group_name, _ = Constant.objects.get_or_create(
-            name="Instrumentgruppeleiargruppenamn"
-        )
         self.instrument_leaders_group, _ = Group.objects.get_or_create(
-            name=instrument_group_leader_group_name.value
+            name=INSTRUMENT_GROUP_LEADER_GROUP_NAME.get()
         )
         self.fields[
             "instrument_group_leaders"
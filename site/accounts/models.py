@@ -1,7 +1,9 @@
+from bisect import bisect_left
 from secrets import token_urlsafe
 
 from autoslug import AutoSlugField
 from django.contrib.auth.models import AbstractUser, UserManager
+from django.core.cache import cache
 from django.db.models import (
     SET_NULL,
     BooleanField,
@@ -44,6 +46,49 @@ class UserManagerCustom(UserManager):
             | Q(is_active_override=True)
         )
 
+    birthdays_cache_key = "accounts:birthdays"
+
+    def birthdays(self):
+        """
+        Returns a list of active members with a birthdate,
+        ordered by the day of the year of their birthday.
+
+        Cached, since birthdays are shown on the dashboard.
+        The cache is cleared when users are saved or deleted, see `accounts.signals`.
+        """
+        users = cache.get(self.birthdays_cache_key)
+        if users is None:
+            users = sorted(
+                self.active().exclude(birthdate=None).defer("password"),
+                key=lambda user: (user.birthdate.month, user.birthdate.day),
+            )
+            cache.set(self.birthdays_cache_key, users, None)
+        return users
+
+    def clear_birthdays_cache(self):
+        cache.delete(self.birthdays_cache_key)
+
+    def birthdays_on(self, date):
+        """Returns active members whose birthday is on `date`."""
+        return [
+            user
+            for user in self.birthdays()
+            if (user.birthdate.month, user.birthdate.day) == (date.month, date.day)
+        ]
+
+    def upcoming_birthdays(self, date, number):
+        """
+        Returns the `number` active members whose birthdays are first on or after `date`,
+        continuing from the start of the year when reaching the end of it.
+        """
+        users = self.birthdays()
+        start = bisect_left(
+            users,
+            (date.month, date.day),
+            key=lambda user: (user.birthdate.month, user.birthdate.day),
+        )
+        return (users[start:] + users[:start])[:number]
+
 
 class UserCustom(AbstractUser):
     slug = AutoSlugField(
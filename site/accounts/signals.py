@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UserCustom
+
+
+@receiver(post_save, sender=UserCustom)
+@receiver(post_delete, sender=UserCustom)
+def clear_birthdays_cache(sender, update_fields=None, **kwargs):
+    # Logging in only updates `last_login`
+    if update_fields == frozenset(["last_login"]):
+        return
+    UserCustom.objects.clear_birthdays_cache()
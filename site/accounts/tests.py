@@ -1,3 +1,4 @@
+from datetime import date
 from http import HTTPStatus
 from urllib.parse import urlencode
 
@@ -11,7 +12,9 @@ from django.urls import reverse
 from django.utils.text import slugify
 from django.utils.timezone import now
 
-from common.constants.models import Constant
+from brewing.factories import TransactionFactory
+from brewing.models import TransactionType
+from common.constants.models import INSTRUMENT_GROUP_LEADER_GROUP_NAME
 from common.mixins import TestMixin
 from common.test_utils import test_image
 from instruments.factories import InstrumentTypeFactory
@@ -25,7 +28,7 @@ from .forms import (
 from .models import UserCustom
 
 
-class UserCustomManagerTestCase(TestCase):
+class UserCustomManagerTestCase(TestMixin, TestCase):
     def test_active_includes_paying_members_aspirants_and_overriden_active(self):
         """
         `active()` should include paying members, aspirants,
@@ -46,6 +49,61 @@ class UserCustomManagerTestCase(TestCase):
             ordered=False,
         )
 
+    def test_birthdays_ordered_by_day_of_year(self):
+        """`birthdays()` should order users by the day of the year of their birthday."""
+        december = UserFactory(birthdate=date(1990, 12, 1))
+        january = UserFactory(birthdate=date(2000, 1, 15))
+        march = UserFactory(birthdate=date(1980, 3, 3))
+        self.assertEqual(UserCustom.objects.birthdays(), [january, march, december])
+
+    def test_birthdays_excludes_inactive_users_and_users_without_birthdate(self):
+        """`birthdays()` should only include active users with a birthdate."""
+        UserFactory(birthdate=None)
+        UserFactory(
+            birthdate=date(1990, 1, 1),
+            membership_status=UserCustom.MembershipStatus.RETIRED,
+        )
+        self.assertEqual(UserCustom.objects.birthdays(), [])
+
+    def test_birthdays_no_queries_when_cached(self):
+        """`birthdays()` should not query the database when cached."""
+        UserFactory(birthdate=date(1990, 1, 1))
+        UserCustom.objects.birthdays()
+        with self.assertNumQueries(0):
+            UserCustom.objects.birthdays()
+
+    def test_birthdays_updated_when_saving_users(self):
+        """`birthdays()` should include changes to users."""
+        user = UserFactory(birthdate=date(1990, 1, 1))
+        UserCustom.objects.birthdays()
+        user.membership_status = UserCustom.MembershipStatus.RETIRED
+        user.save()
+        self.assertEqual(UserCustom.objects.birthdays(), [])
+
+    def test_birthdays_on(self):
+        """`birthdays_on()` should return users with their birthday on the date."""
+        user = UserFactory(birthdate=date(1990, 5, 17))
+        UserFactory(birthdate=date(1990, 5, 18))
+        self.assertEqual(
+            UserCustom.objects.birthdays_on(date(2023, 5, 17)),
+            [user],
+        )
+
+    def test_upcoming_birthdays(self):
+        """
+        `upcoming_birthdays()` should return the next birthdays from the date,
+        including the date itself, continuing from the start of the year.
+        """
+        january = UserFactory(birthdate=date(1990, 1, 1))
+        february = UserFactory(birthdate=date(1990, 2, 1))
+        UserFactory(birthdate=date(1990, 5, 1))
+        june = UserFactory(birthdate=date(1990, 6, 1))
+        december = UserFactory(birthdate=date(1990, 12, 31))
+        self.assertEqual(
+            UserCustom.objects.upcoming_birthdays(date(2023, 6, 1), 4),
+            [june, december, january, february],
+        )
+
 
 class UserCustomTest(TestMixin, TestCase):
     def test_get_absolute_url(self):
@@ -352,6 +410,14 @@ class ProfileDetailTest(TestMixin, TestCase):
         user = UserFactory()
         self.assertLoginRequired(reverse("accounts:ProfileDetail", args=[user.slug]))
 
+    def test_brewing_balance(self):
+        """Should show the user's stored brewing balance."""
+        user = UserFactory()
+        TransactionFactory(user=user, amount=20, type=TransactionType.DEPOSIT)
+        self.client.force_login(user)
+        response = self.client.get(reverse("accounts:ProfileDetail", args=[user.slug]))
+        self.assertEqual(response.context["brewing_balance"], 20)
+
 
 class BirthdayListTestSuite(TestMixin, TestCase):
     def get_url(self):
@@ -492,11 +558,8 @@ class InstrumentGroupLeaderListTestSuite(TestMixin, TestCase):
 class InstrumentGroupLeadersFormTestSuite(TestMixin, TestCase):
     def setUp(self):
         self.user = UserFactory()
-        instrument_group_leader_group_name, _ = Constant.objects.get_or_create(
-            name="Instrumentgruppeleiargruppenamn"
-        )
         self.instrument_leader_group = Group.objects.create(
-            name=instrument_group_leader_group_name.value
+            name=INSTRUMENT_GROUP_LEADER_GROUP_NAME.get()
         )
         self.instrument_leader_group.user_set.add(self.user)
 
@@ -511,11 +574,8 @@ class InstrumentGroupLeadersUpdateTestSuite(TestMixin, TestCase):
         return reverse("accounts:InstrumentGroupLeadersUpdate")
 
     def setUp(self):
-        instrument_group_leader_group_name, _ = Constant.objects.get_or_create(
-            name="Instrumentgruppeleiargruppenamn"
-        )
         self.instrument_leader_group = Group.objects.create(
-            name=instrument_group_leader_group_name.value
+            name=INSTRUMENT_GROUP_LEADER_GROUP_NAME.get()
         )
 
         self.form = InstrumentGroupLeadersForm()
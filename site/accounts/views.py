@@ -12,8 +12,9 @@ from django.urls import reverse, reverse_lazy
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.generic import CreateView, DetailView, FormView, ListView, UpdateView
 
+from brewing.models import Balance
 from common.breadcrumbs.breadcrumbs import Breadcrumb, BreadcrumbsMixin
-from common.constants.models import Constant
+from common.constants.models import INSTRUMENT_GROUP_LEADER_GROUP_NAME
 from common.embeddable_text.models import EmbeddableText
 from common.markdown.templatetags.markdown import markdown
 
@@ -85,6 +86,10 @@ class ProfileDetail(LoginRequiredMixin, BreadcrumbsMixin, DetailView):
     context_object_name = "profile"
     breadcrumb_parent = MemberList
 
+    def get_context_data(self, **kwargs):
+        kwargs["brewing_balance"] = Balance.objects.of(self.object)
+        return super().get_context_data(**kwargs)
+
     @classmethod
     def get_breadcrumb(cls, user, **kwargs) -> Breadcrumb:
         return Breadcrumb(
@@ -115,7 +120,7 @@ class BirthdayList(LoginRequiredMixin, BreadcrumbsMixin, ListView):
     breadcrumb_parent = MemberList
 
     def get_queryset(self):
-        return UserCustom.objects.active().exclude(birthdate__isnull=True)
+        return UserCustom.objects.birthdays()
 
 
 class ImageSharingConsentList(PermissionRequiredMixin, BreadcrumbsMixin, ListView):
@@ -181,11 +186,8 @@ class InstrumentGroupLeaderList(LoginRequiredMixin, BreadcrumbsMixin, ListView):
         )
 
     def get_queryset(self):
-        instrument_group_leader_group_name, _ = Constant.objects.get_or_create(
-            name="Instrumentgruppeleiargruppenamn"
-        )
         instrument_leaders_group, _ = Group.objects.get_or_create(
-            name=instrument_group_leader_group_name.value
+            name=INSTRUMENT_GROUP_LEADER_GROUP_NAME.get()
         )
         return instrument_leaders_group.user_set.all()
 
@@ -0,0 +1,20 @@
+# Generated by Django 4.1 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0003_alter_article_created_by_alter_article_modified_by"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="markdown_html",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="markdown som HTML"
+            ),
+        ),
+    ]
@@ -5,3 +5,6 @@ class BrewingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "brewing"
     verbose_name = "brygging"
+
+    def ready(self):
+        from . import signals  # noqa: F401
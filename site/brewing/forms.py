@@ -43,9 +43,8 @@ class DepositForm(ModelForm):
     helper.layout = Layout(
         HTML(
             """
-                {% load embeddable_text markdown %}
-                {% get_embeddable_text "Innbetaling til bryggjekassa" as text %}
-                {{ text | markdown }}
+                {% load embeddable_text %}
+                {% embeddable_text "Innbetaling til bryggjekassa" %}
                 """
         ),
         Field("amount", css_class="w-32"),
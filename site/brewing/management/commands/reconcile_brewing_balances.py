@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from brewing.models import Balance
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks that the stored brewing balances, deposits and purchases "
+        "match the sums of each user's transactions, and corrects those that don't."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only list wrong balances, and exit with an error if there are any.",
+        )
+
+    def handle(self, check, **options):
+        wrong = Balance.objects.reconcile(fix=not check)
+        for user_pk, stored, actual in wrong:
+            self.stdout.write(
+                f"User {user_pk}: stored (balance, deposited, purchased) {stored}, "
+                f"actual {actual}"
+            )
+        if check:
+            if wrong:
+                raise CommandError(f"{len(wrong)} balances are wrong.")
+            self.stdout.write("All balances are correct.")
+        else:
+            self.stdout.write(f"Corrected {len(wrong)} balances.")
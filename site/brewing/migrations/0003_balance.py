@@ -0,0 +1,61 @@
+# Generated by Django 4.1 on 2026-10-18 12:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, Sum, When
+
+
+def create_balances(apps, schema_editor):
+    Balance = apps.get_model("brewing", "Balance")
+    Transaction = apps.get_model("brewing", "Transaction")
+    balances = (
+        Transaction.objects.order_by()
+        .values("user")
+        .annotate(
+            balance=Sum(
+                Case(
+                    When(type="DEPOSIT", then=F("amount")),
+                    default=-F("amount"),
+                )
+            )
+        )
+    )
+    Balance.objects.bulk_create(
+        Balance(user_id=balance["user"], balance=balance["balance"])
+        for balance in balances
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("accounts", "0023_usercustom_preferred_name"),
+        ("brewing", "0002_brew_empty_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Balance",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="brewing_balance",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="brukar",
+                    ),
+                ),
+                ("balance", models.IntegerField(default=0, verbose_name="saldo")),
+            ],
+            options={
+                "verbose_name": "saldo",
+                "verbose_name_plural": "saldoar",
+            },
+        ),
+        migrations.RunPython(create_balances, migrations.RunPython.noop),
+    ]
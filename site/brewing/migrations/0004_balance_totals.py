@@ -0,0 +1,43 @@
+# Generated by Django 4.1 on 2026-10-18 12:36
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def set_totals(apps, schema_editor):
+    Balance = apps.get_model("brewing", "Balance")
+    Transaction = apps.get_model("brewing", "Transaction")
+    totals = (
+        Transaction.objects.order_by()
+        .values("user", "type")
+        .annotate(total=Sum("amount"))
+    )
+    balances = {balance.pk: balance for balance in Balance.objects.all()}
+    for total in totals:
+        balance = balances[total["user"]]
+        if total["type"] == "DEPOSIT":
+            balance.deposited = total["total"]
+        else:
+            balance.purchased = total["total"]
+    Balance.objects.bulk_update(balances.values(), ["deposited", "purchased"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("brewing", "0003_balance"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="balance",
+            name="deposited",
+            field=models.IntegerField(default=0, verbose_name="innbetalt"),
+        ),
+        migrations.AddField(
+            model_name="balance",
+            name="purchased",
+            field=models.IntegerField(default=0, verbose_name="kjøpt for"),
+        ),
+        migrations.RunPython(set_totals, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,8 @@ from math import ceil
 
 from autoslug.fields import AutoSlugField
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import (
     CASCADE,
     SET_NULL,
@@ -15,6 +17,8 @@ from django.db.models import (
     ImageField,
     IntegerField,
     Manager,
+    Model,
+    OneToOneField,
     Q,
     TextChoices,
     When,
@@ -22,7 +26,7 @@ from django.db.models import (
 from django.db.models.aggregates import Sum
 from django.templatetags.static import static
 
-from common.constants.models import Constant
+from common.constants.models import BREW_SURCHARGE
 from common.models import CreatedModifiedMixin
 
 
@@ -52,10 +56,7 @@ class Brew(CreatedModifiedMixin):
 
     def surcharge(self):
         """Returns the current surcharge for brews."""
-        surcharge, _ = Constant.objects.get_or_create(
-            name="Påslag på brygg i NOK", defaults={"value": "2"}
-        )
-        return int(surcharge.value)
+        return BREW_SURCHARGE.get()
 
     class Sizes(TextChoices):
         SIZE_0_33 = "SIZE_0_33", "0.33 L"
@@ -135,8 +136,8 @@ class TransactionType(TextChoices):
 class TransactionManager(Manager):
     def balance(self):
         """
-        Returns the balance of the manager's queryset, most commonly used to
-        return a user's balance by calling `user.brewing_transactions.balance()`.
+        Returns the balance of the manager's queryset, calculated from its transactions.
+        A user's stored balance is returned by `Balance.objects.of(user)`.
         """
         amount_sign_depending_on_type = Case(
             When(type=TransactionType.DEPOSIT, then=F("amount")),
@@ -192,3 +193,134 @@ class Transaction(CreatedModifiedMixin):
                 violation_error_message="Beløpet til ein transaksjon må vere større enn 0.",
             )
         ]
+
+
+class BalanceManager(Manager):
+    def cache_key(self, user_pk):
+        return f"brewing:balance:{user_pk}"
+
+    def add(self, user_pk, deposited=0, purchased=0, create=True):
+        """
+        Adds `deposited` and `purchased` to the totals of the user with primary key `user_pk`.
+        The balance is created if it doesn't exist and `create` is `True`.
+        """
+        totals = {
+            "balance": F("balance") + deposited - purchased,
+            "deposited": F("deposited") + deposited,
+            "purchased": F("purchased") + purchased,
+        }
+        with transaction.atomic():
+            updated = self.filter(user_id=user_pk).update(**totals)
+            if not updated and create:
+                # Ignores the conflict if another transaction created the balance
+                # in the meantime, which is then added to instead
+                self.bulk_create([Balance(user_id=user_pk)], ignore_conflicts=True)
+                self.filter(user_id=user_pk).update(**totals)
+            # Also cleared after committing, in case the old balance
+            # was cached again by another request in the meantime
+            cache.delete(self.cache_key(user_pk))
+            transaction.on_commit(lambda: cache.delete(self.cache_key(user_pk)))
+
+    def add_transaction(self, brewing_transaction, sign=1, create=True):
+        """
+        Adds `brewing_transaction` to its user's balance,
+        or subtracts it if `sign` is -1.
+        """
+        if brewing_transaction.type == TransactionType.DEPOSIT:
+            amounts = {"deposited": sign * brewing_transaction.amount}
+        else:
+            amounts = {"purchased": sign * brewing_transaction.amount}
+        self.add(brewing_transaction.user_id, **amounts, create=create)
+
+    def of(self, user):
+        """
+        Returns the balance of `user`.
+
+        Cached, since it's shown in the sidebar on every page.
+        The cache is cleared when the balance changes.
+        """
+        balance = cache.get(self.cache_key(user.pk))
+        if balance is None:
+            balance = (
+                self.filter(user=user).values_list("balance", flat=True).first() or 0
+            )
+            cache.set(self.cache_key(user.pk), balance, None)
+        return balance
+
+    def reconcile(self, fix=True):
+        """
+        Compares the stored balances with the sums of the users' transactions,
+        and returns the balances that are wrong as `(user_pk, stored, actual)` tuples,
+        where `stored` and `actual` are `(balance, deposited, purchased)` tuples.
+        If `fix`, the wrong balances are corrected.
+
+        Balances go wrong if transactions are changed
+        without sending signals, like with `QuerySet.update()`.
+        """
+        actual = {}
+        for user_pk, type, amount in Transaction.objects.values_list(
+            "user", "type", "amount"
+        ):
+            _, deposited, purchased = actual.get(user_pk, (0, 0, 0))
+            if type == TransactionType.DEPOSIT:
+                deposited += amount
+            else:
+                purchased += amount
+            actual[user_pk] = (deposited - purchased, deposited, purchased)
+
+        wrong = []
+        with transaction.atomic():
+            balances = self.all()
+            if fix:
+                balances = balances.select_for_update()
+            stored = {
+                user_pk: totals
+                for user_pk, *totals in balances.values_list(
+                    "user", "balance", "deposited", "purchased"
+                )
+            }
+            for user_pk in sorted(stored.keys() | actual.keys()):
+                stored_totals = tuple(stored.get(user_pk, (0, 0, 0)))
+                actual_totals = actual.get(user_pk, (0, 0, 0))
+                if stored_totals != actual_totals:
+                    wrong.append((user_pk, stored_totals, actual_totals))
+            if fix:
+                for user_pk, _, (balance, deposited, purchased) in wrong:
+                    self.update_or_create(
+                        user_id=user_pk,
+                        defaults={
+                            "balance": balance,
+                            "deposited": deposited,
+                            "purchased": purchased,
+                        },
+                    )
+                    cache.delete(self.cache_key(user_pk))
+        return wrong
+
+
+class Balance(Model):
+    """
+    A user's brewing balance, and the totals of the user's deposits and purchases.
+    Kept up to date when transactions are saved or deleted, see `brewing.signals`,
+    so that transactions don't have to be summed each time balances are shown.
+    """
+
+    objects = BalanceManager()
+
+    user = OneToOneField(
+        settings.AUTH_USER_MODEL,
+        verbose_name="brukar",
+        on_delete=CASCADE,
+        primary_key=True,
+        related_name="brewing_balance",
+    )
+    balance = IntegerField("saldo", default=0)
+    deposited = IntegerField("innbetalt", default=0)
+    purchased = IntegerField("kjøpt for", default=0)
+
+    def __str__(self):
+        return f"{self.user} – {self.balance} NOK"
+
+    class Meta:
+        verbose_name = "saldo"
+        verbose_name_plural = "saldoar"
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Balance, Transaction
+
+
+@receiver(pre_save, sender=Transaction)
+def store_previous_transaction(sender, instance, **kwargs):
+    instance.previous = (
+        Transaction.objects.filter(pk=instance.pk).first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=Transaction)
+def update_balance_on_save(sender, instance, **kwargs):
+    if instance.previous is not None:
+        Balance.objects.add_transaction(instance.previous, sign=-1)
+    Balance.objects.add_transaction(instance)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_balance_on_delete(sender, instance, **kwargs):
+    # Transactions are deleted when their user is,
+    # in which case the balance shouldn't be created again
+    Balance.objects.add_transaction(instance, sign=-1, create=False)
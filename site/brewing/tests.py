@@ -1,29 +1,36 @@
 from http import HTTPStatus
+from unittest.mock import Mock, patch
 
+from django.core.management import CommandError, call_command
 from django.db import IntegrityError
+from django.db.models import QuerySet
 from django.templatetags.static import static
 from django.test import TestCase
 from django.urls import reverse
 
 from accounts.factories import SuperUserFactory, UserFactory
-from common.constants.factories import ConstantFactory
+from common.constants.models import BREW_SURCHARGE, Constant
 from common.mixins import TestMixin
 from common.test_utils import test_image
 
 from .factories import BrewFactory, TransactionFactory
-from .models import Brew, Transaction, TransactionType
+from .models import Balance, Brew, Transaction, TransactionType
 
 
 class BrewTestSuite(TestMixin, TestCase):
     def test_surcharge(self):
         """Returns the value of the surcharge constant, cast to an integer."""
-        ConstantFactory(name="Påslag på brygg i NOK", value="5")
+        Constant.objects.update_or_create(
+            name=BREW_SURCHARGE.name, defaults={"value": "5"}
+        )
         brew = BrewFactory()
         self.assertEqual(brew.surcharge(), 5)
 
     def test_price_per_0_5(self):
         """Should return the price of the brew per 0.5 L, with the current surcharge."""
-        ConstantFactory(name="Påslag på brygg i NOK", value="2")
+        Constant.objects.update_or_create(
+            name=BREW_SURCHARGE.name, defaults={"value": "2"}
+        )
         brew = BrewFactory(price_per_liter=20)
         self.assertEqual(brew.price_per_0_5(), 10 + 2)
         brew = BrewFactory(price_per_liter=15)
@@ -36,7 +43,9 @@ class BrewTestSuite(TestMixin, TestCase):
 
     def test_price_per_0_33(self):
         """Should return the price of the brew per 0.33 L, with the current surcharge."""
-        ConstantFactory(name="Påslag på brygg i NOK", value="2")
+        Constant.objects.update_or_create(
+            name=BREW_SURCHARGE.name, defaults={"value": "2"}
+        )
         brew = BrewFactory(price_per_liter=9)
         self.assertEqual(brew.price_per_0_33(), 3 + 2)
         brew = BrewFactory(price_per_liter=10)
@@ -136,6 +145,144 @@ class TransactionTestSuite(TestMixin, TestCase):
             TransactionFactory(amount=-20)
 
 
+class BalanceTestSuite(TestMixin, TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+
+    def test_to_str(self):
+        """`__str__` should include the user and the balance."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        balance = Balance.objects.get(user=self.user)
+        self.assertEqual(str(balance), f"{self.user} – 20 NOK")
+
+    def test_of(self):
+        """Should return the sum of the user's transactions."""
+        TransactionFactory(user=self.user, amount=50, type=TransactionType.DEPOSIT)
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.PURCHASE)
+        self.assertEqual(Balance.objects.of(self.user), 30)
+
+    def test_of_returns_0_if_user_has_no_transactions(self):
+        """Should return 0 if the user has no transactions."""
+        self.assertEqual(Balance.objects.of(self.user), 0)
+
+    def test_of_no_queries_when_cached(self):
+        """Should not query the database when the balance is cached."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        Balance.objects.of(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(Balance.objects.of(self.user), 20)
+
+    def test_add_to_balance_created_concurrently(self):
+        """Should add to the balance if another transaction created it after checking."""
+        Balance.objects.create(user=self.user, balance=5, deposited=5)
+        update = QuerySet.update
+        num_updates = 0
+
+        def update_after_concurrent_create(queryset, **kwargs):
+            nonlocal num_updates
+            num_updates += 1
+            # The first update ran before the balance was created
+            return 0 if num_updates == 1 else update(queryset, **kwargs)
+
+        with patch.object(QuerySet, "update", update_after_concurrent_create):
+            Balance.objects.add(self.user.pk, deposited=20)
+        balance = Balance.objects.get(user=self.user)
+        self.assertEqual(balance.balance, 25)
+        self.assertEqual(balance.deposited, 25)
+
+    def test_of_updated_when_adding_transactions(self):
+        """Should return the new balance after adding transactions."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        Balance.objects.of(self.user)
+        TransactionFactory(user=self.user, amount=5, type=TransactionType.PURCHASE)
+        self.assertEqual(Balance.objects.of(self.user), 15)
+
+    def test_updated_when_changing_transactions(self):
+        """Should update the balances when changing a transaction's amount, type, or user."""
+        other_user = UserFactory()
+        transaction = TransactionFactory(
+            user=self.user, amount=20, type=TransactionType.DEPOSIT
+        )
+        transaction.amount = 30
+        transaction.type = TransactionType.PURCHASE
+        transaction.save()
+        self.assertEqual(Balance.objects.of(self.user), -30)
+
+        transaction.user = other_user
+        transaction.save()
+        self.assertEqual(Balance.objects.of(self.user), 0)
+        self.assertEqual(Balance.objects.of(other_user), -30)
+
+    def test_updated_when_deleting_transactions(self):
+        """Should update the balance when deleting transactions."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        transaction = TransactionFactory(
+            user=self.user, amount=5, type=TransactionType.PURCHASE
+        )
+        transaction.delete()
+        self.assertEqual(Balance.objects.of(self.user), 20)
+
+    def test_deleting_user_with_transactions(self):
+        """Should be possible to delete users with transactions."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        self.user.delete()
+        self.assertFalse(Balance.objects.exists())
+
+    def test_reconcile(self):
+        """Should correct balances that don't match the transactions."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        other_user = UserFactory()
+        TransactionFactory(user=other_user, amount=10, type=TransactionType.DEPOSIT)
+        Transaction.objects.filter(user=self.user).update(amount=25)
+        Balance.objects.of(self.user)
+
+        wrong = Balance.objects.reconcile()
+        self.assertEqual(wrong, [(self.user.pk, (20, 20, 0), (25, 25, 0))])
+        self.assertEqual(Balance.objects.of(self.user), 25)
+        self.assertEqual(Balance.objects.of(other_user), 10)
+
+    def test_reconcile_without_fix(self):
+        """Should not correct balances when `fix` is `False`."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        Balance.objects.filter(user=self.user).update(balance=0)
+        self.assertEqual(len(Balance.objects.reconcile(fix=False)), 1)
+        self.assertEqual(Balance.objects.get(user=self.user).balance, 0)
+
+    def test_totals(self):
+        """Should store the totals of the user's deposits and purchases."""
+        TransactionFactory(user=self.user, amount=50, type=TransactionType.DEPOSIT)
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.PURCHASE)
+        purchase = TransactionFactory(
+            user=self.user, amount=5, type=TransactionType.PURCHASE
+        )
+        purchase.delete()
+        balance = Balance.objects.get(user=self.user)
+        self.assertEqual(balance.balance, 30)
+        self.assertEqual(balance.deposited, 50)
+        self.assertEqual(balance.purchased, 20)
+
+    def test_transactions_balance_sums_transactions(self):
+        """`user.brewing_transactions.balance()` should sum the transactions, not read the stored balance."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        Balance.objects.filter(user=self.user).update(balance=10)
+        self.assertEqual(self.user.brewing_transactions.balance(), 20)
+
+    def test_reconcile_brewing_balances_check(self):
+        """`reconcile_brewing_balances --check` should fail if balances are wrong."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        call_command("reconcile_brewing_balances", check=True, stdout=Mock())
+        Balance.objects.filter(user=self.user).update(balance=0)
+        with self.assertRaises(CommandError):
+            call_command("reconcile_brewing_balances", check=True, stdout=Mock())
+
+    def test_reconcile_brewing_balances_command(self):
+        """`reconcile_brewing_balances` should correct wrong balances."""
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        Balance.objects.filter(user=self.user).delete()
+        call_command("reconcile_brewing_balances", stdout=Mock())
+        self.assertEqual(Balance.objects.of(self.user), 20)
+
+
 class BrewOverviewTestSuite(TestMixin, TestCase):
     def get_url(self):
         return reverse("brewing:BrewOverview")
@@ -154,6 +301,14 @@ class BrewOverviewTestSuite(TestMixin, TestCase):
         self.assertIn(available_brew, response.context["available_brews"])
         self.assertNotIn(unavailable_brew, response.context["available_brews"])
 
+    def test_balance(self):
+        """Should show the user's stored balance."""
+        user = UserFactory()
+        TransactionFactory(user=user, amount=20, type=TransactionType.DEPOSIT)
+        self.client.force_login(user)
+        response = self.client.get(self.get_url())
+        self.assertEqual(response.context["balance"], 20)
+
 
 class BrewListTestSuite(TestMixin, TestCase):
     def get_url(self):
@@ -224,6 +379,17 @@ class BalanceListTestSuite(TestMixin, TestCase):
         self.assertEqual(user_in_response.deposited, 40)
         self.assertEqual(user_in_response.purchased, 20)
 
+    def test_users_without_transactions(self):
+        """Users without transactions should have everything set to 0."""
+        user = SuperUserFactory()
+        self.client.force_login(user)
+        response = self.client.get(self.get_url())
+
+        user_in_response = response.context["users"].get(id=user.id)
+        self.assertEqual(user_in_response.balance, 0)
+        self.assertEqual(user_in_response.deposited, 0)
+        self.assertEqual(user_in_response.purchased, 0)
+
 
 class DepositCreateTestSuite(TestMixin, TestCase):
     def get_url(self):
@@ -1,8 +1,6 @@
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.core.exceptions import PermissionDenied
-from django.db.models import Case, F, When
-from django.db.models.aggregates import Sum
 from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django.urls import reverse, reverse_lazy
@@ -12,7 +10,7 @@ from accounts.models import UserCustom
 from common.breadcrumbs.breadcrumbs import Breadcrumb, BreadcrumbsMixin
 
 from .forms import BrewForm, BrewPurchaseForm, DepositForm
-from .models import Brew, Transaction, TransactionType
+from .models import Balance, Brew, Transaction
 
 
 class BrewOverview(LoginRequiredMixin, BreadcrumbsMixin, ListView):
@@ -25,6 +23,7 @@ class BrewOverview(LoginRequiredMixin, BreadcrumbsMixin, ListView):
 
     def get_context_data(self, **kwargs):
         kwargs["brew_sizes"] = Brew.Sizes
+        kwargs["balance"] = Balance.objects.of(self.request.user)
         return super().get_context_data(**kwargs)
 
     @classmethod
@@ -84,35 +83,14 @@ class BalanceList(PermissionRequiredMixin, BreadcrumbsMixin, ListView):
         kwargs["membership_status_enum"] = UserCustom.MembershipStatus
         return super().get_context_data(**kwargs)
 
-    def amount_if_matching_type(self, type):
-        """Returns a `Case` that chooses the transaction `amount` if the type equals `type`, else 0."""
-        return Case(
-            When(
-                brewing_transactions__type=type, then=F("brewing_transactions__amount")
-            ),
-            default=0,
-        )
-
     def get_queryset(self):
-        amount_sign_depending_on_type = Case(
-            When(
-                brewing_transactions__type=TransactionType.DEPOSIT,
-                then=F("brewing_transactions__amount"),
-            ),
-            default=-F("brewing_transactions__amount"),
-        )
-
         return (
             super()
             .get_queryset()
             .annotate(
-                balance=Coalesce(Sum(amount_sign_depending_on_type), 0),
-                deposited=Coalesce(
-                    Sum(self.amount_if_matching_type(TransactionType.DEPOSIT)), 0
-                ),
-                purchased=Coalesce(
-                    Sum(self.amount_if_matching_type(TransactionType.PURCHASE)), 0
-                ),
+                balance=Coalesce("brewing_balance__balance", 0),
+                deposited=Coalesce("brewing_balance__deposited", 0),
+                purchased=Coalesce("brewing_balance__purchased", 0),
             )
         )
 
@@ -2,10 +2,13 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import CASCADE, ForeignKey, IntegerField, TextField
 
+from common.markdown.models import RenderedMarkdownMixin
 from common.models import CreatedModifiedMixin
 
 
-class Comment(CreatedModifiedMixin):
+class Comment(RenderedMarkdownMixin, CreatedModifiedMixin):
+    markdown_field = "comment"
+
     content_type = ForeignKey(ContentType, on_delete=CASCADE)
     object_pk = IntegerField()
     content_object = GenericForeignKey("content_type", "object_pk")
@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ConstantsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "common.constants"
     verbose_name = "konstantar"
+
+    def ready(self):
+        from .signals import seed_constants
+
+        post_migrate.connect(seed_constants, sender=self)
@@ -1,7 +1,44 @@
-from django.db.models import CharField, Model
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.db.models import CharField, Manager, Model
+
+
+class ConstantManager(Manager):
+    cache_key = "constants:all"
+
+    def cached_values(self):
+        """
+        Returns a dict from the name of each constant to its value.
+
+        Cached, since constants are read on many pages.
+        The cache is cleared when constants are saved or deleted,
+        see `common.constants.signals`.
+        """
+        values = cache.get(self.cache_key)
+        if values is None:
+            values = dict(self.values_list("name", "value"))
+            cache.set(self.cache_key, values, None)
+        return values
+
+    def clear_cache(self):
+        cache.delete(self.cache_key)
+
+    def seed(self, using=None):
+        """Creates the defined constants that don't exist, with their default values."""
+        self.db_manager(using).bulk_create(
+            [
+                Constant(name=definition.name, value=str(definition.default))
+                for definition in definitions.values()
+            ],
+            ignore_conflicts=True,
+        )
 
 
 class Constant(Model):
+    objects = ConstantManager()
+
     name = CharField("namn", max_length=255, unique=True)
     value = CharField("verdi", max_length=255, blank=True)
 
@@ -12,3 +49,44 @@ class Constant(Model):
         ordering = ["name"]
         verbose_name = "konstant"
         verbose_name_plural = "konstantar"
+
+
+@dataclass(eq=True, frozen=True)
+class ConstantDefinition:
+    """
+    A constant used by the code, which site admins can change in the admin panel.
+    Defined constants are created with their default value when migrating.
+
+    `str` `name`: The name of the constant
+    `default`: The value used if the constant doesn't exist or can't be converted to `type`
+    `type`: Converts the constant's value, which is stored as a string
+    """
+
+    name: str
+    default: Any = ""
+    type: Callable[[str], Any] = str
+
+    def get(self):
+        """Returns the constant's value, converted to `type`."""
+        value = Constant.objects.cached_values().get(self.name)
+        if value is None:
+            return self.default
+        try:
+            return self.type(value)
+        except ValueError:
+            return self.default
+
+
+definitions = {}
+
+
+def define(name, default="", type=str):
+    """Defines and returns a constant, see `ConstantDefinition`."""
+    definitions[name] = ConstantDefinition(name, default, type)
+    return definitions[name]
+
+
+BREW_SURCHARGE = define("Påslag på brygg i NOK", default=2, type=int)
+BIRTHDAY_SONG_SLUG = define("Bursdagssangslug")
+GUEST_START_PAGE = define("Gjestestartside")
+INSTRUMENT_GROUP_LEADER_GROUP_NAME = define("Instrumentgruppeleiargruppenamn")
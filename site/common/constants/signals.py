@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Constant
+
+
+@receiver(post_save, sender=Constant)
+@receiver(post_delete, sender=Constant)
+def clear_cache(sender, **kwargs):
+    Constant.objects.clear_cache()
+
+
+def seed_constants(sender, using, **kwargs):
+    Constant.objects.seed(using)
@@ -4,6 +4,7 @@ from django.test import TestCase
 from common.mixins import TestMixin
 
 from .factories import ConstantFactory
+from .models import GUEST_START_PAGE, Constant, ConstantDefinition, definitions
 
 
 class ConstantTestSuite(TestMixin, TestCase):
@@ -18,3 +19,47 @@ class ConstantTestSuite(TestMixin, TestCase):
         """`name` should be unique."""
         with self.assertRaises(IntegrityError):
             ConstantFactory(name=self.constant.name)
+
+    def test_seeded(self):
+        """Defined constants should be created with their default values when migrating."""
+        for definition in definitions.values():
+            self.assertEqual(
+                Constant.objects.get(name=definition.name).value,
+                str(definition.default),
+            )
+
+
+class ConstantDefinitionTestSuite(TestMixin, TestCase):
+    def setUp(self):
+        self.definition = ConstantDefinition("Konstant", default=2, type=int)
+
+    def test_get(self):
+        """Should return the constant's value, converted to `type`."""
+        ConstantFactory(name="Konstant", value="5")
+        self.assertEqual(self.definition.get(), 5)
+
+    def test_get_default_if_missing(self):
+        """Should return the default value if the constant doesn't exist."""
+        self.assertEqual(self.definition.get(), 2)
+
+    def test_get_default_if_invalid(self):
+        """Should return the default value if the value can't be converted to `type`."""
+        ConstantFactory(name="Konstant", value="mykje")
+        self.assertEqual(self.definition.get(), 2)
+
+    def test_get_cached(self):
+        """Should read constants from the cache."""
+        self.definition.get()
+        with self.assertNumQueries(0):
+            self.definition.get()
+            GUEST_START_PAGE.get()
+
+    def test_cache_cleared_on_save(self):
+        """Should clear the cache when constants are saved or deleted."""
+        constant = ConstantFactory(name="Konstant", value="5")
+        self.assertEqual(self.definition.get(), 5)
+        constant.value = "7"
+        constant.save()
+        self.assertEqual(self.definition.get(), 7)
+        constant.delete()
+        self.assertEqual(self.definition.get(), 2)
@@ -5,3 +5,6 @@ class EmbeddableTextConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "common.embeddable_text"
     verbose_name = "Innbyggbar tekst"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,12 +1,51 @@
-from django.db.models import CharField, Model, TextField
+from django.core.cache import cache
+from django.db.models import CharField, Manager, TextField
 
+from common.markdown.models import RenderedMarkdownMixin
 
-class EmbeddableText(Model):
+
+class EmbeddableTextManager(Manager):
+    cache_key = "embeddable_text:all"
+
+    def by_name(self):
+        """
+        Returns a dict from the name of each embeddable text to the embeddable text.
+
+        Cached, since embeddable texts are used on many pages, including error pages.
+        The cache is cleared when embeddable texts are saved or deleted,
+        see `common.embeddable_text.signals`.
+        """
+        texts = cache.get(self.cache_key)
+        if texts is None:
+            texts = {text.name: text for text in self.all()}
+            cache.set(self.cache_key, texts, None)
+        return texts
+
+    def clear_cache(self):
+        cache.delete(self.cache_key)
+
+    def get_cached(self, name):
+        """
+        Returns the embeddable text named `name` from the cache.
+        The text is only created if it doesn't exist,
+        so that site admins can find and fill it in.
+        """
+        text = self.by_name().get(name)
+        if text is None:
+            text, _ = self.get_or_create(name=name)
+        return text
+
+
+class EmbeddableText(RenderedMarkdownMixin):
     """
     A piece of text that can be configured in the admin panel.
     Intended to be embedded with a hardcoded `name` in apps that need text that is easy for site admins to update.
     """
 
+    objects = EmbeddableTextManager()
+
+    markdown_field = "content"
+
     name = CharField("namn", max_length=255, unique=True)
     content = TextField("innhald", blank=True, default="")
 
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import EmbeddableText
+
+
+@receiver(post_save, sender=EmbeddableText)
+@receiver(post_delete, sender=EmbeddableText)
+def clear_cache(sender, **kwargs):
+    EmbeddableText.objects.clear_cache()
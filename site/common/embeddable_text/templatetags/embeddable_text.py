@@ -1,5 +1,7 @@
 from django import template
 
+from common.markdown.templatetags.markdown import rendered_markdown
+
 from ..models import EmbeddableText
 
 register = template.Library()
@@ -7,5 +9,10 @@ register = template.Library()
 
 @register.simple_tag
 def get_embeddable_text(name):
-    text, _ = EmbeddableText.objects.get_or_create(name=name)
-    return text.content
+    return EmbeddableText.objects.get_cached(name).content
+
+
+@register.simple_tag
+def embeddable_text(name):
+    """Returns the embeddable text `name`, rendered as markdown."""
+    return rendered_markdown(EmbeddableText.objects.get_cached(name))
@@ -5,6 +5,7 @@ from common.mixins import TestMixin
 
 from .factories import EmbeddableTextFactory
 from .models import EmbeddableText
+from .templatetags.embeddable_text import embeddable_text
 
 
 class EmbeddableTextTestSuite(TestMixin, TestCase):
@@ -33,3 +34,53 @@ class EmbeddableTextTestSuite(TestMixin, TestCase):
                 {"name": "text_b"},
             ],
         )
+
+
+class EmbeddableTextTagTestSuite(TestMixin, TestCase):
+    def test_embeddable_text_renders_markdown(self):
+        """`embeddable_text` should return the text rendered as markdown."""
+        EmbeddableTextFactory(name="Text", content="**Bold**")
+        self.assertEqual(embeddable_text("Text"), "<p><strong>Bold</strong></p>\n")
+
+    def test_embeddable_text_creates_missing_text(self):
+        """`embeddable_text` should create texts that don't exist."""
+        self.assertEqual(embeddable_text("New text"), "")
+        self.assertTrue(EmbeddableText.objects.filter(name="New text").exists())
+
+
+class EmbeddableTextManagerTestSuite(TestMixin, TestCase):
+    def test_get_cached(self):
+        """Should return the embeddable text with the name."""
+        text = EmbeddableTextFactory(name="Text", content="Content")
+        self.assertEqual(EmbeddableText.objects.get_cached("Text"), text)
+
+    def test_get_cached_no_queries_when_cached(self):
+        """Should not query the database when the texts are cached."""
+        EmbeddableTextFactory(name="Text")
+        EmbeddableTextFactory(name="Other text")
+        EmbeddableText.objects.get_cached("Text")
+        with self.assertNumQueries(0):
+            EmbeddableText.objects.get_cached("Text")
+            EmbeddableText.objects.get_cached("Other text")
+
+    def test_get_cached_creates_missing_text(self):
+        """Should create texts that don't exist."""
+        text = EmbeddableText.objects.get_cached("Missing")
+        self.assertEqual(text.name, "Missing")
+        EmbeddableText.objects.get_cached("Missing")
+        self.assertEqual(EmbeddableText.objects.filter(name="Missing").count(), 1)
+
+    def test_cache_cleared_on_save(self):
+        """Should return updated texts after saving."""
+        text = EmbeddableTextFactory(name="Text", content="Before")
+        EmbeddableText.objects.get_cached("Text")
+        text.content = "After"
+        text.save()
+        self.assertEqual(EmbeddableText.objects.get_cached("Text").content, "After")
+
+    def test_cache_cleared_on_delete(self):
+        """Should not return deleted texts."""
+        text = EmbeddableTextFactory(name="Text", content="Content")
+        EmbeddableText.objects.get_cached("Text")
+        text.delete()
+        self.assertEqual(EmbeddableText.objects.get_cached("Text").content, "")
@@ -0,0 +1,37 @@
+from django.contrib.admin import ModelAdmin, display, site
+
+from .models import Job
+
+
+class JobAdmin(ModelAdmin):
+    list_display = (
+        "__str__",
+        "status",
+        "progress_percent",
+        "attempts",
+        "created",
+        "runtime",
+    )
+    list_filter = ("status", "method")
+    readonly_fields = ("created", "started", "updated", "finished", "runtime")
+
+    @display(description="Framdrift")
+    def progress_percent(self, job):
+        return f"{job.progress:.0%}"
+
+    @display(description="Køyretid")
+    def runtime(self, job):
+        return job.runtime()
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context["num_queued"] = Job.objects.filter(
+            status=Job.Status.QUEUED
+        ).count()
+        extra_context["num_running"] = Job.objects.filter(
+            status=Job.Status.RUNNING
+        ).count()
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+site.register(Job, JobAdmin)
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "common.jobs"
+    verbose_name = "bakgrunnsjobbar"
@@ -0,0 +1,19 @@
+from django.contrib.contenttypes.models import ContentType
+from factory import LazyAttribute, SelfAttribute, SubFactory
+from factory.django import DjangoModelFactory
+
+from sheetmusic.factories import PdfFactory
+
+from .models import Job
+
+
+class JobFactory(DjangoModelFactory):
+    class Meta:
+        model = Job
+
+    content_object = SubFactory(PdfFactory)
+    object_pk = SelfAttribute("content_object.pk")
+    content_type = LazyAttribute(
+        lambda job: ContentType.objects.get_for_model(job.content_object)
+    )
+    method = "find_parts_with_sheatless"
@@ -0,0 +1,109 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from time import sleep
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.jobs.models import Job, clear_local_caches, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs in a pool of `--workers` processes. "
+        "Jobs that fail or whose worker process dies are retried, "
+        "as are jobs that were running when the command last stopped. "
+        "Only a single instance of the command should run at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.JOBS_WORKERS,
+            help="Number of worker processes. 0 runs jobs in this process.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when the queue is empty instead of waiting for more jobs.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between checking for new jobs.",
+        )
+
+    def handle(self, workers, once, poll_interval, **options):
+        # Jobs left running were interrupted when the runner last stopped
+        Job.objects.requeue_running()
+        if workers == 0:
+            self.run_inline(once, poll_interval)
+        else:
+            self.run_pool(workers, once, poll_interval)
+
+    def run_inline(self, once, poll_interval):
+        while True:
+            job = Job.objects.claim()
+            if job is not None:
+                clear_local_caches()
+                job.run()
+            elif once:
+                return
+            else:
+                sleep(poll_interval)
+                Job.objects.requeue_stale()
+
+    def create_pool(self, workers):
+        # Spawn rather than fork, so that worker processes get their own
+        # database connections instead of sharing the connection of this process.
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=django.setup,
+        )
+
+    def run_pool(self, workers, once, poll_interval):
+        pool = self.create_pool(workers)
+        running = {}
+        try:
+            while True:
+                while len(running) < workers:
+                    job = Job.objects.claim()
+                    if job is None:
+                        break
+                    running[pool.submit(run_job, job.pk)] = job.pk
+
+                if not running:
+                    if once:
+                        return
+                    sleep(poll_interval)
+                    Job.objects.requeue_stale()
+                    continue
+
+                done, _ = wait(
+                    running, timeout=poll_interval, return_when=FIRST_COMPLETED
+                )
+                pool_broken = False
+                for future in done:
+                    pk = running.pop(future)
+                    exception = future.exception()
+                    if isinstance(exception, BrokenProcessPool):
+                        pool_broken = True
+                        Job.objects.requeue(Job.objects.filter(pk=pk))
+                    elif exception is not None:
+                        self.stderr.write(f"Job {pk} could not be run: {exception}")
+                if pool_broken:
+                    # A worker process died, which breaks the pool
+                    # and takes down all jobs that were running in it
+                    self.stderr.write("A worker process died, restarting workers")
+                    Job.objects.requeue(Job.objects.filter(pk__in=running.values()))
+                    running = {}
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self.create_pool(workers)
+                Job.objects.requeue_stale(running=list(running.values()))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
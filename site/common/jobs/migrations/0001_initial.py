@@ -0,0 +1,82 @@
+# Generated by Django 4.1 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_pk", models.IntegerField()),
+                ("method", models.CharField(max_length=255, verbose_name="metode")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("QUEUED", "I kø"),
+                            ("RUNNING", "Køyrer"),
+                            ("DONE", "Ferdig"),
+                            ("FAILED", "Feila"),
+                        ],
+                        default="QUEUED",
+                        max_length=255,
+                        verbose_name="status",
+                    ),
+                ),
+                ("progress", models.FloatField(default=0, verbose_name="framdrift")),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="forsøk"),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="feilmelding")),
+                (
+                    "created",
+                    models.DateTimeField(auto_now_add=True, verbose_name="lagt i kø"),
+                ),
+                (
+                    "started",
+                    models.DateTimeField(blank=True, null=True, verbose_name="starta"),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="sist oppdatert"
+                    ),
+                ),
+                (
+                    "finished",
+                    models.DateTimeField(blank=True, null=True, verbose_name="ferdig"),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "bakgrunnsjobb",
+                "verbose_name_plural": "bakgrunnsjobbar",
+                "ordering": ["-created"],
+            },
+        ),
+    ]
@@ -0,0 +1,197 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import (
+    CASCADE,
+    CharField,
+    DateTimeField,
+    FloatField,
+    ForeignKey,
+    IntegerField,
+    Manager,
+    Model,
+    PositiveIntegerField,
+    Q,
+    TextChoices,
+    TextField,
+)
+from django.utils.timezone import now
+
+
+class JobManager(Manager):
+    def enqueue(self, content_object, method):
+        """Queues a job that calls `method` on `content_object`."""
+        return super().create(
+            content_type=ContentType.objects.get_for_model(content_object),
+            object_pk=content_object.pk,
+            method=method,
+        )
+
+    def pending(self):
+        """Returns jobs that are queued or running."""
+        return super().filter(status__in=[Job.Status.QUEUED, Job.Status.RUNNING])
+
+    def claim(self):
+        """
+        Marks the oldest queued job as running and returns it,
+        or returns `None` if the queue is empty.
+        Safe to call from several worker processes at once.
+        """
+        with transaction.atomic():
+            job = (
+                super()
+                .filter(status=Job.Status.QUEUED)
+                .order_by("created")
+                .select_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = Job.Status.RUNNING
+            job.attempts += 1
+            job.started = job.updated = now()
+            job.save()
+            return job
+
+    def requeue(self, jobs):
+        """
+        Queues `jobs` again if they have attempts left, and marks them as failed if not.
+        Used for jobs that were running when their worker process died.
+        """
+        jobs.filter(attempts__lt=settings.JOBS_MAX_ATTEMPTS).update(
+            status=Job.Status.QUEUED, progress=0
+        )
+        jobs.filter(attempts__gte=settings.JOBS_MAX_ATTEMPTS).update(
+            status=Job.Status.FAILED, finished=now()
+        )
+
+    def requeue_running(self):
+        """
+        Requeues all running jobs.
+        Used when the job runner starts, since there is only a single runner,
+        so jobs still marked as running were interrupted when it last stopped.
+        """
+        self.requeue(super().filter(status=Job.Status.RUNNING))
+
+    def requeue_stale(self, running=()):
+        """
+        Requeues running jobs that haven't reported progress within `JOBS_TIMEOUT`,
+        since their worker process has most likely died.
+        Jobs with primary keys in `running` are running in live worker processes,
+        and aren't requeued, since they would be run twice.
+        """
+        self.requeue(
+            super()
+            .filter(
+                Q(updated__isnull=True)
+                | Q(updated__lt=now() - timedelta(seconds=settings.JOBS_TIMEOUT)),
+                status=Job.Status.RUNNING,
+            )
+            .exclude(pk__in=running)
+        )
+
+
+class Job(Model):
+    """
+    Model representing a background job, which calls `method` on `content_object`.
+    `method` is passed the job as the keyword argument `job`,
+    and can report progress with `set_progress`.
+    Jobs are run by the `run_jobs` management command.
+    """
+
+    objects = JobManager()
+
+    class Status(TextChoices):
+        QUEUED = "QUEUED", "I kø"
+        RUNNING = "RUNNING", "Køyrer"
+        DONE = "DONE", "Ferdig"
+        FAILED = "FAILED", "Feila"
+
+    content_type = ForeignKey(ContentType, on_delete=CASCADE)
+    object_pk = IntegerField()
+    content_object = GenericForeignKey("content_type", "object_pk")
+    method = CharField("metode", max_length=255)
+
+    status = CharField(
+        "status", max_length=255, choices=Status.choices, default=Status.QUEUED
+    )
+    progress = FloatField("framdrift", default=0)
+    attempts = PositiveIntegerField("forsøk", default=0)
+    error = TextField("feilmelding", blank=True)
+
+    created = DateTimeField("lagt i kø", auto_now_add=True)
+    started = DateTimeField("starta", null=True, blank=True)
+    updated = DateTimeField("sist oppdatert", null=True, blank=True)
+    finished = DateTimeField("ferdig", null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.method} for {self.content_object}"
+
+    class Meta:
+        ordering = ["-created"]
+        verbose_name = "bakgrunnsjobb"
+        verbose_name_plural = "bakgrunnsjobbar"
+
+    def is_pending(self):
+        return self.status in [Job.Status.QUEUED, Job.Status.RUNNING]
+
+    def runtime(self):
+        """Returns how long the job has been running, or ran for if it's finished."""
+        if self.started is None:
+            return None
+        return (self.finished or now()) - self.started
+
+    def set_progress(self, progress):
+        """Stores `progress`, a number between 0 and 1."""
+        self.progress = progress
+        self.updated = now()
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress, updated=self.updated
+        )
+
+    def run(self):
+        """
+        Runs the job. If it fails it's queued again,
+        until it has been attempted `JOBS_MAX_ATTEMPTS` times.
+        """
+        try:
+            if self.content_object is None:
+                raise Exception(f"Fann ikkje objektet for {self.method}")
+            getattr(self.content_object, self.method)(job=self)
+        except Exception:
+            self.error = traceback.format_exc()
+            if self.attempts < settings.JOBS_MAX_ATTEMPTS:
+                self.status = Job.Status.QUEUED
+                self.progress = 0
+            else:
+                self.status = Job.Status.FAILED
+                self.finished = now()
+        else:
+            self.status = Job.Status.DONE
+            self.progress = 1
+            self.finished = now()
+        self.updated = now()
+        self.save()
+
+
+def clear_local_caches():
+    """
+    Clears caches that are local to this process.
+    Worker processes don't receive the signals that invalidate cached data
+    when it's changed by the web server, so they start each job with empty caches.
+    """
+    for local_cache in caches.all():
+        if isinstance(local_cache, LocMemCache):
+            local_cache.clear()
+
+
+def run_job(pk):
+    """Runs the job with primary key `pk`. Used by worker processes."""
+    clear_local_caches()
+    Job.objects.get(pk=pk).run()
@@ -0,0 +1,214 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from accounts.factories import SuperUserFactory
+from common.mixins import TestMixin
+from sheetmusic.factories import PdfFactory
+from sheetmusic.models import Pdf
+
+from .factories import JobFactory
+from .models import Job
+
+
+class JobManagerTestSuite(TestMixin, TestCase):
+    def test_enqueue(self):
+        """Should create a queued job for the object and method."""
+        pdf = PdfFactory()
+        job = Job.objects.enqueue(pdf, "find_parts_with_sheatless")
+        self.assertEqual(job.content_object, pdf)
+        self.assertEqual(job.method, "find_parts_with_sheatless")
+        self.assertEqual(job.status, Job.Status.QUEUED)
+
+    def test_pending(self):
+        """Should include queued and running jobs only."""
+        queued = JobFactory(status=Job.Status.QUEUED)
+        running = JobFactory(status=Job.Status.RUNNING)
+        JobFactory(status=Job.Status.DONE)
+        JobFactory(status=Job.Status.FAILED)
+        self.assertQuerysetEqual(
+            Job.objects.pending(), [queued, running], ordered=False
+        )
+
+    def test_claim_oldest_queued(self):
+        """Should mark the oldest queued job as running and return it."""
+        JobFactory(status=Job.Status.RUNNING)
+        oldest = JobFactory()
+        JobFactory()
+        job = Job.objects.claim()
+        self.assertEqual(job, oldest)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.started)
+
+    def test_claim_empty_queue(self):
+        """Should return `None` if no jobs are queued."""
+        JobFactory(status=Job.Status.RUNNING)
+        self.assertIsNone(Job.objects.claim())
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_requeue(self):
+        """Should queue jobs with attempts left, and fail the rest."""
+        job_retry = JobFactory(status=Job.Status.RUNNING, attempts=1, progress=0.5)
+        job_fail = JobFactory(status=Job.Status.RUNNING, attempts=2)
+        Job.objects.requeue(Job.objects.all())
+        job_retry.refresh_from_db()
+        job_fail.refresh_from_db()
+        self.assertEqual(job_retry.status, Job.Status.QUEUED)
+        self.assertEqual(job_retry.progress, 0)
+        self.assertEqual(job_fail.status, Job.Status.FAILED)
+
+    @override_settings(JOBS_TIMEOUT=60)
+    def test_requeue_stale(self):
+        """Should requeue running jobs that haven't reported progress in time."""
+        stale = JobFactory(
+            status=Job.Status.RUNNING,
+            attempts=1,
+            updated=now() - timedelta(seconds=61),
+        )
+        alive = JobFactory(
+            status=Job.Status.RUNNING,
+            attempts=1,
+            updated=now() - timedelta(seconds=30),
+        )
+        Job.objects.requeue_stale()
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(stale.status, Job.Status.QUEUED)
+        self.assertEqual(alive.status, Job.Status.RUNNING)
+
+    @override_settings(JOBS_TIMEOUT=60)
+    def test_requeue_stale_skips_running(self):
+        """Should not requeue jobs that are still running in a live worker."""
+        job = JobFactory(
+            status=Job.Status.RUNNING,
+            attempts=1,
+            updated=now() - timedelta(seconds=61),
+        )
+        Job.objects.requeue_stale(running=[job.pk])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.RUNNING)
+        self.assertEqual(job.attempts, 1)
+
+    def test_requeue_running(self):
+        """Should requeue all running jobs."""
+        running = JobFactory(status=Job.Status.RUNNING, attempts=1, updated=now())
+        done = JobFactory(status=Job.Status.DONE, attempts=1)
+        Job.objects.requeue_running()
+        running.refresh_from_db()
+        done.refresh_from_db()
+        self.assertEqual(running.status, Job.Status.QUEUED)
+        self.assertEqual(done.status, Job.Status.DONE)
+
+
+class JobTestSuite(TestMixin, TestCase):
+    def setUp(self):
+        self.job = JobFactory(status=Job.Status.RUNNING, attempts=1)
+
+    def test_to_str(self):
+        self.assertEqual(
+            str(self.job), f"find_parts_with_sheatless for {self.job.content_object}"
+        )
+
+    def test_runtime_not_started(self):
+        """Should return `None` if the job hasn't started."""
+        self.assertIsNone(JobFactory().runtime())
+
+    def test_runtime_finished(self):
+        """Should return the time between start and finish."""
+        self.job.started = now()
+        self.job.finished = self.job.started + timedelta(minutes=3)
+        self.assertEqual(self.job.runtime(), timedelta(minutes=3))
+
+    def test_set_progress(self):
+        """Should store progress."""
+        self.job.set_progress(0.25)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.progress, 0.25)
+        self.assertIsNotNone(self.job.updated)
+
+    def test_run_calls_method_with_job(self):
+        """Should call `method` on `content_object`, passing the job."""
+        with patch.object(Pdf, "find_parts_with_sheatless") as method:
+            self.job.run()
+        method.assert_called_once_with(job=self.job)
+
+    def test_run_success(self):
+        """Should mark the job as done if the method succeeds."""
+        with patch.object(Pdf, "find_parts_with_sheatless"):
+            self.job.run()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.Status.DONE)
+        self.assertEqual(self.job.progress, 1)
+        self.assertIsNotNone(self.job.finished)
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_run_failure_retried(self):
+        """Should queue the job again if it fails and has attempts left."""
+        with patch.object(Pdf, "find_parts_with_sheatless", side_effect=Exception):
+            self.job.run()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.Status.QUEUED)
+        self.assertIn("Exception", self.job.error)
+
+    @override_settings(JOBS_MAX_ATTEMPTS=1)
+    def test_run_failure_no_attempts_left(self):
+        """Should mark the job as failed if it fails and has no attempts left."""
+        with patch.object(Pdf, "find_parts_with_sheatless", side_effect=Exception):
+            self.job.run()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.Status.FAILED)
+        self.assertIsNotNone(self.job.finished)
+
+    def test_deleted_with_content_object(self):
+        """Should be deleted when its PDF is deleted."""
+        self.job.content_object.delete()
+        self.assertFalse(Job.objects.filter(pk=self.job.pk).exists())
+
+
+class RunJobsTestSuite(TestMixin, TestCase):
+    def test_runs_all_queued_jobs(self):
+        """Should run all queued jobs, and exit when the queue is empty with `once`."""
+        jobs = [JobFactory(), JobFactory()]
+        with patch.object(Pdf, "find_parts_with_sheatless"):
+            call_command("run_jobs", workers=0, once=True)
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.Status.DONE)
+
+    def test_requeues_interrupted_jobs_on_start(self):
+        """Should run jobs that were running when the command last stopped."""
+        job = JobFactory(status=Job.Status.RUNNING, attempts=1, updated=now())
+        with patch.object(Pdf, "find_parts_with_sheatless"):
+            call_command("run_jobs", workers=0, once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+
+    @override_settings(JOBS_MAX_ATTEMPTS=3)
+    def test_retries_failing_jobs(self):
+        """Should retry failing jobs until they run out of attempts."""
+        job = JobFactory()
+        with patch.object(
+            Pdf, "find_parts_with_sheatless", side_effect=Exception
+        ) as method:
+            call_command("run_jobs", workers=0, once=True)
+        self.assertEqual(method.call_count, 3)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+
+
+class JobAdminTestSuite(TestMixin, TestCase):
+    def test_queue_depth_in_changelist(self):
+        """Should show the number of queued and running jobs."""
+        JobFactory()
+        JobFactory()
+        JobFactory(status=Job.Status.RUNNING)
+        self.client.force_login(SuperUserFactory())
+        response = self.client.get(reverse("admin:jobs_job_changelist"))
+        self.assertEqual(response.context["num_queued"], 2)
+        self.assertEqual(response.context["num_running"], 1)
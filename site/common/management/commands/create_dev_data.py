@@ -14,7 +14,13 @@ from brewing.factories import BrewFactory, TransactionFactory
 from brewing.models import TransactionType
 from buttons.factories import ButtonDesignFactory
 from common.comments.factories import CommentFactory
-from common.constants.factories import ConstantFactory
+from common.constants.models import (
+    BIRTHDAY_SONG_SLUG,
+    BREW_SURCHARGE,
+    GUEST_START_PAGE,
+    INSTRUMENT_GROUP_LEADER_GROUP_NAME,
+    Constant,
+)
 from common.embeddable_text.factories import EmbeddableTextFactory
 from common.test_utils import test_pdf_multipage
 from contact.factories import ContactCategoryFactory
@@ -1228,12 +1234,15 @@ Her kan du skrive nykelinformasjon om hendinga. Oppføringane du skriv vil verte
             content="Informasjon om brygg.",
         )
 
-        ConstantFactory(name="Gjestestartside", value=article_about.get_absolute_url())
-        ConstantFactory(name="Bursdagssangslug", value=birthday_song.slug)
-        ConstantFactory(
-            name="Instrumentgruppeleiargruppenamn", value=instrument_group_leaders.name
-        )
-        ConstantFactory(name="Påslag på brygg i NOK", value="2")
+        for constant, value in [
+            (GUEST_START_PAGE, article_about.get_absolute_url()),
+            (BIRTHDAY_SONG_SLUG, birthday_song.slug),
+            (INSTRUMENT_GROUP_LEADER_GROUP_NAME, instrument_group_leaders.name),
+            (BREW_SURCHARGE, "2"),
+        ]:
+            Constant.objects.update_or_create(
+                name=constant.name, defaults={"value": value}
+            )
 
         OrchestraFactory(name="Dragern")
         OrchestraFactory(name="Motstanden")
@@ -4,7 +4,7 @@ from marko.inline import InlineElement
 class KWordCensor(InlineElement):
     """Censor the dreaded K-word. Censorship can be escaped with `\\`"""
 
-    pattern = r"(\\)?(korps)(?i)"
+    pattern = r"(\\)?((?i:korps))"
 
     def __init__(self, match):
         self.should_censor = match.group(1) != "\\"
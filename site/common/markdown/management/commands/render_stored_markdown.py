@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from common.markdown.models import RenderedMarkdownMixin
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the stored HTML of all objects with markdown, "
+        "like those created before the HTML was stored, "
+        "or after changing how markdown is rendered."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of objects to update with each query.",
+        )
+
+    def handle(self, batch_size, **options):
+        for model in apps.get_models():
+            if not issubclass(model, RenderedMarkdownMixin):
+                continue
+            num_of_objects = 0
+            batch = []
+            for obj in model._base_manager.iterator(chunk_size=batch_size):
+                obj.render_markdown()
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    num_of_objects += self.update(model, batch)
+                    batch = []
+            num_of_objects += self.update(model, batch)
+            self.stdout.write(
+                f"Rendered markdown of {num_of_objects} {model._meta.verbose_name_plural}."
+            )
+
+    def update(self, model, objects):
+        model._base_manager.bulk_update(objects, ["markdown_html"])
+        return len(objects)
@@ -0,0 +1,32 @@
+from django.db.models import Model, TextField
+
+from .templatetags.markdown import markdown_filter
+
+
+class RenderedMarkdownMixin(Model):
+    """
+    Stores the sanitized HTML of the markdown in `markdown_field`,
+    as rendered by the `markdown` filter.
+    The HTML is rendered on save, and read by the `rendered_markdown` filter,
+    so markdown isn't rendered when viewing it.
+    HTML of existing objects can be rendered again with `render_stored_markdown`.
+    """
+
+    markdown_field = None
+
+    markdown_html = TextField("markdown som HTML", blank=True, editable=False)
+
+    def render_markdown(self):
+        """Renders the markdown in `markdown_field` to `markdown_html`."""
+        self.markdown_html = str(markdown_filter(getattr(self, self.markdown_field)))
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None:
+            self.render_markdown()
+        elif self.markdown_field in update_fields:
+            self.render_markdown()
+            update_fields = {*update_fields, "markdown_html"}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    class Meta:
+        abstract = True
@@ -1,8 +1,12 @@
-from functools import partial
+import threading
+from collections import Counter
+from functools import lru_cache, partial
+from hashlib import sha256
 from re import sub
 
 from bleach import Cleaner
 from django import template
+from django.core.cache import cache
 from django.utils.safestring import mark_safe
 from marko import Markdown
 from marko.ext.codehilite import CodeHilite
@@ -68,47 +72,123 @@ ALLOWED_BLOCK_TAGS = [
 ALLOWED_BLOCK_ATTRIBUTES = ["src", "alt", "width", "height", "class"]
 
 
+# marko converters and bleach cleaners keep state while converting and cleaning,
+# so each thread builds its own, once
+local = threading.local()
+
+
+def get_converter():
+    """Returns the markdown converter of this thread."""
+    if not hasattr(local, "converter"):
+        local.converter = Markdown(
+            extensions=[
+                GFM(),
+                CodeHilite(),
+                KWordCensorExtension(),
+                HardBreakExtension(),
+            ]
+        )
+    return local.converter
+
+
+def get_cleaner(allow_links=True, allow_blocks=True):
+    """Returns the cleaner of this thread for the combination of `allow_links` and `allow_blocks`."""
+    if not hasattr(local, "cleaners"):
+        local.cleaners = {}
+    if (allow_links, allow_blocks) not in local.cleaners:
+        allowed_tags = ALLOWED_BASE_TAGS.copy()
+        allowed_attributes = ALLOWED_BASE_ATTRIBUTES.copy()
+        if allow_links:
+            allowed_tags += ALLOWED_LINK_TAGS
+            allowed_attributes += ALLOWED_LINK_ATTRIBUTES
+        if allow_blocks:
+            allowed_tags += ALLOWED_BLOCK_TAGS
+            allowed_attributes += ALLOWED_BLOCK_ATTRIBUTES
+
+        class_map = {
+            "table": "table table-striped w-auto",
+            "img": "img-fluid d-block m-auto",
+            "a": "text-break",
+            "blockquote": "markdown-quote",
+            "h1": "fs-2",
+            "h2": "fs-3",
+            "h3": "fs-4",
+            "h4": "fs-5",
+            "h5": "fs-6",
+        }
+        local.cleaners[allow_links, allow_blocks] = Cleaner(
+            tags=allowed_tags,
+            attributes=allowed_attributes,
+            filters=[partial(ClassApplyFilter, class_map=class_map)],
+        )
+    return local.cleaners[allow_links, allow_blocks]
+
+
 def clean(html, allow_links=True, allow_blocks=True):
-    allowed_tags = ALLOWED_BASE_TAGS.copy()
-    allowed_attributes = ALLOWED_BASE_ATTRIBUTES.copy()
-    if allow_links:
-        allowed_tags += ALLOWED_LINK_TAGS
-        allowed_attributes += ALLOWED_LINK_ATTRIBUTES
-    if allow_blocks:
-        allowed_tags += ALLOWED_BLOCK_TAGS
-        allowed_attributes += ALLOWED_BLOCK_ATTRIBUTES
-
-    class_map = {
-        "table": "table table-striped w-auto",
-        "img": "img-fluid d-block m-auto",
-        "a": "text-break",
-        "blockquote": "markdown-quote",
-        "h1": "fs-2",
-        "h2": "fs-3",
-        "h3": "fs-4",
-        "h4": "fs-5",
-        "h5": "fs-6",
-    }
-    cleaner = Cleaner(
-        tags=allowed_tags,
-        attributes=allowed_attributes,
-        filters=[partial(ClassApplyFilter, class_map=class_map)],
-    )
-    bleached = cleaner.clean(html)
+    bleached = get_cleaner(allow_links, allow_blocks).clean(html)
     return mark_safe(bleached)
 
 
+def markdown_filter(string):
+    return clean(get_converter().convert(string))
+
+
+# Bump when changing how markdown is rendered, to not use HTML cached by older versions
+RENDER_CACHE_VERSION = 1
+RENDER_CACHE_SIZE = 1024
+render_cache_stats = Counter()
+render_cache_stats_lock = threading.Lock()
+
+
+def count_render_cache(stat):
+    with render_cache_stats_lock:
+        render_cache_stats[stat] += 1
+
+
+def render_cached(render, string):
+    """
+    Returns `render(string)`, cached in memory in a least-recently-used cache,
+    and in Django's cache, keyed on a hash of `string`.
+    Since markdown often is rendered many times without changing,
+    like the descriptions of events, it's only parsed once.
+
+    Hits and misses of both caches are returned by `render_cache_info()`.
+    """
+    html = render_cached_lru(render, string)
+    return mark_safe(html)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_cached_lru(render, string):
+    key = "markdown:{}:{}:{}".format(
+        RENDER_CACHE_VERSION,
+        render.__name__,
+        sha256(string.encode()).hexdigest(),
+    )
+    html = cache.get(key)
+    if html is None:
+        count_render_cache("misses")
+        html = str(render(string))
+        cache.set(key, html, None)
+    else:
+        count_render_cache("hits")
+    return html
+
+
+def render_cache_info():
+    """Returns the number of hits and misses of the render caches."""
+    lru_info = render_cached_lru.cache_info()
+    return {
+        "memory_hits": lru_info.hits,
+        "memory_misses": lru_info.misses,
+        "shared_hits": render_cache_stats["hits"],
+        "shared_misses": render_cache_stats["misses"],
+    }
+
+
 @register.filter(is_safe=True)
 def markdown(string):
-    converter = Markdown(
-        extensions=[
-            GFM(),
-            CodeHilite(),
-            KWordCensorExtension(),
-            HardBreakExtension(),
-        ]
-    )
-    return clean(converter.convert(string))
+    return render_cached(markdown_filter, string)
 
 
 def escape_non_inline_markdown(string):
@@ -165,15 +245,7 @@ def markdown_inline_filter(string, allow_links=True):
     if not allow_links:
         string = escape_markdown_links(string)
 
-    converter = Markdown(
-        extensions=[
-            GFM(),
-            CodeHilite(),
-            KWordCensorExtension(),
-            HardBreakExtension(),
-        ]
-    )
-    converted = converter.convert(string)
+    converted = get_converter().convert(string)
 
     # Strip away <p>, </p>, \n
     converted = sub(r"^<p>(.*)</p>\n$", r"\1", converted)
@@ -181,11 +253,32 @@ def markdown_inline_filter(string, allow_links=True):
     return clean(converted, allow_links=allow_links, allow_blocks=False)
 
 
+def markdown_inline_no_links_filter(string):
+    return markdown_inline_filter(string, allow_links=False)
+
+
 @register.filter(is_safe=True)
 def markdown_inline(string):
-    return markdown_inline_filter(string)
+    return render_cached(markdown_inline_filter, string)
 
 
 @register.filter(is_safe=True)
 def markdown_inline_no_links(string):
-    return markdown_inline_filter(string, allow_links=False)
+    return render_cached(markdown_inline_no_links_filter, string)
+
+
+def stored_markdown(obj, html, render):
+    """
+    Returns `html`, stored by the `RenderedMarkdownMixin` `obj`.
+    Markdown that hasn't been stored as HTML yet is rendered with `render`.
+    """
+    markdown = getattr(obj, obj.markdown_field)
+    if html or not markdown:
+        return mark_safe(html)
+    return render_cached(render, markdown)
+
+
+@register.filter(is_safe=True)
+def rendered_markdown(obj):
+    """Equivalent to the `markdown` filter for the markdown stored by `obj`."""
+    return stored_markdown(obj, obj.markdown_html, markdown_filter)
@@ -1,16 +1,29 @@
 from functools import partial
+from unittest.mock import Mock
 
 from bleach import Cleaner
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils.safestring import SafeString
 from marko import Markdown
 
+from common.embeddable_text.factories import EmbeddableTextFactory
+from common.embeddable_text.models import EmbeddableText
+from common.mixins import TestMixin
+
 from .extensions import HardBreakExtension, KWordCensorExtension
 from .filters import ClassApplyFilter
 from .templatetags.markdown import (
     clean,
     escape_markdown_links,
     escape_non_inline_markdown,
+    get_cleaner,
     markdown_inline_filter,
+    render_cache_info,
+    render_cached,
+    render_cached_lru,
+    rendered_markdown,
 )
 
 
@@ -89,6 +102,57 @@ class CleanTestSuite(TestCase):
         cleaned = clean("<p>Avsnitt</p>", allow_blocks=False)
         self.assertEqual(cleaned, "&lt;p&gt;Avsnitt&lt;/p&gt;")
 
+    def test_reuses_cleaner(self):
+        """Should build a single cleaner per combination of allowed tags."""
+        self.assertIs(get_cleaner(), get_cleaner())
+        self.assertIsNot(get_cleaner(), get_cleaner(allow_links=False))
+        self.assertIsNot(get_cleaner(), get_cleaner(allow_blocks=False))
+
+
+def render_upper(string):
+    return string.upper()
+
+
+class RenderCachedTestSuite(TestCase):
+    def setUp(self):
+        cache.clear()
+        render_cached_lru.cache_clear()
+
+    def test_renders(self):
+        """Should return the rendered string, marked safe."""
+        html = render_cached(render_upper, "<b>hei</b>")
+        self.assertEqual(html, "<B>HEI</B>")
+        self.assertIsInstance(html, SafeString)
+
+    def test_renders_once(self):
+        """Should only render the same string once."""
+        render = Mock(wraps=render_upper, __name__="render_upper")
+        render_cached(render, "hei")
+        render_cached(render, "hei")
+        render_cached(render, "hallo")
+        self.assertEqual(render.call_count, 2)
+
+    def test_memory_cache_hits(self):
+        """Should count hits and misses of the in-memory cache."""
+        info = render_cache_info()
+        render_cached(render_upper, "hei")
+        render_cached(render_upper, "hei")
+        self.assertEqual(
+            render_cache_info()["memory_misses"], info["memory_misses"] + 1
+        )
+        self.assertEqual(render_cache_info()["memory_hits"], info["memory_hits"] + 1)
+
+    def test_shared_cache_hits(self):
+        """Should fall back to Django's cache when not in the in-memory cache."""
+        info = render_cache_info()
+        render_cached(render_upper, "hei")
+        render_cached_lru.cache_clear()
+        render_cached(render_upper, "hei")
+        self.assertEqual(
+            render_cache_info()["shared_misses"], info["shared_misses"] + 1
+        )
+        self.assertEqual(render_cache_info()["shared_hits"], info["shared_hits"] + 1)
+
 
 class EscapeNonInlineMarkdownTestSuite(TestCase):
     def test_escapes_header(self):
@@ -179,3 +243,48 @@ class MarkdownInlineFilterTestSuite(TestCase):
         """The K-word should be censored."""
         result = markdown_inline_filter("Korps er kult!")
         self.assertEqual(result, "K**** er kult!")
+
+
+class RenderedMarkdownMixinTestSuite(TestMixin, TestCase):
+    def test_renders_markdown_on_save(self):
+        """Should store the markdown as HTML when saving."""
+        text = EmbeddableTextFactory(content="**Korps**")
+        self.assertEqual(text.markdown_html, "<p><strong>K****</strong></p>\n")
+
+    def test_renders_markdown_when_updating_markdown_field(self):
+        """Should store the HTML when the markdown field is in `update_fields`."""
+        text = EmbeddableTextFactory(content="Before")
+        text.content = "After"
+        text.save(update_fields=["content"])
+        text.refresh_from_db()
+        self.assertEqual(text.markdown_html, "<p>After</p>\n")
+
+    def test_does_not_render_markdown_when_updating_other_fields(self):
+        """Should not render markdown when the markdown field isn't in `update_fields`."""
+        text = EmbeddableTextFactory(content="Before")
+        text.content = "After"
+        text.save(update_fields=["name"])
+        self.assertEqual(text.markdown_html, "<p>Before</p>\n")
+
+    def test_rendered_markdown_returns_stored_html(self):
+        """`rendered_markdown` should return the stored HTML."""
+        text = EmbeddableTextFactory(content="Text")
+        text.markdown_html = "<p>Stored</p>"
+        self.assertEqual(rendered_markdown(text), "<p>Stored</p>")
+        self.assertIsInstance(rendered_markdown(text), SafeString)
+
+    def test_rendered_markdown_renders_markdown_not_stored(self):
+        """`rendered_markdown` should render markdown that isn't stored yet."""
+        text = EmbeddableTextFactory()
+        EmbeddableText.objects.filter(pk=text.pk).update(content="*Text*")
+        text.refresh_from_db()
+        self.assertEqual(rendered_markdown(text), "<p><em>Text</em></p>\n")
+
+    def test_render_stored_markdown_command(self):
+        """`render_stored_markdown` should store the HTML of all objects."""
+        texts = EmbeddableTextFactory.create_batch(3)
+        EmbeddableText.objects.update(content="Text")
+        call_command("render_stored_markdown", batch_size=2, stdout=Mock())
+        for text in texts:
+            text.refresh_from_db()
+            self.assertEqual(text.markdown_html, "<p>Text</p>\n")
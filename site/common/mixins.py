@@ -3,6 +3,7 @@ import tempfile
 from http import HTTPStatus
 
 from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.urls import reverse
 
@@ -13,6 +14,11 @@ MEDIA_ROOT = tempfile.mkdtemp()
 
 @override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class TestMixin(TestCase):
+    def _pre_setup(self):
+        # Cached objects from earlier tests have been rolled back
+        cache.clear()
+        return super()._pre_setup()
+
     @classmethod
     def tearDownClass(cls) -> None:
         shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
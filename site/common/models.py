@@ -1,6 +1,8 @@
 from django.db.models import PROTECT, CharField, DateTimeField, Model, TextField
 from django_userforeignkey.models.fields import UserForeignKey
 
+from common.markdown.models import RenderedMarkdownMixin
+
 
 class CreatedModifiedMixin(Model):
     created = DateTimeField("lagt ut", auto_now_add=True)
@@ -24,7 +26,9 @@ class CreatedModifiedMixin(Model):
         abstract = True
 
 
-class ArticleMixin(CreatedModifiedMixin):
+class ArticleMixin(RenderedMarkdownMixin, CreatedModifiedMixin):
+    markdown_field = "content"
+
     title = CharField("tittel", max_length=255)
     content = TextField("innhald", blank=True)
 
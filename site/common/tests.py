@@ -1,5 +1,8 @@
+from io import BytesIO
 from os.path import basename
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
+from django.core.files.base import ContentFile
 from django.test import TestCase
 
 from articles.factories import ArticleFactory
@@ -10,6 +13,7 @@ from .comments.factories import CommentFactory
 from .comments.models import Comment
 from .mixins import TestMixin
 from .templatetags.utils import abs_filter, contained_in, filename, verbose_name
+from .utils import content_disposition, random_sample_queryset, stream_zip
 
 
 class TemplateUtilsTestSuite(TestMixin, TestCase):
@@ -48,3 +52,79 @@ class TemplateUtilsTestSuite(TestMixin, TestCase):
         self.assertFalse(contained_in([4], [1, 2, 3]))
         self.assertFalse(contained_in([1, 2, 3, 4], [1, 2, 3]))
         self.assertFalse(contained_in(["1"], [1, 2, 3]))
+
+
+class UtilsTestSuite(TestCase):
+    def test_content_disposition_ascii(self):
+        """Should put ASCII filenames directly in the header."""
+        self.assertEqual(content_disposition("tuba.pdf"), 'inline; filename="tuba.pdf"')
+        self.assertEqual(
+            content_disposition("tuba.pdf", as_attachment=True),
+            'attachment; filename="tuba.pdf"',
+        )
+
+    def test_content_disposition_non_ascii(self):
+        """Should percent-encode non-ASCII filenames."""
+        self.assertEqual(
+            content_disposition("fløyte.pdf"),
+            "inline; filename*=utf-8''fl%C3%B8yte.pdf",
+        )
+
+    def test_stream_zip(self):
+        """Should generate a valid ZIP file containing all files."""
+        files = [
+            ("a.txt", ContentFile(b"Tuba")),
+            ("b.txt", ContentFile("Fløyte".encode() * 10000)),
+        ]
+        zip_file = ZipFile(BytesIO(b"".join(stream_zip(files))))
+        self.assertEqual(zip_file.namelist(), ["a.txt", "b.txt"])
+        self.assertEqual(zip_file.read("a.txt"), b"Tuba")
+        self.assertEqual(zip_file.read("b.txt"), "Fløyte".encode() * 10000)
+        self.assertIsNone(zip_file.testzip())
+
+    def test_stream_zip_compression(self):
+        """Should store files without compression by default."""
+        files = [("a.txt", ContentFile(b"Tuba"))]
+        zip_file = ZipFile(BytesIO(b"".join(stream_zip(files))))
+        self.assertEqual(zip_file.getinfo("a.txt").compress_type, ZIP_STORED)
+
+        files = [("a.txt", ContentFile(b"Tuba"))]
+        zip_file = ZipFile(BytesIO(b"".join(stream_zip(files, ZIP_DEFLATED))))
+        self.assertEqual(zip_file.getinfo("a.txt").compress_type, ZIP_DEFLATED)
+
+    def test_stream_zip_yields_per_chunk(self):
+        """Should yield while writing each file, instead of only at the end."""
+        files = [
+            ("a.txt", ContentFile(b"Tuba")),
+            ("b.txt", ContentFile(b"Floyte")),
+        ]
+        self.assertGreater(len(list(stream_zip(files))), 2)
+
+
+class RandomSampleQuerysetTestSuite(TestMixin, TestCase):
+    def test_returns_samples_from_queryset(self):
+        """Should return `samples` distinct instances from the queryset."""
+        articles = ArticleFactory.create_batch(5)
+        ArticleFactory(title="Utanfor")
+        queryset = Article.objects.exclude(title="Utanfor")
+        sample = random_sample_queryset(queryset, 3)
+        self.assertEqual(len(sample), 3)
+        self.assertEqual(len(set(sample)), 3)
+        for article in sample:
+            self.assertIn(article, articles)
+
+    def test_returns_all_if_fewer_than_samples(self):
+        """Should return all instances if there are fewer than `samples`."""
+        articles = ArticleFactory.create_batch(2)
+        sample = random_sample_queryset(Article.objects.all(), 5)
+        self.assertCountEqual(sample, articles)
+
+    def test_empty_queryset(self):
+        """Should return an empty list if the queryset is empty."""
+        self.assertEqual(random_sample_queryset(Article.objects.all(), 2), [])
+
+    def test_number_of_queries(self):
+        """Should use one query for the primary keys, and one for the instances."""
+        ArticleFactory.create_batch(10)
+        with self.assertNumQueries(2):
+            random_sample_queryset(Article.objects.all(), 5)
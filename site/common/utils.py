@@ -1,21 +1,23 @@
 import random
+from urllib.parse import quote
+from zipfile import ZIP_STORED, ZipFile
 
 from django.db.models import QuerySet
 
 
 def random_sample_queryset(queryset: QuerySet, samples: int):
     """
-    Returns a list of `number` instances, or fewer if the total number of instances
-    in the queryset is <= `number`.
+    Returns a list of `samples` random instances, or fewer if the total number of instances
+    in the queryset is <= `samples`.
+
+    Samples the primary keys of the queryset, and fetches the sampled instances
+    with a single query, in random order.
     """
-    total: int = queryset.count()
-    to_show: int = min(total, samples)
+    pks = list(queryset.order_by().values_list("pk", flat=True))
     random.seed()
-    sample_indexes = random.sample(range(0, total), to_show)
-    sample = []
-    for i in range(to_show):
-        sample.append(queryset[sample_indexes[i]])
-    return sample
+    sample_pks = random.sample(pks, min(len(pks), samples))
+    instances = queryset.in_bulk(sample_pks)
+    return [instances[pk] for pk in sample_pks]
 
 
 def comma_seperate_list(list):
@@ -27,3 +29,65 @@ def comma_seperate_list(list):
         return " og ".join(list)
     else:
         return f"{', '.join(list[:-1])}, og {list[-1]}"
+
+
+def content_disposition(filename, as_attachment=False):
+    """
+    Returns a `Content-Disposition` header value for `filename`,
+    encoding non-ASCII filenames the same way as Django's `FileResponse`.
+    """
+    disposition = "attachment" if as_attachment else "inline"
+    try:
+        filename.encode("ascii")
+        return f'{disposition}; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"{disposition}; filename*=utf-8''{quote(filename)}"
+
+
+class ZipStream:
+    """
+    Write-only file-like object for `ZipFile`, that holds on to written bytes
+    only until they are popped. Since it can't seek,
+    `ZipFile` writes sizes and checksums after the contents of each entry.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        """Returns and forgets all bytes written since the last call."""
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(files, compression=ZIP_STORED):
+    """
+    Generates a ZIP file chunk by chunk from `files`,
+    an iterable of `(filename, file)` pairs where `file` is a Django `File`.
+    Each file is closed after it's written,
+    and only a single chunk of a single file is held in memory at a time.
+
+    Defaults to storing files without compression,
+    which is the better choice for already compressed files like PDFs.
+    """
+    zip_stream = ZipStream()
+    with ZipFile(zip_stream, mode="w", compression=compression) as zip:
+        for filename, file in files:
+            with file, zip.open(filename, mode="w") as entry:
+                for chunk in file.chunks():
+                    entry.write(chunk)
+                    yield zip_stream.pop()
+    yield zip_stream.pop()
@@ -6,3 +6,8 @@ class DashboardConfig(AppConfig):
     """Configuration-class for the 'dashboard'-app"""
 
     name = "dashboard"
+
+    def ready(self):
+        from .signals import connect_signals
+
+        connect_signals()
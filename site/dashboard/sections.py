@@ -0,0 +1,93 @@
+"""
+Caching of the sections of the dashboard.
+
+Each section is cached for its own timeout,
+or until an instance of one of its models is saved or deleted, see `dashboard.signals`.
+Saves in the jobs process, like parts created by part detection, also clear
+the sections, since all processes share the cache, see `CACHES` in settings.
+Sections are invalidated by replacing their version,
+which also invalidates the copies cached for each user.
+"""
+
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils import timezone
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# Maps the name of each section to its timeout and the models it depends on
+SECTIONS = {
+    "latest_quotes": (DAY, ["quotes.Quote", "quotes.Quote_users"]),
+    "random_quotes": (MINUTE, ["quotes.Quote", "quotes.Quote_users"]),
+    "events": (5 * MINUTE, ["events.Event"]),
+    # Also cleared for a single user when their attendances change
+    "number_events_answered": (5 * MINUTE, ["events.Event"]),
+    "minutes": (DAY, ["minutes.Minutes"]),
+    "latest_galleries": (DAY, ["pictures.Gallery", "pictures.Image"]),
+    "random_images": (MINUTE, ["pictures.Gallery", "pictures.Image"]),
+    "latest_comments": (HOUR, ["comments.Comment"]),
+    "upcoming_birthdays": (DAY, ["accounts.UserCustom"]),
+    "current_birthdays": (DAY, ["accounts.UserCustom"]),
+    "birthday_song": (
+        DAY,
+        [
+            "constants.Constant",
+            "sheetmusic.Score",
+            "sheetmusic.Pdf",
+            "sheetmusic.Part",
+            "sheetmusic.FavoritePart",
+            "accounts.UserCustom",
+        ],
+    ),
+    "latest_scores": (DAY, ["sheetmusic.Score"]),
+}
+
+
+def version_key(name):
+    return f"dashboard:{name}:version"
+
+
+def section_key(name, user_pk=None, daily=False):
+    cache.add(version_key(name), uuid4().hex, None)
+    key = f"dashboard:{name}:{cache.get(version_key(name))}"
+    if user_pk is not None:
+        key += f":{user_pk}"
+    if daily:
+        key += f":{timezone.localdate().isoformat()}"
+    return key
+
+
+def get_section(name, compute, user=None, daily=False):
+    """
+    Returns the section `name` from the cache, or caches and returns `compute()`.
+    The section is cached separately for `user` if given,
+    and for each day if `daily`.
+    """
+    timeout, _ = SECTIONS[name]
+    key = section_key(name, user.pk if user is not None else None, daily)
+
+    # Wrapped in a tuple to be able to cache `None`
+    cached = cache.get(key)
+    if cached is None:
+        cached = (compute(),)
+        cache.set(key, cached, timeout)
+    return cached[0]
+
+
+def clear_user_section(name, user_pk):
+    """Clears the section `name` cached for the user with primary key `user_pk`."""
+    cache.delete(section_key(name, user_pk))
+
+
+def clear_sections(model):
+    """Clears the sections that depend on `model`."""
+    cache.delete_many(
+        [
+            version_key(name)
+            for name, (_, models) in SECTIONS.items()
+            if model._meta.label in models
+        ]
+    )
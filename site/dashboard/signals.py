@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from events.models import EventAttendance
+
+from .sections import SECTIONS, clear_sections, clear_user_section
+
+
+def clear_sections_of_sender(sender, **kwargs):
+    clear_sections(sender)
+
+
+def connect_signals():
+    """Clears dashboard sections when the models they depend on change."""
+    labels = {label for _, models in SECTIONS.values() for label in models}
+    for label in labels:
+        model = apps.get_model(label)
+        # `m2m_changed` is sent for many-to-many fields' through models
+        for signal in [post_save, post_delete, m2m_changed]:
+            signal.connect(clear_sections_of_sender, sender=model)
+
+
+@receiver(post_save, sender=EventAttendance)
+@receiver(post_delete, sender=EventAttendance)
+def clear_number_events_answered(sender, instance, **kwargs):
+    clear_user_section("number_events_answered", instance.person_id)
@@ -1,18 +1,24 @@
 from datetime import date, datetime, timedelta
+from unittest.mock import Mock
 
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
-from django.utils.timezone import make_aware, now
+from django.utils.timezone import localdate, make_aware, now
 
 from accounts.factories import UserFactory
 from articles.factories import ArticleFactory
 from common.comments.factories import CommentFactory
-from common.constants.models import Constant
+from common.constants.models import GUEST_START_PAGE, Constant
 from common.mixins import TestMixin
-from events.factories import EventFactory
+from events.factories import EventAttendanceFactory, EventFactory
 from events.models import Event
 from minutes.factories import MinutesFactory
+from minutes.models import Minutes
 from pictures.factories import GalleryFactory, ImageFactory
+from sheetmusic.factories import PartFactory
+
+from .sections import clear_sections, get_section
+from .views import Dashboard
 
 
 class DashboardRedirectTestSuite(TestMixin, TestCase):
@@ -21,7 +27,9 @@ class DashboardRedirectTestSuite(TestMixin, TestCase):
 
     def test_not_logged_in(self):
         """Should redirect to the configured guest start page when not logged in."""
-        Constant.objects.create(name="Gjestestartside", value="https://example.com")
+        Constant.objects.update_or_create(
+            name=GUEST_START_PAGE.name, defaults={"value": "https://example.com"}
+        )
         response = self.client.get(self.get_url())
         self.assertRedirects(
             response, "https://example.com", fetch_redirect_response=False
@@ -139,3 +147,118 @@ class DashboardTestSuite(TestMixin, TestCase):
         context = self.get_context()
         self.assertIn("latest_comments", context)
         self.assertEquals(len(list(context["latest_comments"])), 1)
+
+    def test_current_birthdays(self):
+        """Should congratulate users with their birthday today."""
+        user = UserFactory(birthdate=localdate())
+        self.assertIn(
+            user.get_preferred_name(), self.get_context()["current_birthdays"]
+        )
+
+    def test_upcoming_birthdays(self):
+        """Should show the 5 next birthdays."""
+        users = [
+            UserFactory(birthdate=localdate() + timedelta(days=days))
+            for days in range(6)
+        ]
+        self.assertEqual(self.get_context()["upcoming_birthdays"], users[:5])
+
+    def test_sections_cached(self):
+        """Should cache sections until their models are saved."""
+        minutes = MinutesFactory(title="Før")
+        self.get_context()
+        Minutes.objects.update(title="Etter")
+        self.assertEqual(self.get_context()["minutes"][0].title, "Før")
+
+        minutes.refresh_from_db()
+        minutes.save()
+        self.assertEqual(self.get_context()["minutes"][0].title, "Etter")
+
+    def test_number_events_answered_cached_per_user(self):
+        """The number of answered events should be cached for each user."""
+        user = UserFactory()
+        event = EventFactory(start_time=now() + timedelta(days=1))
+        EventAttendanceFactory(event=event, person=user)
+        self.assertEqual(self.get_context()["number_events_answered"], "0/1")
+
+        self.client.force_login(user)
+        response = self.client.get(self.get_url())
+        self.assertEqual(response.context["number_events_answered"], 1)
+
+    def test_number_events_answered_updated_when_answering(self):
+        """The number of answered events should be updated when answering events."""
+        user = UserFactory()
+        event = EventFactory(start_time=now() + timedelta(days=1))
+        self.client.force_login(user)
+        self.client.get(self.get_url())
+        EventAttendanceFactory(event=event, person=user)
+        response = self.client.get(self.get_url())
+        self.assertEqual(response.context["number_events_answered"], 1)
+
+    def test_number_events_answered_single_query(self):
+        """Should count upcoming and answered events with a single query."""
+        user = UserFactory()
+        for _ in range(3):
+            EventAttendanceFactory(
+                event=EventFactory(start_time=now() + timedelta(days=1)), person=user
+            )
+        EventFactory(start_time=now() + timedelta(days=1))
+        view = Dashboard()
+        view.request = RequestFactory().get(self.get_url())
+        view.request.user = user
+        with self.assertNumQueries(1):
+            self.assertEqual(view.get_number_events_answered(), "3/4")
+
+    def test_number_events_answered_cleared_only_for_answering_user(self):
+        """Answering an event should only clear the answering user's cached count."""
+        user, other_user = UserFactory(), UserFactory()
+        event = EventFactory(start_time=now() + timedelta(days=1))
+        get_section("number_events_answered", lambda: "0/1", user=user)
+        get_section("number_events_answered", lambda: "0/1", user=other_user)
+        EventAttendanceFactory(event=event, person=user)
+        self.assertEqual(get_section("number_events_answered", lambda: 1, user=user), 1)
+        self.assertEqual(
+            get_section("number_events_answered", lambda: 1, user=other_user), "0/1"
+        )
+
+
+class GetSectionTestSuite(TestMixin, TestCase):
+    def test_caches_section(self):
+        """Should only compute sections that aren't cached."""
+        compute = Mock(return_value=["Innhald"])
+        self.assertEqual(get_section("minutes", compute), ["Innhald"])
+        self.assertEqual(get_section("minutes", compute), ["Innhald"])
+        compute.assert_called_once()
+
+    def test_caches_none(self):
+        """Should cache sections that are `None`."""
+        compute = Mock(return_value=None)
+        get_section("birthday_song", compute)
+        self.assertIsNone(get_section("birthday_song", compute))
+        compute.assert_called_once()
+
+    def test_caches_per_user(self):
+        """Should cache sections separately for each user."""
+        user_a, user_b = UserFactory(), UserFactory()
+        get_section("number_events_answered", lambda: 1, user=user_a)
+        self.assertEqual(
+            get_section("number_events_answered", lambda: 2, user=user_b), 2
+        )
+
+    def test_clear_sections(self):
+        """Should clear sections that depend on the model, and only those."""
+        get_section("minutes", lambda: "Gamle referat")
+        get_section("latest_scores", lambda: "Gamle notar")
+        clear_sections(Minutes)
+        self.assertEqual(get_section("minutes", lambda: "Nye referat"), "Nye referat")
+        self.assertEqual(
+            get_section("latest_scores", lambda: "Nye notar"), "Gamle notar"
+        )
+
+    def test_saving_parts_clears_birthday_song(self):
+        """Should clear the birthday song section when a part is saved."""
+        part = PartFactory()
+        get_section("birthday_song", lambda: part)
+        part.note = "Ny merknad"
+        part.save()
+        self.assertIsNone(get_section("birthday_song", lambda: None))
@@ -2,7 +2,7 @@
 from datetime import datetime, timedelta
 
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Max, Q
+from django.db.models import Count, Max, Q
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.timezone import make_aware
@@ -10,7 +10,7 @@ from django.views.generic import RedirectView, TemplateView
 
 from accounts.models import UserCustom
 from common.comments.models import Comment
-from common.constants.models import Constant
+from common.constants.models import BIRTHDAY_SONG_SLUG, GUEST_START_PAGE
 from common.utils import comma_seperate_list, random_sample_queryset
 from events.models import Event
 from minutes.models import Minutes
@@ -18,14 +18,15 @@ from pictures.models import Gallery, Image
 from quotes.models import Quote
 from sheetmusic.models import Score
 
+from .sections import get_section
+
 
 class DashboardRedirect(RedirectView):
     def get_redirect_url(self, *args, **kwargs):
         if self.request.user.is_authenticated:
             return reverse("dashboard:Dashboard")
 
-        guest_start_page, _ = Constant.objects.get_or_create(name="Gjestestartside")
-        return guest_start_page.value
+        return GUEST_START_PAGE.get()
 
 
 class Dashboard(LoginRequiredMixin, TemplateView):
@@ -33,13 +34,19 @@ class Dashboard(LoginRequiredMixin, TemplateView):
 
     def get_latest_quotes(self):
         """Returns the 2 latest quotes."""
-        return Quote.objects.all()[0:2]
+        return list(
+            Quote.objects.select_related("created_by").prefetch_related("users")[0:2]
+        )
 
     def get_random_quotes(self):
         """Returns 2 random quotes."""
-        quotes = Quote.objects.filter(
-            created__lte=make_aware(datetime.now() - timedelta(days=1 * 365)),
-            created__gte=make_aware(datetime.now() - timedelta(days=5 * 365)),
+        quotes = (
+            Quote.objects.select_related("created_by")
+            .prefetch_related("users")
+            .filter(
+                created__lte=make_aware(datetime.now() - timedelta(days=1 * 365)),
+                created__gte=make_aware(datetime.now() - timedelta(days=5 * 365)),
+            )
         )
         return random_sample_queryset(quotes, 2)
 
@@ -49,19 +56,24 @@ class Dashboard(LoginRequiredMixin, TemplateView):
             start_time__lte=timezone.now() + timedelta(days=31),
         )
         if upcoming_next_month.count() >= 5:
-            return upcoming_next_month
+            return list(upcoming_next_month)
 
-        return Event.objects.upcoming()[:5]
+        return list(Event.objects.upcoming()[:5])
 
     def get_number_events_answered(self):
         """Returns the amount of upcoming events (within a year) a user has answered"""
-        upcoming_events = Event.objects.upcoming().filter(
-            start_time__lte=timezone.now() + timedelta(days=366),
+        counts = (
+            Event.objects.upcoming()
+            .filter(start_time__lte=timezone.now() + timedelta(days=366))
+            .aggregate(
+                upcoming=Count("pk", distinct=True),
+                answered=Count(
+                    "attendances", filter=Q(attendances__person=self.request.user)
+                ),
+            )
         )
-        upcoming_events_count = upcoming_events.count()
-        events_answered = upcoming_events.filter(
-            attendances__person=self.request.user
-        ).count()
+        upcoming_events_count = counts["upcoming"]
+        events_answered = counts["answered"]
 
         if upcoming_events_count == events_answered:
             return upcoming_events_count
@@ -69,20 +81,26 @@ class Dashboard(LoginRequiredMixin, TemplateView):
 
     def get_minutes(self):
         """Returns the 5 most recently created minutes."""
-        return Minutes.objects.order_by("-created")[:5]
+        return list(Minutes.objects.order_by("-created")[:5])
 
     def get_latest_galleries(self):
-        """Returns the 2 galleries with most recent image uploads."""
-        return (
+        """
+        Returns the 2 galleries with most recent image uploads,
+        with a list of the latest image as `latest_images`.
+        """
+        galleries = list(
             Gallery.objects.all()
             .exclude(images__isnull=True)
             .alias(latest_upload=Max("images__uploaded"))
             .order_by("-latest_upload")[:2]
         )
+        for gallery in galleries:
+            gallery.latest_images = list(gallery.images_latest()[:1])
+        return galleries
 
     def get_random_images(self):
         """Returns 2 random images."""
-        queryset = Image.objects.filter(
+        queryset = Image.objects.select_related("gallery").filter(
             uploaded__lte=make_aware(datetime.now() - timedelta(days=1 * 365)),
             uploaded__gte=make_aware(datetime.now() - timedelta(days=5 * 365)),
         )
@@ -90,37 +108,19 @@ class Dashboard(LoginRequiredMixin, TemplateView):
 
     def get_latest_comments(self):
         """Returns 5 most recent comments."""
-        return Comment.objects.all().order_by("-created")[:5]
-
-    def get_all_birthdays(self):
-        return (
-            UserCustom.objects.active()
-            .exclude(birthdate=None)
-            .order_by("birthdate__month", "birthdate__day")
+        return list(
+            Comment.objects.select_related("created_by")
+            .prefetch_related("content_object")
+            .order_by("-created")[:5]
         )
 
     def get_upcoming_birthdays(self):
         """Returns 5 most closely upcoming birthdays."""
-        all_birthdays = self.get_all_birthdays()
-        upcoming_in_year_filter = Q(birthdate__month__gt=timezone.now().month) | (
-            Q(birthdate__month=timezone.now().month)
-            & Q(birthdate__day__gte=timezone.now().day)
-        )
-        upcoming_birthdays = list(all_birthdays.filter(upcoming_in_year_filter)[:5])
-        if len(upcoming_birthdays) < 5:
-            upcoming_birthdays += list(
-                all_birthdays.filter(~upcoming_in_year_filter)[
-                    : (5 - len(upcoming_birthdays))
-                ]
-            )
-        return upcoming_birthdays
+        return UserCustom.objects.upcoming_birthdays(timezone.localdate(), 5)
 
     def get_current_birthdays(self):
         """Returns all current birthdays."""
-        current_birthdays = self.get_all_birthdays().filter(
-            birthdate__month=timezone.localdate().month,
-            birthdate__day=timezone.localdate().day,
-        )
+        current_birthdays = UserCustom.objects.birthdays_on(timezone.localdate())
         birthday_names = [user.get_preferred_name() for user in current_birthdays]
 
         current_date = timezone.localdate()
@@ -132,8 +132,7 @@ class Dashboard(LoginRequiredMixin, TemplateView):
 
     def get_birthday_song(self):
         """Returns birthday song score if it exists."""
-        birthday_song_slug, _ = Constant.objects.get_or_create(name="Bursdagssangslug")
-        birthday_songs = Score.objects.filter(slug=birthday_song_slug.value)
+        birthday_songs = Score.objects.filter(slug=BIRTHDAY_SONG_SLUG.get())
         if birthday_songs.exists():
             birthday_song = birthday_songs.first()
             birthday_song.part = birthday_song.find_user_part(self.request.user)
@@ -141,20 +140,33 @@ class Dashboard(LoginRequiredMixin, TemplateView):
 
     def get_latest_scores(self):
         """Returns 5 most recent scores."""
-        return Score.objects.order_by("-created")[:5]
+        return list(Score.objects.order_by("-created")[:5])
 
     def get_context_data(self, **kwargs):
-        kwargs["latest_quotes"] = self.get_latest_quotes()
-        kwargs["random_quotes"] = self.get_random_quotes()
-        kwargs["events"] = self.get_events()
-        kwargs["minutes"] = self.get_minutes()
-        kwargs["latest_galleries"] = self.get_latest_galleries()
-        kwargs["random_images"] = self.get_random_images()
-        kwargs["latest_comments"] = self.get_latest_comments()
-        kwargs["upcoming_birthdays"] = self.get_upcoming_birthdays()
-        kwargs["current_birthdays"] = self.get_current_birthdays()
+        user = self.request.user
+        kwargs["latest_quotes"] = get_section("latest_quotes", self.get_latest_quotes)
+        kwargs["random_quotes"] = get_section("random_quotes", self.get_random_quotes)
+        kwargs["events"] = get_section("events", self.get_events)
+        kwargs["minutes"] = get_section("minutes", self.get_minutes)
+        kwargs["latest_galleries"] = get_section(
+            "latest_galleries", self.get_latest_galleries
+        )
+        kwargs["random_images"] = get_section("random_images", self.get_random_images)
+        kwargs["latest_comments"] = get_section(
+            "latest_comments", self.get_latest_comments
+        )
+        kwargs["upcoming_birthdays"] = get_section(
+            "upcoming_birthdays", self.get_upcoming_birthdays, daily=True
+        )
+        kwargs["current_birthdays"] = get_section(
+            "current_birthdays", self.get_current_birthdays, daily=True
+        )
         if kwargs["current_birthdays"]:
-            kwargs["birthday_song"] = self.get_birthday_song()
-        kwargs["latest_scores"] = self.get_latest_scores()
-        kwargs["number_events_answered"] = self.get_number_events_answered()
+            kwargs["birthday_song"] = get_section(
+                "birthday_song", self.get_birthday_song, user=user, daily=True
+            )
+        kwargs["latest_scores"] = get_section("latest_scores", self.get_latest_scores)
+        kwargs["number_events_answered"] = get_section(
+            "number_events_answered", self.get_number_events_answered, user=user
+        )
         return super().get_context_data(**kwargs)
@@ -7,6 +7,8 @@ class UserEventsConfig(AppConfig):
     verbose_name = "Hendingar"
 
     def ready(self):
+        from . import signals  # noqa: F401
+
         search.register(
             self.get_model("Event"),
             fields=("title", "content"),
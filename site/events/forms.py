@@ -1,10 +1,15 @@
+from datetime import date
+
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import HTML, Fieldset, Layout, Submit
 from django.forms import (
+    Form,
+    ModelChoiceField,
     ModelForm,
     NumberInput,
     SplitDateTimeField,
     TextInput,
+    TypedChoiceField,
     inlineformset_factory,
 )
 from django.utils.timezone import now
@@ -16,7 +21,15 @@ from common.forms.widgets import (
     SplitDateTimeWidgetCustom,
 )
 
-from .models import Event, EventAttendance, EventKeyinfoEntry
+from .models import (
+    AttendanceStatistic,
+    Event,
+    EventAttendance,
+    EventCategory,
+    EventKeyinfoEntry,
+    semester_label,
+    semester_of,
+)
 
 
 class EventForm(ModelForm):
@@ -42,9 +55,8 @@ class EventForm(ModelForm):
             "Nykelinfo",
             HTML(
                 """
-                {% load embeddable_text markdown %}
-                {% get_embeddable_text "Nykelinfo-hjelpetekst for hendingar" as text %}
-                {{ text | markdown }}
+                {% load embeddable_text %}
+                {% embeddable_text "Nykelinfo-hjelpetekst for hendingar" %}
                 """
             ),
             FormsetLayoutObject(),
@@ -128,3 +140,28 @@ class EventKeyinfoEntryFormsetHelper(FormHelper):
 
 
 EventKeyinfoEntryFormset.helper = EventKeyinfoEntryFormsetHelper()
+
+
+class AttendanceStatisticsFilterForm(Form):
+    """Form for choosing the semester and event category of attendance statistics."""
+
+    semester = TypedChoiceField(label="Semester", coerce=date.fromisoformat)
+    category = ModelChoiceField(
+        EventCategory.objects.all(),
+        label="Kategori",
+        required=False,
+        empty_label="Alle",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        semesters = {*AttendanceStatistic.objects.semesters(), semester_of(now())}
+        self.fields["semester"].choices = [
+            (semester.isoformat(), semester_label(semester))
+            for semester in sorted(semesters, reverse=True)
+        ]
+        self.helper = FormHelper()
+        self.helper.form_method = "get"
+        self.helper.disable_csrf = True
+        self.helper.field_class = "col-lg-4"
+        self.helper.add_input(Submit("submit", "Vis"))
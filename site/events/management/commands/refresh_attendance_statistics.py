@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from events.models import AttendanceStatistic, semester_label
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the attendance statistics of all semesters from event attendances. "
+        "Statistics are otherwise refreshed when attendances and events change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--year",
+            type=int,
+            help="Only rebuild the statistics of the semesters of this year.",
+        )
+
+    def handle(self, year, **options):
+        semesters = AttendanceStatistic.objects.refresh_all(year)
+        for semester in sorted(semesters):
+            self.stdout.write(f"Refreshed {semester_label(semester)}.")
+        self.stdout.write(f"Refreshed {len(semesters)} semesters.")
@@ -0,0 +1,19 @@
+# Generated by Django 4.1 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0013_rendered_markdown"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="eventattendance",
+            index=models.Index(
+                fields=["person", "event"], name="event_attendance_person_event"
+            ),
+        ),
+    ]
@@ -0,0 +1,156 @@
+# Generated by Django 4.1 on 2026-10-18 13:14
+
+from datetime import date, datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
+from django.utils.timezone import localtime, make_aware
+
+
+def semester_of(time):
+    """Returns the first day of the semester of `time`."""
+    time = localtime(time)
+    return date(time.year, 1 if time.month <= 6 else 7, 1)
+
+
+def semester_range(semester):
+    """Returns the start and end time of the semester starting on `semester`."""
+    end = (
+        date(semester.year, 7, 1)
+        if semester.month == 1
+        else date(semester.year + 1, 1, 1)
+    )
+    return (
+        make_aware(datetime(semester.year, semester.month, 1)),
+        make_aware(datetime(end.year, end.month, 1)),
+    )
+
+
+def create_attendance_statistics(apps, schema_editor):
+    AttendanceStatistic = apps.get_model("events", "AttendanceStatistic")
+    Event = apps.get_model("events", "Event")
+    EventAttendance = apps.get_model("events", "EventAttendance")
+    semesters = {
+        semester_of(month) for month in Event.objects.datetimes("start_time", "month")
+    }
+    for semester in sorted(semesters):
+        start, end = semester_range(semester)
+        counts = (
+            EventAttendance.objects.filter(
+                event__start_time__gte=start, event__start_time__lt=end
+            )
+            .annotate(
+                instrument_group=Coalesce(
+                    "instrument_type__group", "person__instrument_type__group"
+                )
+            )
+            .values("person", "event__category", "instrument_group")
+            .annotate(
+                num_attending=Count("pk", filter=Q(status="ATTENDING")),
+                num_attending_maybe=Count("pk", filter=Q(status="ATTENDING_MAYBE")),
+                num_attending_not=Count("pk", filter=Q(status="ATTENDING_NOT")),
+            )
+            .order_by()
+        )
+        AttendanceStatistic.objects.bulk_create(
+            AttendanceStatistic(
+                person_id=row["person"],
+                semester=semester,
+                category_id=row["event__category"],
+                instrument_group_id=row["instrument_group"],
+                num_attending=row["num_attending"],
+                num_attending_maybe=row["num_attending_maybe"],
+                num_attending_not=row["num_attending_not"],
+            )
+            for row in counts
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("instruments", "0007_instrumenttypedetectionkeyword_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("events", "0014_eventattendance_person_event_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceStatistic",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "semester",
+                    models.DateField(
+                        help_text="Første dag i semesteret.", verbose_name="semester"
+                    ),
+                ),
+                (
+                    "num_attending",
+                    models.PositiveIntegerField(default=0, verbose_name="deltek"),
+                ),
+                (
+                    "num_attending_maybe",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="deltek kanskje"
+                    ),
+                ),
+                (
+                    "num_attending_not",
+                    models.PositiveIntegerField(default=0, verbose_name="deltek ikkje"),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attendance_statistics",
+                        to="events.eventcategory",
+                        verbose_name="hendingskategori",
+                    ),
+                ),
+                (
+                    "instrument_group",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="event_attendance_statistics",
+                        to="instruments.instrumentgroup",
+                        verbose_name="instrumentgruppe",
+                    ),
+                ),
+                (
+                    "person",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="event_attendance_statistics",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="person",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "oppmøtestatistikk",
+                "verbose_name_plural": "oppmøtestatistikkar",
+                "ordering": ["-semester", "person"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="attendancestatistic",
+            index=models.Index(
+                fields=["semester", "person"], name="attendance_statistic_semester"
+            ),
+        ),
+        migrations.RunPython(create_attendance_statistics, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from autoslug.fields import AutoSlugField
 from django.conf import settings
+from django.db import transaction
 from django.db.models import (
     CASCADE,
     PROTECT,
@@ -9,22 +10,31 @@ from django.db.models import (
     BooleanField,
     CharField,
     CheckConstraint,
+    Count,
+    DateField,
     DateTimeField,
+    F,
     FloatField,
     ForeignKey,
+    Index,
     Manager,
     ManyToManyField,
     Model,
+    OuterRef,
+    PositiveIntegerField,
+    Prefetch,
+    QuerySet,
     TextChoices,
     UniqueConstraint,
     URLField,
 )
+from django.db.models.functions import Coalesce
 from django.db.models.query_utils import Q
 from django.urls import reverse
 from django.utils.timezone import localtime, make_aware, now
 
 from common.models import ArticleMixin
-from instruments.models import InstrumentType
+from instruments.models import InstrumentGroup, InstrumentType
 from pictures.models import Gallery
 from repertoire.models import Repertoire
 from sheetmusic.models import Score
@@ -44,14 +54,75 @@ class EventCategory(Model):
         verbose_name_plural = "hendingskategoriar"
 
 
-class EventManager(Manager):
+class Attendance(TextChoices):
+    ATTENDING = "ATTENDING", "Deltek"
+    ATTENDING_MAYBE = "ATTENDING_MAYBE", "Deltek kanskje"
+    ATTENDING_NOT = "ATTENDING_NOT", "Deltek ikkje"
+
+
+def attendance_counts(prefix=""):
+    """
+    Returns annotations counting the attendances with each status,
+    e.g. `num_attending_maybe`, with conditional aggregation.
+    `prefix` is the lookup from the annotated model to attendances.
+    """
+    return {
+        f"num_{status.lower()}": Count(
+            f"{prefix}pk", filter=Q(**{f"{prefix}status": status})
+        )
+        for status in Attendance
+    }
+
+
+class EventQuerySet(QuerySet):
     def upcoming(self):
         """Returns a manager for upcoming and ongoing events."""
-        return super().filter(
+        return self.filter(
             Q(end_time__gte=make_aware(datetime.now()))
             | Q(start_time__gte=make_aware(datetime.now() - timedelta(hours=12)))
         )
 
+    def with_attendance_counts(self):
+        """Annotates events with the number of attendances with each status."""
+        return self.annotate(**attendance_counts("attendances__"))
+
+    def with_user_attending_status(self, user):
+        """Annotates events with the status of `user`'s attendance, if any."""
+        return self.annotate(
+            user_attending_status=EventAttendance.objects.filter(
+                event=OuterRef("pk"), person=user
+            ).values("status")
+        )
+
+    def for_list(self, user):
+        """Returns events with what is shown for them in event lists, for `user`."""
+        return (
+            self.with_user_attending_status(user)
+            .with_attendance_counts()
+            .select_related("category")
+            .prefetch_related("keyinfo_entries")
+        )
+
+    def prefetch_attendances(self):
+        """
+        Prefetches the attendances of events with what is shown for them,
+        to be split by status with `Event.attendances_by_status`.
+        """
+        return self.prefetch_related(
+            Prefetch(
+                "attendances",
+                queryset=EventAttendance.objects.select_related(
+                    "person__jacket",
+                    "person__instrument_type__group",
+                    "instrument_type__group",
+                ),
+            )
+        )
+
+
+class EventManager(Manager.from_queryset(EventQuerySet)):
+    pass
+
 
 class Event(ArticleMixin):
     """Model representing an event."""
@@ -104,6 +175,17 @@ class Event(ArticleMixin):
         blank=True,
     )
 
+    def attendances_by_status(self):
+        """
+        Returns a dict from each status to the event's attendances with that status.
+        Attendances are split in Python,
+        so that attendances prefetched with `prefetch_attendances` are used.
+        """
+        attendances = {status: [] for status in Attendance}
+        for attendance in self.attendances.all():
+            attendances[attendance.status].append(attendance)
+        return attendances
+
     def attending(self):
         return self.attendances.filter(status=Attendance.ATTENDING)
 
@@ -148,15 +230,32 @@ class Event(ArticleMixin):
         ]
 
 
-class Attendance(TextChoices):
-    ATTENDING = "ATTENDING", "Deltek"
-    ATTENDING_MAYBE = "ATTENDING_MAYBE", "Deltek kanskje"
-    ATTENDING_NOT = "ATTENDING_NOT", "Deltek ikkje"
+class EventAttendanceManager(Manager):
+    def instrument_group_counts(self):
+        """
+        Returns the number of attendances with each status in each instrument group,
+        with conditional aggregation in a single query.
+        The instrument group of an attendance is found as by `EventAttendance.instrument_group`,
+        and is `None` if unknown, which is ordered first.
+        """
+        return (
+            self.annotate(
+                instrument_group=Coalesce(
+                    "instrument_type__group__name",
+                    "person__instrument_type__group__name",
+                )
+            )
+            .values("instrument_group")
+            .annotate(**attendance_counts())
+            .order_by(F("instrument_group").asc(nulls_first=True))
+        )
 
 
 class EventAttendance(Model):
     """Model representing a registered attendance for an event."""
 
+    objects = EventAttendanceManager()
+
     event = ForeignKey(
         Event,
         on_delete=CASCADE,
@@ -205,6 +304,11 @@ class EventAttendance(Model):
         constraints = [
             UniqueConstraint(fields=["event", "person"], name="unique_event_attendance")
         ]
+        indexes = [
+            # For finding the events a person has answered,
+            # which the unique constraint on `event` and `person` can't be used for
+            Index(fields=["person", "event"], name="event_attendance_person_event")
+        ]
 
 
 class EventKeyinfoEntry(Model):
@@ -234,3 +338,142 @@ class EventKeyinfoEntry(Model):
         constraints = [
             UniqueConstraint(fields=["key", "event"], name="unique_EventKeyinfoEntry"),
         ]
+
+
+def semester_of(time):
+    """
+    Returns the first day of the semester of `time`.
+    The spring semester starts on January 1st and the autumn semester on July 1st.
+    """
+    time = localtime(time)
+    return date(time.year, 1 if time.month <= 6 else 7, 1)
+
+
+def semester_range(semester):
+    """Returns the start and end time of the semester starting on `semester`."""
+    end = (
+        date(semester.year, 7, 1)
+        if semester.month == 1
+        else date(semester.year + 1, 1, 1)
+    )
+    return (
+        make_aware(datetime(semester.year, semester.month, 1)),
+        make_aware(datetime(end.year, end.month, 1)),
+    )
+
+
+def semester_label(semester):
+    """Returns the name of the semester starting on `semester`, e.g. "Haust 2024"."""
+    return f"{'Vår' if semester.month == 1 else 'Haust'} {semester.year}"
+
+
+class AttendanceStatisticManager(Manager):
+    def refresh(self, semester, person=None):
+        """
+        Recomputes the statistics of the semester starting on `semester`
+        from the attendances of its events, only for `person` if given.
+        """
+        start, end = semester_range(semester)
+        attendances = EventAttendance.objects.filter(
+            event__start_time__gte=start, event__start_time__lt=end
+        )
+        statistics = self.filter(semester=semester)
+        if person is not None:
+            attendances = attendances.filter(person=person)
+            statistics = statistics.filter(person=person)
+
+        counts = (
+            attendances.annotate(
+                instrument_group=Coalesce(
+                    "instrument_type__group", "person__instrument_type__group"
+                )
+            )
+            .values("person", "event__category", "instrument_group")
+            .annotate(**attendance_counts())
+            .order_by()
+        )
+        with transaction.atomic():
+            statistics.delete()
+            self.bulk_create(
+                AttendanceStatistic(
+                    person_id=row["person"],
+                    semester=semester,
+                    category_id=row["event__category"],
+                    instrument_group_id=row["instrument_group"],
+                    **{key: row[key] for key in attendance_counts()},
+                )
+                for row in counts
+            )
+
+    def refresh_all(self, year=None):
+        """
+        Recomputes the statistics of all semesters with events,
+        or only the semesters of `year` if given.
+        """
+        events = Event.objects.all()
+        statistics = self.all()
+        if year is not None:
+            events = events.filter(start_time__year=year)
+            statistics = statistics.filter(semester__year=year)
+
+        semesters = {
+            semester_of(month) for month in events.datetimes("start_time", "month")
+        }
+        statistics.exclude(semester__in=semesters).delete()
+        for semester in sorted(semesters):
+            self.refresh(semester)
+        return semesters
+
+    def semesters(self):
+        """Returns the semesters with statistics, newest first."""
+        return self.order_by("-semester").values_list("semester", flat=True).distinct()
+
+
+class AttendanceStatistic(Model):
+    """
+    The number of attendances with each status of a person
+    for events of a category in a semester, by instrument group.
+
+    Built from `EventAttendance`, and refreshed when attendances and events are saved or deleted,
+    see `events.signals`. `refresh_attendance_statistics` refreshes all statistics,
+    which also updates the instrument groups of attendances without an instrument type.
+    """
+
+    objects = AttendanceStatisticManager()
+
+    person = ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=CASCADE,
+        verbose_name="person",
+        related_name="event_attendance_statistics",
+    )
+    semester = DateField("semester", help_text="Første dag i semesteret.")
+    category = ForeignKey(
+        EventCategory,
+        on_delete=CASCADE,
+        verbose_name="hendingskategori",
+        related_name="attendance_statistics",
+    )
+    instrument_group = ForeignKey(
+        InstrumentGroup,
+        null=True,
+        blank=True,
+        on_delete=SET_NULL,
+        verbose_name="instrumentgruppe",
+        related_name="event_attendance_statistics",
+    )
+    num_attending = PositiveIntegerField("deltek", default=0)
+    num_attending_maybe = PositiveIntegerField("deltek kanskje", default=0)
+    num_attending_not = PositiveIntegerField("deltek ikkje", default=0)
+
+    def __str__(self):
+        return f"{self.person} - {semester_label(self.semester)} - {self.category}"
+
+    class Meta:
+        verbose_name = "oppmøtestatistikk"
+        verbose_name_plural = "oppmøtestatistikkar"
+        ordering = ["-semester", "person"]
+        indexes = [
+            # For refreshing the statistics of a person in a semester
+            Index(fields=["semester", "person"], name="attendance_statistic_semester")
+        ]
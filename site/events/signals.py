@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import AttendanceStatistic, Event, EventAttendance, semester_of
+
+
+@receiver(post_save, sender=EventAttendance)
+@receiver(post_delete, sender=EventAttendance)
+def refresh_attendance_statistics(sender, instance, **kwargs):
+    AttendanceStatistic.objects.refresh(
+        semester_of(instance.event.start_time), instance.person_id
+    )
+
+
+@receiver(pre_save, sender=Event)
+def store_previous_event(sender, instance, **kwargs):
+    instance.previous = (
+        Event.objects.only("start_time", "category").filter(pk=instance.pk).first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=Event)
+def refresh_event_attendance_statistics(sender, instance, created, **kwargs):
+    """Refreshes statistics when the semester or category of an event changes."""
+    previous = instance.previous
+    if previous is None or (
+        previous.start_time == instance.start_time
+        and previous.category_id == instance.category_id
+    ):
+        return
+    for semester in {
+        semester_of(previous.start_time),
+        semester_of(instance.start_time),
+    }:
+        AttendanceStatistic.objects.refresh(semester)
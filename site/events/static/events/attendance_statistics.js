@@ -0,0 +1,16 @@
+document.addEventListener('DOMContentLoaded', () => {
+    let table = document.querySelector("#attendance_statistics");
+    new DataTable(table, {
+        "paging": false,
+        // Sort by number of events attended
+        "order": [[2, "desc"]],
+        "language": {
+            "zeroRecords": "Ingen statistikk funne",
+            // Would otherwise say "showing page 1 of 1" even though we've turned off paging
+            "info": "Visar _TOTAL_ brukarar",
+            "infoEmpty": "Ingen statistikk funne",
+            "infoFiltered": "(filtrert fra totalt _MAX_ brukarar)",
+            "search": "Søk:",
+        },
+    });
+} );
@@ -1,12 +1,16 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from http import HTTPStatus
 from secrets import token_urlsafe
+from unittest.mock import Mock
+from urllib.parse import urlencode
 
+from django.core.management import call_command
 from django.db import IntegrityError
 from django.db.models import ProtectedError
 from django.http.response import Http404
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
+from django.utils.http import http_date
 from django.utils.text import slugify
 from django.utils.timezone import make_aware, now
 
@@ -15,10 +19,14 @@ from common.mixins import TestMixin
 from common.test_utils import create_formset_post_data
 from events.models import (
     Attendance,
+    AttendanceStatistic,
     Event,
     EventAttendance,
     EventCategory,
     EventKeyinfoEntry,
+    semester_label,
+    semester_of,
+    semester_range,
 )
 from events.views import EventFeed, get_event_attendance_or_404, get_event_or_404
 from instruments.factories import InstrumentTypeFactory
@@ -96,6 +104,33 @@ class EventManagerTestSuite(TestCase):
         upcoming = list(Event.objects.upcoming())
         self.assertEqual(len(upcoming), 1)
 
+    def test_with_attendance_counts(self):
+        """Should annotate events with the number of attendances with each status."""
+        event = EventFactory()
+        EventAttendanceFactory.create_batch(2, event=event, status=Attendance.ATTENDING)
+        EventAttendanceFactory(event=event, status=Attendance.ATTENDING_NOT)
+        EventAttendanceFactory(status=Attendance.ATTENDING_MAYBE)
+        event = Event.objects.with_attendance_counts().get(pk=event.pk)
+        self.assertEqual(event.num_attending, 2)
+        self.assertEqual(event.num_attending_maybe, 0)
+        self.assertEqual(event.num_attending_not, 1)
+
+    def test_prefetch_attendances(self):
+        """Should prefetch attendances, so that they can be split by status without queries."""
+        event = EventFactory()
+        attending = EventAttendanceFactory(event=event, status=Attendance.ATTENDING)
+        attending_not = EventAttendanceFactory(
+            event=event, status=Attendance.ATTENDING_NOT
+        )
+        event = Event.objects.prefetch_attendances().get(pk=event.pk)
+        with self.assertNumQueries(0):
+            attendances = event.attendances_by_status()
+            for attendance in attendances[Attendance.ATTENDING]:
+                attendance.instrument_group()
+        self.assertEqual(attendances[Attendance.ATTENDING], [attending])
+        self.assertEqual(attendances[Attendance.ATTENDING_MAYBE], [])
+        self.assertEqual(attendances[Attendance.ATTENDING_NOT], [attending_not])
+
 
 class EventTestSuite(TestCase):
     def setUp(self):
@@ -223,6 +258,47 @@ class EventAttendanceTestSuite(TestCase):
         attendance = EventAttendanceFactory(person=user, instrument_type=None)
         self.assertIsNone(attendance.instrument_group())
 
+    def test_instrument_group_counts(self):
+        """
+        `instrument_group_counts` should count the attendances with each status
+        in each instrument group.
+        """
+        event = self.attendance.event
+        self.attendance.delete()
+        instrument_type = InstrumentTypeFactory()
+        EventAttendanceFactory(
+            event=event, instrument_type=instrument_type, status=Attendance.ATTENDING
+        )
+        EventAttendanceFactory(
+            event=event,
+            person=UserFactory(instrument_type=instrument_type),
+            instrument_type=None,
+            status=Attendance.ATTENDING_MAYBE,
+        )
+        EventAttendanceFactory(
+            event=event,
+            person=UserFactory(instrument_type=None),
+            instrument_type=None,
+            status=Attendance.ATTENDING,
+        )
+        self.assertEqual(
+            list(event.attendances.instrument_group_counts()),
+            [
+                {
+                    "instrument_group": None,
+                    "num_attending": 1,
+                    "num_attending_maybe": 0,
+                    "num_attending_not": 0,
+                },
+                {
+                    "instrument_group": instrument_type.group.name,
+                    "num_attending": 1,
+                    "num_attending_maybe": 1,
+                    "num_attending_not": 0,
+                },
+            ],
+        )
+
 
 class EventKeyinfoEntryTestSuite(TestMixin, TestCase):
     def test_to_str(self):
@@ -301,20 +377,24 @@ class EventListTestSuite(TestMixin, TestCase):
 
     def test_attendance_form_in_context(self):
         """
-        Create 3 events and check if they have attendance_form in their context.
+        Should add the fields of the attendance form of the events to the context,
+        and render a form posting them for each event.
         """
-        [
+        events = [
             EventFactory(start_time=make_aware(datetime.now() + timedelta(1)))
             for _ in range(3)
         ]
-        self.assertEqual(Event.objects.count(), 3)
         self.client.force_login(UserFactory())
         response = self.client.get(self.get_url())
-        events = response.context["events"]
-        self.assertEqual(len(events), 3)
+        self.assertIn(
+            f'value="{Attendance.ATTENDING}"',
+            response.context["attendance_form_fields"],
+        )
         for event in events:
-            attendance_form = getattr(event, "attendance_form", None)
-            self.assertIsNotNone(attendance_form)
+            self.assertContains(
+                response,
+                f'action="{reverse("events:EventAttendanceCreateFromList", args=[event.start_time.year, event.slug])}"',
+            )
 
     def test_filter_future_events(self):
         """
@@ -358,6 +438,19 @@ class EventDetailTestSuite(TestMixin, TestCase):
         event = EventFactory()
         self.assertLoginRequired(self.get_url(event))
 
+    def test_attendances(self):
+        """Should add the attendances split by status and their counts to the context."""
+        event = EventFactory()
+        attendance = EventAttendanceFactory(event=event, status=Attendance.ATTENDING)
+        self.client.force_login(UserFactory())
+        response = self.client.get(self.get_url(event))
+        self.assertEqual(
+            response.context["attendances_by_status"][Attendance.ATTENDING],
+            [attendance],
+        )
+        self.assertEqual(response.context["event"].num_attending, 1)
+        self.assertEqual(len(response.context["instrument_group_counts"]), 1)
+
 
 class EventCreateTestSuite(TestMixin, TestCase):
     def setUp(self):
@@ -630,6 +723,46 @@ class EventAttendanceCreateTestSuite(TestMixin, TestCase):
         self.assertRedirects(response, self.event.get_absolute_url())
 
 
+class EventAttendanceCreateFromListTestSuite(TestMixin, TestCase):
+    def get_url(self, event):
+        return reverse(
+            "events:EventAttendanceCreateFromList",
+            args=[event.start_time.year, event.slug],
+        )
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.event = EventFactory(start_time=now() + timedelta(days=1))
+        self.client.force_login(self.user)
+
+    def test_redirects_to_list(self):
+        """Should register the attendance and redirect to the event list."""
+        response = self.client.post(
+            self.get_url(self.event), {"status": Attendance.ATTENDING}
+        )
+        self.assertRedirects(response, reverse("events:EventList"))
+        self.assertTrue(
+            EventAttendance.objects.filter(event=self.event, person=self.user).exists()
+        )
+
+    def test_htmx_returns_event_card(self):
+        """Should respond to htmx requests with only the event's updated card."""
+        response = self.client.post(
+            self.get_url(self.event),
+            {"status": Attendance.ATTENDING},
+            HTTP_HX_REQUEST="true",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(response, "events/includes/event_list_card.html")
+        self.assertTemplateNotUsed(response, "events/event_list.html")
+        self.assertEqual(
+            response.context["event"].user_attending_status, Attendance.ATTENDING
+        )
+        self.assertEqual(response.context["event"].num_attending, 1)
+        self.assertContains(response, f'id="event-{self.event.pk}"')
+        self.assertNotContains(response, "<form")
+
+
 class EventAttendanceUpdateTestSuite(TestMixin, TestCase):
     def get_url(self, attendance):
         """Returns the URL for the event attendance update view for `attendance`."""
@@ -755,3 +888,256 @@ class EventFeedTestSuite(TestMixin, TestCase):
         event = EventFactory(location="Gløs")
         location = EventFeed().item_location(event)
         self.assertEqual(location, "Gløs")
+
+    def test_finds_user_in_single_query(self):
+        """Should find the user of the token in a single query."""
+        token = UserFactory().calendar_feed_token
+        # The user, the version of the feed and the events
+        with self.assertNumQueries(3):
+            self.client.get(self.get_url(token))
+
+    def test_includes_events(self):
+        """Should include the events since the user joined."""
+        user = UserFactory()
+        event = EventFactory(
+            title="Øving", start_time=now() + timedelta(days=1), end_time=None
+        )
+        EventFactory(
+            title="Gamal konsert", start_time=now() - timedelta(days=1), end_time=None
+        )
+        response = self.client.get(self.get_url(user.calendar_feed_token))
+        content = response.content.decode()
+        self.assertEqual(content.count("BEGIN:VEVENT"), 1)
+        self.assertIn("SUMMARY:Øving", content)
+        self.assertIn(event.get_absolute_url(), content)
+        self.assertTrue(content.startswith("BEGIN:VCALENDAR"))
+        self.assertTrue(content.endswith("END:VCALENDAR\r\n"))
+
+    def test_not_modified(self):
+        """Should return 304 if the feed hasn't changed since the given ETag."""
+        token = UserFactory().calendar_feed_token
+        EventFactory(start_time=now() + timedelta(days=1))
+        response = self.client.get(self.get_url(token))
+        response = self.client.get(
+            self.get_url(token), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_no_last_modified(self):
+        """
+        Should not send Last-Modified, since it doesn't change when events are deleted,
+        and should not answer 304 for If-Modified-Since.
+        """
+        token = UserFactory().calendar_feed_token
+        event = EventFactory(start_time=now() + timedelta(days=1))
+        response = self.client.get(self.get_url(token))
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        event.delete()
+        response = self.client.get(
+            self.get_url(token), HTTP_IF_MODIFIED_SINCE=http_date(now().timestamp())
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_modified(self):
+        """Should return the feed if events have changed since the given ETag."""
+        token = UserFactory().calendar_feed_token
+        event = EventFactory(title="Øving", start_time=now() + timedelta(days=1))
+        response = self.client.get(self.get_url(token))
+
+        event.title = "Konsert"
+        event.save()
+        response = self.client.get(
+            self.get_url(token), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn("SUMMARY:Konsert", response.content.decode())
+
+        etag = response["ETag"]
+        event.delete()
+        response = self.client.get(self.get_url(token), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotIn("BEGIN:VEVENT", response.content.decode())
+
+    def test_reuses_cached_events(self):
+        """Should reuse the serialized events of other feeds."""
+        EventFactory(title="Øving", start_time=now() + timedelta(days=1))
+        self.client.get(self.get_url(UserFactory().calendar_feed_token))
+
+        feed = EventFeed()
+        request = RequestFactory().get(self.get_url(UserFactory().calendar_feed_token))
+        response = feed(request)
+        self.assertEqual(feed.uncached_events, [])
+        self.assertIn("SUMMARY:Øving", response.content.decode())
+
+
+class SemesterTestSuite(TestCase):
+    def test_semester_of(self):
+        """Should return the first day of the spring or autumn semester."""
+        self.assertEqual(
+            semester_of(make_aware(datetime(2024, 6, 30, 23))), date(2024, 1, 1)
+        )
+        self.assertEqual(
+            semester_of(make_aware(datetime(2024, 7, 1))), date(2024, 7, 1)
+        )
+
+    def test_semester_range(self):
+        """Should return the start and end time of the semester."""
+        self.assertEqual(
+            semester_range(date(2024, 7, 1)),
+            (make_aware(datetime(2024, 7, 1)), make_aware(datetime(2025, 1, 1))),
+        )
+
+    def test_semester_label(self):
+        self.assertEqual(semester_label(date(2024, 1, 1)), "Vår 2024")
+        self.assertEqual(semester_label(date(2024, 7, 1)), "Haust 2024")
+
+
+class AttendanceStatisticTestSuite(TestMixin, TestCase):
+    def setUp(self):
+        self.user = UserFactory(instrument_type=InstrumentTypeFactory())
+        self.event = EventFactory(start_time=make_aware(datetime(2024, 9, 1)))
+
+    def get_statistics(self):
+        return list(
+            AttendanceStatistic.objects.values(
+                "person",
+                "semester",
+                "category",
+                "instrument_group",
+                "num_attending",
+                "num_attending_maybe",
+                "num_attending_not",
+            )
+        )
+
+    def test_refreshed_on_attendance_save(self):
+        """Should count the attendances of each person when attendances are saved."""
+        EventAttendanceFactory(event=self.event, person=self.user)
+        attendance = EventAttendanceFactory(
+            event=EventFactory(
+                start_time=make_aware(datetime(2024, 10, 1)),
+                category=self.event.category,
+            ),
+            person=self.user,
+        )
+        attendance.status = Attendance.ATTENDING_NOT
+        attendance.save()
+        self.assertEqual(
+            self.get_statistics(),
+            [
+                {
+                    "person": self.user.pk,
+                    "semester": date(2024, 7, 1),
+                    "category": self.event.category.pk,
+                    "instrument_group": self.user.instrument_type.group.pk,
+                    "num_attending": 1,
+                    "num_attending_maybe": 0,
+                    "num_attending_not": 1,
+                }
+            ],
+        )
+
+    def test_refreshed_on_attendance_delete(self):
+        """Should remove statistics when attendances are deleted."""
+        attendance = EventAttendanceFactory(event=self.event, person=self.user)
+        attendance.delete()
+        self.assertEqual(self.get_statistics(), [])
+
+    def test_refreshed_on_event_change(self):
+        """Should move statistics when the semester or category of an event changes."""
+        EventAttendanceFactory(event=self.event, person=self.user)
+        self.event.start_time = make_aware(datetime(2024, 3, 1))
+        self.event.category = EventCategoryFactory()
+        self.event.save()
+        statistic = AttendanceStatistic.objects.get()
+        self.assertEqual(statistic.semester, date(2024, 1, 1))
+        self.assertEqual(statistic.category, self.event.category)
+
+    def test_refresh_all(self):
+        """Should rebuild the statistics of all semesters."""
+        EventAttendanceFactory(event=self.event, person=self.user)
+        statistics = self.get_statistics()
+        AttendanceStatistic.objects.update(num_attending=5)
+        AttendanceStatistic.objects.create(
+            person=self.user, semester=date(2000, 1, 1), category=self.event.category
+        )
+        call_command("refresh_attendance_statistics", stdout=Mock())
+        self.assertEqual(self.get_statistics(), statistics)
+
+
+class AttendanceStatisticsReportTestSuite(TestMixin, TestCase):
+    def get_url(self, **params):
+        return f"{reverse('events:AttendanceStatisticsReport')}?{urlencode(params)}"
+
+    def setUp(self):
+        self.event = EventFactory(start_time=make_aware(datetime(2024, 9, 1)))
+        self.attendance = EventAttendanceFactory(
+            event=self.event,
+            person=UserFactory(instrument_type=None),
+            instrument_type=InstrumentTypeFactory(),
+        )
+        EventAttendanceFactory(
+            event=EventFactory(start_time=make_aware(datetime(2024, 10, 1))),
+            person=self.attendance.person,
+            status=Attendance.ATTENDING_MAYBE,
+        )
+        self.client.force_login(
+            UserFactory(permissions=["events.view_eventattendance"])
+        )
+
+    def test_requires_permission(self):
+        """Should require the `view_eventattendance` permission."""
+        self.assertPermissionRequired(self.get_url(), "events.view_eventattendance")
+
+    def test_statistics(self):
+        """Should sum the statistics of each person in the semester."""
+        response = self.client.get(self.get_url(semester="2024-07-01"))
+        self.assertEqual(
+            response.context["statistics"],
+            [
+                {
+                    "person": self.attendance.person,
+                    "instrument_group__name": self.attendance.instrument_group().name,
+                    "attending": 1,
+                    "attending_maybe": 0,
+                    "attending_not": 0,
+                },
+                {
+                    "person": self.attendance.person,
+                    "instrument_group__name": None,
+                    "attending": 0,
+                    "attending_maybe": 1,
+                    "attending_not": 0,
+                },
+            ],
+        )
+
+    def test_filter_category(self):
+        """Should only include events of the chosen category."""
+        response = self.client.get(
+            self.get_url(semester="2024-07-01", category=self.event.category.pk)
+        )
+        self.assertEqual(len(response.context["statistics"]), 1)
+
+    def test_other_semester(self):
+        """Should not include statistics of other semesters."""
+        response = self.client.get(self.get_url(semester="2024-01-01"))
+        self.assertEqual(response.context["statistics"], [])
+
+    def test_csv(self):
+        """Should export the statistics as CSV."""
+        response = self.client.get(
+            reverse("events:AttendanceStatisticsCSV") + "?semester=2024-07-01"
+        )
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("oppmote-haust-2024.csv", response["Content-Disposition"])
+        lines = response.content.decode().splitlines()
+        self.assertEqual(
+            lines[0], "Namn,Instrumentgruppe,Deltek,Deltek kanskje,Deltek ikkje"
+        )
+        self.assertEqual(
+            lines[1],
+            f"{self.attendance.person},{self.attendance.instrument_group()},1,0,0",
+        )
+        self.assertEqual(len(lines), 3)
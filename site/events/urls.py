@@ -13,6 +13,16 @@ urlpatterns = [
         name="EventListFilter",
     ),
     path("ny/", views.EventCreate.as_view(), name="EventCreate"),
+    path(
+        "statistikk/",
+        views.AttendanceStatisticsReport.as_view(),
+        name="AttendanceStatisticsReport",
+    ),
+    path(
+        "statistikk/csv/",
+        views.AttendanceStatisticsCSV.as_view(),
+        name="AttendanceStatisticsCSV",
+    ),
     path("<int:year>/<slug:slug>/", views.EventDetail.as_view(), name="EventDetail"),
     path(
         "<int:year>/<slug:slug>/rediger/",
@@ -1,14 +1,24 @@
+import csv
+from io import BytesIO
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
-from django.db.models import OuterRef
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
 from django.db.models.functions import TruncMonth
-from django.http import Http404, HttpResponseForbidden
-from django.shortcuts import get_object_or_404
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.utils.safestring import mark_safe
+from django.utils.text import slugify
 from django.utils.timezone import localtime, now
 from django.views.generic import CreateView, DetailView, ListView, UpdateView
+from django_ical.feedgenerator import ICal20Feed
 from django_ical.views import ICalFeed
+from icalendar import Calendar
 
 from accounts.models import UserCustom
 from common.breadcrumbs.breadcrumbs import Breadcrumb, BreadcrumbsMixin
@@ -19,13 +29,29 @@ from common.forms.views import (
 )
 from common.mixins import PermissionOrCreatedMixin
 
-from .forms import EventAttendanceForm, EventForm, EventKeyinfoEntryFormset
-from .models import Attendance, Event, EventAttendance
+from .forms import (
+    AttendanceStatisticsFilterForm,
+    EventAttendanceForm,
+    EventForm,
+    EventKeyinfoEntryFormset,
+)
+from .models import (
+    Attendance,
+    AttendanceStatistic,
+    Event,
+    EventAttendance,
+    semester_label,
+    semester_of,
+)
 
 
-def get_event_or_404(year, slug):
-    """Returns an Event if it exists, else raises a 404."""
-    return get_object_or_404(Event, start_time__year=year, slug=slug)
+def get_event_or_404(year, slug, queryset=None):
+    """Returns an Event from `queryset` if it exists, else raises a 404."""
+    return get_object_or_404(
+        queryset if queryset is not None else Event,
+        start_time__year=year,
+        slug=slug,
+    )
 
 
 def get_event_attendance_or_404(year, slug_event, slug_person):
@@ -48,31 +74,22 @@ class EventListYear(LoginRequiredMixin, BreadcrumbsMixin, ListView):
     def get_queryset(self):
         return (
             self.get_base_queryset()
-            .annotate(
-                start_month=TruncMonth("start_time"),
-                user_attending_status=EventAttendance.objects.filter(
-                    event=OuterRef("pk"), person=self.request.user
-                ).values("status"),
-            )
-            .select_related("category")
-            .prefetch_related("keyinfo_entries")
+            .for_list(self.request.user)
+            .annotate(start_month=TruncMonth("start_time"))
         )
 
-    def get_context_data(self, **kwargs):
-        context_data = super().get_context_data(**kwargs)
-        for event in context_data["events"]:
-            # Set attendance form on all events
-            event.attendance_form = self.get_attendance_form(event)
-
-        return context_data
-
-    def get_attendance_form(self, event):
+    def get_attendance_form_fields(self):
+        """
+        Returns the fields of the attendance form of each event as hidden inputs,
+        rendered once for all events, since they only differ in where they're posted.
+        """
         form = EventAttendanceForm(initial={"status": Attendance.ATTENDING})
-        form.helper.form_action = reverse(
-            "events:EventAttendanceCreateFromList",
-            args=[localtime(event.start_time).year, event.slug],
-        )
-        return form
+        return mark_safe("".join(field.as_hidden() for field in form.visible_fields()))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["attendance_form_fields"] = self.get_attendance_form_fields()
+        return context
 
     @classmethod
     def get_breadcrumb(cls, year, **kwargs):
@@ -116,7 +133,11 @@ class EventDetail(LoginRequiredMixin, BreadcrumbsMixin, DetailView):
     model = Event
 
     def get_object(self, queryset=None):
-        return get_event_or_404(self.kwargs.get("year"), self.kwargs.get("slug"))
+        return get_event_or_404(
+            self.kwargs.get("year"),
+            self.kwargs.get("slug"),
+            Event.objects.with_attendance_counts().prefetch_attendances(),
+        )
 
     def get_form_attendance(self):
         attendance = self.object.get_attendance(self.request.user)
@@ -148,6 +169,10 @@ class EventDetail(LoginRequiredMixin, BreadcrumbsMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["form_attendance"] = self.get_form_attendance()
+        context["attendances_by_status"] = self.object.attendances_by_status()
+        context[
+            "instrument_group_counts"
+        ] = self.object.attendances.instrument_group_counts()
         return context
 
     @classmethod
@@ -252,7 +277,9 @@ class EventAttendanceList(PermissionRequiredMixin, BreadcrumbsMixin, ListView):
     def get_event(self):
         if self.event is None:
             self.event = get_event_or_404(
-                self.kwargs.get("year"), self.kwargs.get("slug")
+                self.kwargs.get("year"),
+                self.kwargs.get("slug"),
+                Event.objects.with_attendance_counts(),
             )
         return self.event
 
@@ -260,7 +287,9 @@ class EventAttendanceList(PermissionRequiredMixin, BreadcrumbsMixin, ListView):
         return (
             self.get_event()
             .attendances.select_related(
-                "person__jacket", "person__instrument_type__group"
+                "person__jacket",
+                "person__instrument_type__group",
+                "instrument_type__group",
             )
             .order_by("-created")
         )
@@ -268,12 +297,102 @@ class EventAttendanceList(PermissionRequiredMixin, BreadcrumbsMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["event"] = self.get_event()
+        context[
+            "instrument_group_counts"
+        ] = self.get_event().attendances.instrument_group_counts()
         return context
 
     def get_breadcrumbs_kwargs(self) -> dict:
         return {"year": self.kwargs["year"], "event": self.get_event()}
 
 
+class AttendanceStatisticsReport(PermissionRequiredMixin, BreadcrumbsMixin, ListView):
+    """
+    View for viewing the number of events of a category
+    each person has attended in a semester, with their instrument group.
+    """
+
+    model = AttendanceStatistic
+    context_object_name = "statistics"
+    template_name = "events/attendance_statistics.html"
+    permission_required = "events.view_eventattendance"
+    breadcrumb_parent = EventList
+
+    form = None
+
+    def get_form(self):
+        if self.form is None:
+            self.form = AttendanceStatisticsFilterForm(
+                self.request.GET or {"semester": semester_of(now()).isoformat()}
+            )
+        return self.form
+
+    def get_queryset(self):
+        form = self.get_form()
+        if not form.is_valid():
+            return []
+
+        statistics = AttendanceStatistic.objects.filter(
+            semester=form.cleaned_data["semester"]
+        )
+        if form.cleaned_data["category"] is not None:
+            statistics = statistics.filter(category=form.cleaned_data["category"])
+        rows = list(
+            statistics.values("person", "instrument_group__name")
+            .annotate(
+                attending=Sum("num_attending"),
+                attending_maybe=Sum("num_attending_maybe"),
+                attending_not=Sum("num_attending_not"),
+            )
+            .order_by("-attending", "instrument_group__name")
+        )
+        people = UserCustom.objects.in_bulk({row["person"] for row in rows})
+        for row in rows:
+            row["person"] = people[row["person"]]
+        return rows
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["form"] = self.get_form()
+        return context
+
+    def get_breadcrumbs_kwargs(self):
+        return {"year": now().year}
+
+
+class AttendanceStatisticsCSV(AttendanceStatisticsReport):
+    """View for downloading attendance statistics as CSV."""
+
+    def get_filename(self):
+        form = self.get_form()
+        if not form.is_valid():
+            return "oppmote.csv"
+        semester = form.cleaned_data["semester"]
+        category = form.cleaned_data["category"]
+        return slugify(f"oppmote {semester_label(semester)} {category or ''}") + ".csv"
+
+    def render_to_response(self, context, **response_kwargs):
+        response = HttpResponse(content_type="text/csv; charset=utf-8")
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{self.get_filename()}"'
+        writer = csv.writer(response)
+        writer.writerow(
+            ["Namn", "Instrumentgruppe", "Deltek", "Deltek kanskje", "Deltek ikkje"]
+        )
+        for row in context["statistics"]:
+            writer.writerow(
+                [
+                    row["person"],
+                    row["instrument_group__name"] or "Ukjent",
+                    row["attending"],
+                    row["attending_maybe"],
+                    row["attending_not"],
+                ]
+            )
+        return response
+
+
 class EventAttendanceCreate(LoginRequiredMixin, SuccessMessageMixin, CreateView):
     """View for registering event attendance."""
 
@@ -298,7 +417,25 @@ class EventAttendanceCreate(LoginRequiredMixin, SuccessMessageMixin, CreateView)
 
 
 class EventAttendanceCreateFromList(EventAttendanceCreate):
-    """View for registering event attendance from EventList."""
+    """
+    View for registering event attendance from EventList.
+    Responds to htmx requests with only the event's updated card,
+    instead of redirecting to the list.
+    """
+
+    def form_valid(self, form):
+        if not self.request.headers.get("Hx-Request"):
+            return super().form_valid(form)
+
+        form.instance.person = self.request.user
+        form.instance.event = self.get_event()
+        self.object = form.save()
+        event = Event.objects.for_list(self.request.user).get(pk=self.object.event_id)
+        return render(
+            self.request,
+            "events/includes/event_list_card.html",
+            {"event": event},
+        )
 
     def get_success_url(self):
         return reverse("events:EventList")
@@ -368,27 +505,120 @@ class EventAttendanceDelete(
         return {"year": self.kwargs["year"], "event": self.object.event}
 
 
+class EventFeedGenerator(ICal20Feed):
+    """
+    Writes the serialized VEVENTs in `vevents` instead of serializing its items,
+    so that the VEVENT of each event can be cached and reused between feeds.
+    """
+
+    vevents = []
+
+    def serialize_items(self):
+        """Returns the serialized VEVENT of each item."""
+        calendar = Calendar()
+        self.write_items(calendar)
+        return [vevent.to_ical() for vevent in calendar.subcomponents]
+
+    def write(self, outfile, encoding):
+        self.items = []
+        calendar = BytesIO()
+        super().write(calendar, encoding)
+        start, end = calendar.getvalue().rsplit(b"END:VCALENDAR", 1)
+        outfile.write(start + b"".join(self.vevents) + b"END:VCALENDAR" + end)
+
+
 class EventFeed(ICalFeed):
+    """
+    Calendar feed of the events of the user with the token `token`.
+
+    Answers with `304 Not Modified` if no events in the feed have changed
+    since the calendar client last fetched it, going by its ETag,
+    and reuses the cached VEVENT of each event that hasn't changed since it was last serialized.
+    """
+
+    feed_type = EventFeedGenerator
     product_id = "-//(MYTAKTLAUSVEV_VARIABLE(domain))//kalender//NO-NN"
     timezone = settings.TIME_ZONE
     title = "(MYTAKTLAUSVEV_VARIABLE(appearance.events.feed.title))"
     description = "(MYTAKTLAUSVEV_VARIABLE(appearance.events.feed.description))"
+    vevent_timeout = 7 * 24 * 60 * 60
 
     def __call__(self, request, *args, **kwargs):
         token = request.GET.get("token", None)
-        if (
-            token is not None
-            and UserCustom.objects.filter(calendar_feed_token=token).exists()
-        ):
-            self.user = UserCustom.objects.only("calendar_feed_start_date").get(
-                calendar_feed_token=token
+        self.user = (
+            UserCustom.objects.only("calendar_feed_start_date", "date_joined")
+            .filter(calendar_feed_token=token)
+            .first()
+            if token is not None
+            else None
+        )
+        if self.user is None:
+            return HttpResponseForbidden()
+
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.render(request)
+        response["ETag"] = etag
+        return response
+
+    def start_date(self):
+        return self.user.calendar_feed_start_date or self.user.date_joined
+
+    def events(self):
+        return Event.objects.filter(start_time__gte=self.start_date())
+
+    def get_etag(self):
+        """
+        Returns the ETag of the feed,
+        from the newest modification and number of its events.
+        The number of events changes when events are deleted.
+
+        The feed has no Last-Modified header,
+        since the newest modification doesn't change when events are deleted.
+        """
+        version = self.events().aggregate(
+            last_modified=Max("modified"), count=Count("pk")
+        )
+        last_modified = version["last_modified"]
+        return quote_etag(
+            f"{self.start_date().isoformat()}"
+            f"-{last_modified.timestamp() if last_modified else 0}-{version['count']}"
+        )
+
+    def vevent_key(self, event):
+        return f"events:feed:vevent:{event.pk}:{event.modified.timestamp()}"
+
+    def render(self, request):
+        """Renders the feed, serializing only the events missing from the cache."""
+        events = {self.vevent_key(event): event for event in self.events()}
+        cached = cache.get_many(events.keys())
+        self.uncached_events = [
+            event for key, event in events.items() if key not in cached
+        ]
+
+        feedgen = self.get_feed(None, request)
+        serialized = dict(
+            zip(
+                [self.vevent_key(event) for event in self.uncached_events],
+                feedgen.serialize_items(),
             )
-            return super().__call__(request, *args, *kwargs)
-        return HttpResponseForbidden()
+        )
+        cache.set_many(serialized, self.vevent_timeout)
+        feedgen.vevents = [cached.get(key) or serialized[key] for key in events]
+
+        response = HttpResponse(content_type=feedgen.mime_type)
+        feedgen.write(response, "utf-8")
+        return response
 
     def items(self):
-        start_date = self.user.calendar_feed_start_date or self.user.date_joined
-        return Event.objects.filter(start_time__gte=start_date)
+        # Only the events missing from the cache are serialized by the feed generator
+        return self.uncached_events
+
+    def item_timestamp(self, item):
+        # The modification time rather than the current time,
+        # so that the serialized VEVENT can be cached
+        return item.modified
 
     def item_guid(self, item):
         return f"@(MYTAKTLAUSVEV_VARIABLE(domain)){item.get_absolute_url()}"
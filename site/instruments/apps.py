@@ -5,3 +5,6 @@ class InstrumentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "instruments"
     verbose_name = "instrument"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.core.cache import cache
 from django.db.models import (
     CASCADE,
     RESTRICT,
@@ -28,18 +29,58 @@ class InstrumentGroup(Model):
 
 
 class InstrumentTypeManager(Manager):
+    detection_cache_key = "instruments:detection"
+
+    def detection(self):
+        """
+        Returns a dict from the lowercase name of each instrument type
+        to the instrument type, with detection keywords and exceptions prefetched.
+
+        Cached, since it's used each time parts are detected.
+        The cache is cleared when instrument types, detection keywords
+        or detection exceptions are saved or deleted, see `instruments.signals`.
+        """
+        instrument_types = cache.get(self.detection_cache_key)
+        if instrument_types is None:
+            instrument_types = {}
+            for instrument_type in self.prefetch_related(
+                "detection_keywords", "detection_exceptions"
+            ):
+                instrument_types.setdefault(
+                    instrument_type.name.lower(), instrument_type
+                )
+            cache.set(self.detection_cache_key, instrument_types, None)
+        return instrument_types
+
+    def clear_detection_cache(self):
+        cache.delete(self.detection_cache_key)
+
+    def detected(self, name):
+        """
+        Returns the instrument type named `name`, ignoring case,
+        or the unknown instrument type if there is none.
+        """
+        instrument_types = self.detection()
+        return (
+            instrument_types.get(name.lower())
+            or instrument_types.get(InstrumentType.UNKNOWN_NAME.lower())
+            or InstrumentType.unknown()
+        )
+
     def sheatless_format(self):
         """Returns instrument types in a `Sheatless`-compatible format."""
         return {
             instrument_type.name: {
-                "include": instrument_type.detection_keywords.values_list(
-                    "keyword", flat=True
-                ),
-                "exceptions": instrument_type.detection_exceptions.values_list(
-                    "exception", flat=True
-                ),
+                "include": [
+                    keyword.keyword
+                    for keyword in instrument_type.detection_keywords.all()
+                ],
+                "exceptions": [
+                    exception.exception
+                    for exception in instrument_type.detection_exceptions.all()
+                ],
             }
-            for instrument_type in super().all()
+            for instrument_type in self.detection().values()
         }
 
 
@@ -62,11 +103,15 @@ class InstrumentType(Model):
         verbose_name_plural = "instrumenttyper"
         ordering = ["name"]
 
+    UNKNOWN_NAME = "Ukjend"
+
     @classmethod
     def unknown(cls):
-        group_unknown, created = InstrumentGroup.objects.get_or_create(name="Ukjend")
+        group_unknown, created = InstrumentGroup.objects.get_or_create(
+            name=cls.UNKNOWN_NAME
+        )
         type_unknown, created = InstrumentType.objects.get_or_create(
-            name="Ukjend", defaults={"group": group_unknown}
+            name=cls.UNKNOWN_NAME, defaults={"group": group_unknown}
         )
         return type_unknown
 
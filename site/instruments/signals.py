@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    InstrumentType,
+    InstrumentTypeDetectionException,
+    InstrumentTypeDetectionKeyword,
+)
+
+
+@receiver(post_save, sender=InstrumentType)
+@receiver(post_delete, sender=InstrumentType)
+@receiver(post_save, sender=InstrumentTypeDetectionKeyword)
+@receiver(post_delete, sender=InstrumentTypeDetectionKeyword)
+@receiver(post_save, sender=InstrumentTypeDetectionException)
+@receiver(post_delete, sender=InstrumentTypeDetectionException)
+def clear_detection_cache(sender, **kwargs):
+    InstrumentType.objects.clear_detection_cache()
@@ -70,6 +70,90 @@ class InstrumentTypeTestSuite(TestMixin, TestCase):
         self.assertEqual(unknown, InstrumentType.unknown())
         self.assertEqual(InstrumentType.objects.count(), 2)
 
+    def test_sheatless_format(self):
+        """Should return keywords and exceptions of each instrument type."""
+        InstrumentTypeFactory(
+            name="Tuba",
+            detection_keywords=["Tuba", "Bass"],
+            detection_exceptions=["Kontrabass"],
+        )
+        self.assertEqual(
+            InstrumentType.objects.sheatless_format(),
+            {
+                self.instrument_type.name: {"include": [], "exceptions": []},
+                "Tuba": {"include": ["Bass", "Tuba"], "exceptions": ["Kontrabass"]},
+            },
+        )
+
+    def test_sheatless_format_cached(self):
+        """Should only query the database the first time."""
+        with self.assertNumQueries(3):
+            InstrumentType.objects.sheatless_format()
+        with self.assertNumQueries(0):
+            InstrumentType.objects.sheatless_format()
+
+    def test_detection_cache_cleared_on_instrument_type_change(self):
+        """Should clear the cache when instrument types are saved or deleted."""
+        InstrumentType.objects.detection()
+        tuba = InstrumentTypeFactory(name="Tuba")
+        self.assertIn("tuba", InstrumentType.objects.detection())
+        tuba.name = "Sousafon"
+        tuba.save()
+        self.assertIn("sousafon", InstrumentType.objects.detection())
+        tuba.delete()
+        self.assertNotIn("sousafon", InstrumentType.objects.detection())
+
+    def test_detection_cache_cleared_on_keyword_change(self):
+        """Should clear the cache when detection keywords are saved or deleted."""
+        InstrumentType.objects.detection()
+        keyword = InstrumentTypeDetectionKeywordFactory(
+            keyword="Tuba", instrument_type=self.instrument_type
+        )
+        self.assertEqual(
+            InstrumentType.objects.sheatless_format()[self.instrument_type.name],
+            {"include": ["Tuba"], "exceptions": []},
+        )
+        keyword.delete()
+        self.assertEqual(
+            InstrumentType.objects.sheatless_format()[self.instrument_type.name],
+            {"include": [], "exceptions": []},
+        )
+
+    def test_detection_cache_cleared_on_exception_change(self):
+        """Should clear the cache when detection exceptions are saved or deleted."""
+        InstrumentType.objects.detection()
+        exception = InstrumentTypeDetectionExceptionFactory(
+            exception="Bass", instrument_type=self.instrument_type
+        )
+        self.assertEqual(
+            InstrumentType.objects.sheatless_format()[self.instrument_type.name],
+            {"include": [], "exceptions": ["Bass"]},
+        )
+        exception.delete()
+        self.assertEqual(
+            InstrumentType.objects.sheatless_format()[self.instrument_type.name],
+            {"include": [], "exceptions": []},
+        )
+
+    def test_detected_ignores_case(self):
+        """Should find instrument types by name, ignoring case."""
+        tuba = InstrumentTypeFactory(name="Tuba")
+        self.assertEqual(InstrumentType.objects.detected("TUBA"), tuba)
+
+    def test_detected_unknown(self):
+        """Should return the unknown instrument type if none is named `name`."""
+        self.assertEqual(
+            InstrumentType.objects.detected("Theremin"), InstrumentType.unknown()
+        )
+
+    def test_detected_cached(self):
+        """Should not query the database for instrument types that have been cached."""
+        InstrumentType.unknown()
+        InstrumentType.objects.detection()
+        with self.assertNumQueries(0):
+            InstrumentType.objects.detected(self.instrument_type.name)
+            InstrumentType.objects.detected("Theremin")
+
 
 class InstrumentTypeDetectionKeywordTestSuite(TestMixin, TestCase):
     def setUp(self):
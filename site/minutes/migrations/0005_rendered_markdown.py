@@ -0,0 +1,20 @@
+# Generated by Django 4.1 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("minutes", "0004_alter_minutes_created_by_alter_minutes_modified_by"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="minutes",
+            name="markdown_html",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="markdown som HTML"
+            ),
+        ),
+    ]
@@ -5,3 +5,6 @@ class NavbarConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "navbar"
     verbose_name = "navigasjonsline"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,4 +1,8 @@
+from hashlib import sha256
+from uuid import uuid4
+
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from django.db.models import (
     CASCADE,
     SET_NULL,
@@ -6,13 +10,87 @@ from django.db.models import (
     CharField,
     FloatField,
     ForeignKey,
+    Manager,
     Model,
     TextChoices,
     UniqueConstraint,
 )
 
 
+class NavbarItemManager(Manager):
+    cache_key = "navbar:tree"
+
+    def tree(self):
+        """
+        Returns a dict with
+        - `items` - the top-level navbar items, with sub-items and permission requirements prefetched
+        - `permissions` - the permission strings required by any navbar item
+        - `version` - a random string identifying this version of the navbar
+
+        Cached, since the navbar is on every page.
+        The cache is cleared when navbar items or permission requirements
+        are saved or deleted, see `navbar.signals`.
+        """
+        tree = cache.get(self.cache_key)
+        if tree is None:
+            items = list(
+                self.filter(parent=None).prefetch_related(
+                    "permission_requirements__permission__content_type",
+                    "children__permission_requirements__permission__content_type",
+                )
+            )
+            permissions = set()
+            for item in items:
+                permissions.update(item.required_permissions())
+                for sub_item in item.sub_items():
+                    permissions.update(sub_item.required_permissions())
+            tree = {
+                "items": items,
+                "permissions": sorted(permissions),
+                "version": uuid4().hex,
+            }
+            cache.set(self.cache_key, tree, None)
+        return tree
+
+    def clear_cache(self):
+        cache.delete(self.cache_key)
+
+    def permitted(self, user):
+        """
+        Returns the top-level navbar items `user` is permitted to access,
+        each with the permitted sub-items as `permitted_sub_items`.
+
+        Memoized for each combination of being logged in and
+        having the permissions required by navbar items,
+        since most users share such a combination.
+        """
+        tree = self.tree()
+        permissions = [
+            permission
+            for permission in tree["permissions"]
+            if user.has_perm(permission)
+        ]
+        key = "navbar:permitted:{}:{}:{}".format(
+            tree["version"],
+            int(user.is_authenticated),
+            sha256(",".join(permissions).encode()).hexdigest(),
+        )
+        items = cache.get(key)
+        if items is None:
+            items = [item for item in tree["items"] if item.permitted(user)]
+            for item in items:
+                item.permitted_sub_items = [
+                    sub_item
+                    for sub_item in item.sub_items()
+                    if sub_item.permitted(user)
+                ]
+            cache.set(key, items, None)
+        return items
+
+
 class NavbarItem(Model):
+    objects = NavbarItemManager()
+
     text = CharField(verbose_name="tekst", max_length=255)
     link = CharField(verbose_name="lenkjepeikar", max_length=255, blank=True)
     order = FloatField(verbose_name="rekkjefølgje", default=0)
@@ -54,6 +132,13 @@ class NavbarItem(Model):
             case _:
                 return False
 
+    def required_permissions(self):
+        """Returns the permission strings required to access this navbar item."""
+        return [
+            f"{requirement.permission.content_type.app_label}.{requirement.permission.codename}"
+            for requirement in self.permission_requirements.all()
+        ]
+
     def permitted(self, user):
         """
         Returns `True` if `user` is permitted to access this navbar item and `False` if not.
@@ -62,13 +147,8 @@ class NavbarItem(Model):
         """
         if self.requires_login and not user.is_authenticated:
             return False
-        for permission_requirement in self.permission_requirements.all():
-            permission = permission_requirement.permission
-            permission_string = (
-                f"{permission.content_type.app_label}.{permission.codename}"
-            )
-            if not user.has_perm(permission_string):
-                return False
+        if not user.has_perms(self.required_permissions()):
+            return False
         return self.type == NavbarItem.Type.LINK or any(
             subitem.permitted(user) for subitem in self.sub_items()
         )
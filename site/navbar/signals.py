@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import NavbarItem, NavbarItemPermissionRequirement
+
+
+@receiver(post_save, sender=NavbarItem)
+@receiver(post_delete, sender=NavbarItem)
+@receiver(post_save, sender=NavbarItemPermissionRequirement)
+@receiver(post_delete, sender=NavbarItemPermissionRequirement)
+def clear_cache(sender, **kwargs):
+    NavbarItem.objects.clear_cache()
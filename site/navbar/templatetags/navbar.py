@@ -17,17 +17,12 @@ def get_navbar_items(user, request_path):
     - `sub_items_annotated` - a list of subitems, annotated with:
         - `is_active`
     """
-    queryset = NavbarItem.objects.filter(parent=None).prefetch_related(
-        "permission_requirements", "children__permission_requirements"
-    )
-    items = list(filter(lambda item: item.permitted(user), queryset))
+    items = NavbarItem.objects.permitted(user)
     for item in items:
         item.is_active = item.active(request_path)
         item.is_dropdown = item.type == NavbarItem.Type.DROPDOWN
         item.href = "#" if item.is_dropdown else item.link
-        item.sub_items_annotated = list(
-            filter(lambda item: item.permitted(user), item.sub_items())
-        )
+        item.sub_items_annotated = item.permitted_sub_items
         for sub_item in item.sub_items_annotated:
             sub_item.is_active = sub_item.active(request_path)
     return items
@@ -222,3 +222,31 @@ class GetNavbarItemsTestSuite(TestMixin, TestCase):
             href="/krev/løyve/",
             sub_items_annotated_len=0,
         )
+
+    def test_no_queries_when_cached(self):
+        """Should not query the database when the navbar is cached."""
+        user = SuperUserFactory()
+        get_navbar_items(user, "/")
+        with self.assertNumQueries(0):
+            get_navbar_items(user, "/")
+            get_navbar_items(AnonymousUser(), "/")
+
+    def test_cached_per_permissions(self):
+        """Users with different permissions should get different navbar items."""
+        self.assertEqual(len(get_navbar_items(SuperUserFactory(), "/")), 4)
+        self.assertEqual(len(get_navbar_items(UserFactory(), "/")), 3)
+        self.assertEqual(len(get_navbar_items(AnonymousUser(), "/")), 2)
+
+    def test_cache_cleared_on_save(self):
+        """Should return updated navbar items after saving."""
+        get_navbar_items(AnonymousUser(), "/")
+        self.normal.text = "Endra"
+        self.normal.save()
+        navbar_items = get_navbar_items(AnonymousUser(), "/")
+        self.assertEqual(navbar_items[0].text, "Endra")
+
+    def test_cache_cleared_on_permission_requirement_change(self):
+        """Should return updated navbar items after adding permission requirements."""
+        get_navbar_items(UserFactory(), "/")
+        NavbarItemPermissionRequirementFactory(navbar_item=self.requires_login)
+        self.assertEqual(len(get_navbar_items(UserFactory(), "/")), 2)
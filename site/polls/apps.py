@@ -8,6 +8,8 @@ class PollsConfig(AppConfig):
     verbose_name = "avstemmingar"
 
     def ready(self):
+        from . import signals  # noqa: F401
+
         search.register(
             self.get_model("Poll"),
             fields=("question",),
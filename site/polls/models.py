@@ -1,6 +1,7 @@
 import pgtrigger
 from autoslug import AutoSlugField
 from django.conf import settings
+from django.core.cache import cache
 from django.db.models import (
     CASCADE,
     BooleanField,
@@ -9,6 +10,7 @@ from django.db.models import (
     DateTimeField,
     FloatField,
     ForeignKey,
+    Manager,
     Model,
     TextChoices,
 )
@@ -23,6 +25,30 @@ class PollType(TextChoices):
     MULTIPLE_CHOICE = "MULTIPLE_CHOICE", "Fleirval"
 
 
+class PollManager(Manager):
+    def cache_key(self, public_only):
+        return f"polls:latest:{int(public_only)}"
+
+    def latest_cached(self, public_only=False):
+        """
+        Returns the latest poll, or the latest public poll if `public_only`,
+        or `None` if there are no such polls.
+
+        Cached, since it's shown in the sidebar on every page.
+        The cache is cleared when polls are saved or deleted, see `polls.signals`.
+        """
+        # Wrapped in a tuple to cache `None` when there are no polls
+        cached = cache.get(self.cache_key(public_only))
+        if cached is None:
+            polls = self.filter(public=True) if public_only else self.all()
+            cached = (polls.order_by("-created").first(),)
+            cache.set(self.cache_key(public_only), cached, None)
+        return cached[0]
+
+    def clear_cache(self):
+        cache.delete_many([self.cache_key(True), self.cache_key(False)])
+
+
 # Restricts changing a poll's type since that would invalidate votes.
 @pgtrigger.register(
     pgtrigger.Protect(
@@ -32,6 +58,8 @@ class PollType(TextChoices):
     )
 )
 class Poll(CreatedModifiedMixin):
+    objects = PollManager()
+
     question = CharField("spørsmål", max_length=255)
     slug = AutoSlugField(
         verbose_name="lenkjenamn",
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Poll
+
+
+@receiver(post_save, sender=Poll)
+@receiver(post_delete, sender=Poll)
+def clear_cache(sender, **kwargs):
+    Poll.objects.clear_cache()
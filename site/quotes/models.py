@@ -3,13 +3,16 @@
 from django.conf import settings
 from django.db.models import CharField, ManyToManyField, TextField
 
+from common.markdown.models import RenderedMarkdownMixin
 from common.models import CreatedModifiedMixin
 from common.utils import comma_seperate_list
 
 
-class Quote(CreatedModifiedMixin):
+class Quote(RenderedMarkdownMixin, CreatedModifiedMixin):
     """Model representing a single quote"""
 
+    markdown_field = "quote"
+
     quote = TextField("sitat")
     quoted_as = CharField(
         "sitert som (med eventuell kontekst)", max_length=255, blank=True
@@ -1,5 +1,3 @@
-from io import BytesIO
-
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
 from django.forms import (
@@ -12,12 +10,11 @@ from django.forms import (
     formset_factory,
 )
 from django.urls import reverse
-from pypdf import PdfReader, PdfWriter
 
 from common.forms.widgets import AutocompleteSelectMultiple
 from sheetmusic.models import Part, Score
 
-from .models import Repertoire
+from .models import Repertoire, RepertoirePdfFile
 
 
 class RepertoireForm(ModelForm):
@@ -90,17 +87,17 @@ class RepertoirePdfFormsetHelper(FormHelper):
 
 
 def RepertoirePdfFormset_save(self):
-    pdf_writer = PdfWriter()
-    for form in self:
-        part = form.cleaned_data["part"]
-        if part is None:
-            continue
-        for _ in range(form.cleaned_data["amount"]):
-            pdf_writer.append_pages_from_reader(PdfReader(part.pdf_file()))
-    output_stream = BytesIO()
-    pdf_writer.write(output_stream)
-    output_stream.seek(0)
-    return output_stream
+    """
+    Returns the `RepertoirePdfFile` for the chosen parts and amounts,
+    which is built in the background if it hasn't been built already.
+    """
+    return RepertoirePdfFile.objects.get_or_build(
+        [
+            (form.cleaned_data["part"], form.cleaned_data["amount"])
+            for form in self
+            if form.cleaned_data["part"] is not None
+        ]
+    )
 
 
 RepertoirePdfFormset = formset_factory(form=RepertoirePdfForm, extra=0)
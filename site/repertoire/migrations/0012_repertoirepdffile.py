@@ -0,0 +1,47 @@
+# Generated by Django 4.1 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repertoire", "0011_alter_repertoire_active_until"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RepertoirePdfFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(max_length=64, unique=True, verbose_name="nykel"),
+                ),
+                ("parts", models.JSONField(default=list, verbose_name="stemmer")),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True, upload_to="repertoire/pdfs/", verbose_name="fil"
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(auto_now_add=True, verbose_name="laga"),
+                ),
+            ],
+            options={
+                "verbose_name": "repertoar-pdf",
+                "verbose_name_plural": "repertoar-pdfar",
+                "ordering": ["-created"],
+            },
+        ),
+    ]
@@ -1,10 +1,16 @@
-from io import BytesIO
+import json
+from hashlib import sha256
 
 from autoslug import AutoSlugField
+from django.contrib.contenttypes.fields import GenericRelation
+from django.core.files.base import ContentFile
 from django.db.models import (
     CharField,
     DateField,
+    DateTimeField,
+    FileField,
     FloatField,
+    JSONField,
     Manager,
     ManyToManyField,
     Model,
@@ -13,10 +19,10 @@ from django.db.models.query_utils import Q
 from django.urls import reverse
 from django.utils.text import get_valid_filename
 from django.utils.timezone import localdate, now
-from pypdf import PdfReader, PdfWriter
 
+from common.jobs.models import Job
 from common.models import CreatedModifiedMixin
-from sheetmusic.models import Part, Score
+from sheetmusic.models import Part, Score, parts_pdf_file
 
 
 class RepertoireManager(Manager):
@@ -72,26 +78,20 @@ class Repertoire(CreatedModifiedMixin, Model):
         return self.active_until is None or self.active_until >= now().date()
 
     def favorite_parts_pdf_file(self, user):
-        """Returns a PDF containing the user's favorite parts for the scores in this repertoire."""
-        parts = Part.objects.filter(
-            favoring_users__user=user, pdf__score__repertoires=self
+        """
+        Returns a PDF containing the user's favorite parts for the scores in this repertoire,
+        ordered like the scores.
+        """
+        parts = list(
+            Part.objects.filter(favoring_users__user=user, pdf__score__repertoires=self)
+            .select_related("pdf")
+            .order_by("pdf__score", *Part._meta.ordering)
         )
-        if not parts.exists():
+        if not parts:
             raise Exception(
                 f"Fann inga favorittstemmer for {user} i repertoaret {self}"
             )
-        pdf_writer = PdfWriter()
-        for score in self.scores.all():
-            try:
-                pdf_writer.append_pages_from_reader(
-                    PdfReader(score.favorite_parts_pdf_file(user))
-                )
-            except:
-                pass
-        output_stream = BytesIO()
-        pdf_writer.write(output_stream)
-        output_stream.seek(0)
-        return output_stream
+        return parts_pdf_file(parts)
 
     def favorite_parts_pdf_filename(self, user):
         """Returns a nice filename for the PDF that contains the user's favorite parts for this repertoire."""
@@ -99,3 +99,80 @@ class Repertoire(CreatedModifiedMixin, Model):
 
     def get_absolute_url(self):
         return reverse("repertoire:RepertoireDetail", args=[self.slug])
+
+
+class RepertoirePdfFileManager(Manager):
+    def get_or_build(self, parts_with_amounts):
+        """
+        Returns the `RepertoirePdfFile` for `parts_with_amounts`,
+        a list of `(part, amount)` tuples with `pdf` selected related.
+        Queues a job to build it, unless it's built or being built already.
+        """
+        parts_with_amounts = [
+            (part, amount) for part, amount in parts_with_amounts if amount > 0
+        ]
+        # The key changes whenever the pages of a part change,
+        # so that outdated PDFs are never served
+        key = sha256(
+            json.dumps(
+                [
+                    [part.pdf.get_file_hash(), part.from_page, part.to_page, amount]
+                    for part, amount in parts_with_amounts
+                ]
+            ).encode()
+        ).hexdigest()
+        repertoire_pdf_file, created = self.get_or_create(
+            key=key,
+            defaults={
+                "parts": [[part.pk, amount] for part, amount in parts_with_amounts]
+            },
+        )
+        if (
+            not repertoire_pdf_file.file
+            and not repertoire_pdf_file.jobs.pending().exists()
+        ):
+            Job.objects.enqueue(repertoire_pdf_file, "build")
+        return repertoire_pdf_file
+
+
+class RepertoirePdfFile(Model):
+    """
+    Model representing a PDF generated for a repertoire,
+    containing a number of copies of a chosen part for each score.
+    Built by a background job, and stored so that it can be served again.
+    """
+
+    objects = RepertoirePdfFileManager()
+
+    key = CharField("nykel", max_length=64, unique=True)
+    # A list of `[part_pk, amount]` pairs
+    parts = JSONField("stemmer", default=list)
+    file = FileField("fil", upload_to="repertoire/pdfs/", blank=True)
+    jobs = GenericRelation(
+        Job, object_id_field="object_pk", related_query_name="repertoire_pdf_file"
+    )
+    created = DateTimeField("laga", auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created"]
+        verbose_name = "repertoar-pdf"
+        verbose_name_plural = "repertoar-pdfar"
+
+    def __str__(self):
+        return self.key
+
+    def build(self, job=None):
+        """Builds and stores the PDF. Usually run as a background job, which `job` is."""
+        parts = Part.objects.select_related("pdf").in_bulk(
+            [part_pk for part_pk, _ in self.parts]
+        )
+        pdf_file = parts_pdf_file(
+            [
+                parts[part_pk]
+                for part_pk, amount in self.parts
+                if part_pk in parts
+                for _ in range(amount)
+            ],
+            on_progress=job.set_progress if job is not None else None,
+        )
+        self.file.save(f"{self.key}.pdf", ContentFile(pdf_file.getvalue()))
@@ -1,19 +1,26 @@
 from datetime import timedelta
+from http import HTTPStatus
 from io import BytesIO
+from unittest.mock import patch
 
+from django.conf import settings
 from django.test import TestCase
 from django.urls import reverse
+from django.utils.encoding import escape_uri_path
 from django.utils.timezone import now
 from pypdf import PdfReader
 
 from accounts.factories import SuperUserFactory, UserFactory
+from common.jobs.factories import JobFactory
+from common.jobs.models import Job
 from common.mixins import TestMixin
-from common.test_utils import create_formset_post_data
-from sheetmusic.factories import FavoritePartFactory, ScoreFactory
+from common.test_utils import create_formset_post_data, test_pdf_multipage
+from sheetmusic.factories import FavoritePartFactory, PartFactory, ScoreFactory
+from sheetmusic.models import parts_pdf_file
 
 from .factories import RepertoireFactory
 from .forms import RepertoirePdfFormset
-from .models import Repertoire
+from .models import Repertoire, RepertoirePdfFile
 
 
 class RepertoireManagerTestSuite(TestMixin, TestCase):
@@ -59,6 +66,32 @@ class RepertoireTestSuite(TestMixin, TestCase):
         pdf_file = self.repertoire.favorite_parts_pdf_file(self.user)
         self.assertEqual(type(pdf_file), BytesIO)
 
+    def test_pdf_file_ordered_by_score(self):
+        """Should contain the favorite parts in the order of the scores."""
+        score_b = ScoreFactory(title="B")
+        score_a = ScoreFactory(title="A")
+        self.repertoire.scores.add(score_b, score_a)
+        for score in [score_b, score_a]:
+            FavoritePartFactory(part__pdf__score=score, user=self.user)
+        with patch(
+            "repertoire.models.parts_pdf_file", wraps=parts_pdf_file
+        ) as mock_parts_pdf_file:
+            pdf_reader = PdfReader(self.repertoire.favorite_parts_pdf_file(self.user))
+        self.assertEqual(len(pdf_reader.pages), 3)
+        (parts,), _ = mock_parts_pdf_file.call_args
+        self.assertEqual(
+            [part.pdf.score for part in parts], [score_a, score_b, self.score]
+        )
+
+    def test_pdf_file_single_query(self):
+        """Should fetch all favorite parts, and their PDFs, in a single query."""
+        for _ in range(3):
+            score = ScoreFactory()
+            self.repertoire.scores.add(score)
+            FavoritePartFactory(part__pdf__score=score, user=self.user)
+        with self.assertNumQueries(1):
+            self.repertoire.favorite_parts_pdf_file(self.user)
+
     def test_pdf_filename(self):
         pdf_filename = self.repertoire.favorite_parts_pdf_filename(self.user)
         self.assertEqual(pdf_filename, "Marsjhefte_Leiar.pdf")
@@ -238,9 +271,152 @@ class RepertoirePdfTestSuite(TestMixin, TestCase):
     def test_requires_login(self):
         self.assertLoginRequired(self.get_url())
 
-    def test_post(self):
+    def test_post_redirects_to_download(self):
+        """Should redirect to the download of the PDF."""
         self.client.force_login(self.user)
         response = self.client.post(self.get_url(), self.create_post_data())
+        repertoire_pdf_file = RepertoirePdfFile.objects.get()
+        self.assertRedirects(
+            response,
+            reverse(
+                "repertoire:RepertoirePdfDownload",
+                args=[self.repertoire.slug, repertoire_pdf_file.key],
+            ),
+            fetch_redirect_response=False,
+        )
+
+    def test_post_builds_pdf_in_background(self):
+        """Should queue a job that builds the PDF."""
+        self.client.force_login(self.user)
+        self.client.post(self.get_url(), self.create_post_data())
+        repertoire_pdf_file = RepertoirePdfFile.objects.get()
+        self.assertFalse(repertoire_pdf_file.file)
+
+        Job.objects.get().run()
+        repertoire_pdf_file.refresh_from_db()
+        with repertoire_pdf_file.file.open() as file:
+            pdf_reader = PdfReader(file)
+            self.assertEqual(len(pdf_reader.pages), 3)
+
+    def test_post_reuses_built_pdf(self):
+        """Should not build the PDF again for the same parts and amounts."""
+        self.client.force_login(self.user)
+        self.client.post(self.get_url(), self.create_post_data())
+        self.client.post(self.get_url(), self.create_post_data())
+        self.assertEqual(RepertoirePdfFile.objects.count(), 1)
+        self.assertEqual(Job.objects.count(), 1)
+
+        Job.objects.get().run()
+        self.client.post(self.get_url(), self.create_post_data())
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_post_new_pdf_for_different_amounts(self):
+        """Should build a new PDF if the amounts are different."""
+        self.client.force_login(self.user)
+        self.client.post(self.get_url(), self.create_post_data())
+        self.amounts = [2, 2]
+        self.client.post(self.get_url(), self.create_post_data())
+        self.assertEqual(RepertoirePdfFile.objects.count(), 2)
+
+
+class RepertoirePdfFileTestSuite(TestMixin, TestCase):
+    def setUp(self):
+        self.parts = [
+            PartFactory(pdf__file=test_pdf_multipage(["1", "2", "3"]), to_page=2),
+            PartFactory(
+                pdf__file=test_pdf_multipage(["1", "2"]), from_page=2, to_page=2
+            ),
+        ]
+
+    def test_key_changes_with_pages(self):
+        """Should build a new PDF if the pages of a part change."""
+        repertoire_pdf_file = RepertoirePdfFile.objects.get_or_build(
+            [(self.parts[0], 1)]
+        )
+        self.parts[0].to_page = 3
+        self.parts[0].save()
+        self.assertNotEqual(
+            RepertoirePdfFile.objects.get_or_build([(self.parts[0], 1)]),
+            repertoire_pdf_file,
+        )
+
+    def test_build(self):
+        """Should contain the pages of each part `amount` times, in order."""
+        repertoire_pdf_file = RepertoirePdfFile.objects.get_or_build(
+            [(self.parts[0], 2), (self.parts[1], 0), (self.parts[1], 1)]
+        )
+        repertoire_pdf_file.build()
+        with repertoire_pdf_file.file.open() as file:
+            self.assertEqual(len(PdfReader(file).pages), 5)
+
+    def test_build_parses_each_pdf_once(self):
+        """Should parse each original PDF once, no matter the amount."""
+        repertoire_pdf_file = RepertoirePdfFile.objects.get_or_build(
+            [(self.parts[0], 3), (self.parts[1], 3)]
+        )
+        with patch("sheetmusic.models.PdfReader", wraps=PdfReader) as pdf_reader:
+            repertoire_pdf_file.build()
+        self.assertEqual(pdf_reader.call_count, 2)
+
+    def test_build_reports_progress(self):
+        job = JobFactory()
+        repertoire_pdf_file = RepertoirePdfFile.objects.get_or_build(
+            [(self.parts[0], 1), (self.parts[1], 1)]
+        )
+        with patch.object(job, "set_progress") as set_progress:
+            repertoire_pdf_file.build(job=job)
+        self.assertEqual(
+            [call.args for call in set_progress.call_args_list], [(0.5,), (1.0,)]
+        )
+
+
+class RepertoirePdfDownloadTestSuite(TestMixin, TestCase):
+    def setUp(self):
+        self.repertoire = RepertoireFactory()
+        self.repertoire_pdf_file = RepertoirePdfFile.objects.get_or_build(
+            [(PartFactory(), 1)]
+        )
+
+    def get_url(self):
+        return reverse(
+            "repertoire:RepertoirePdfDownload",
+            args=[self.repertoire.slug, self.repertoire_pdf_file.key],
+        )
+
+    def test_requires_login(self):
+        self.assertLoginRequired(self.get_url())
+
+    def test_shows_progress_while_building(self):
+        self.client.force_login(UserFactory())
+        response = self.client.get(self.get_url())
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context["job"], Job.objects.get())
+        self.assertContains(response, "window.location.reload")
+
+    def test_serves_pdf_when_built(self):
+        Job.objects.get().run()
+        self.repertoire_pdf_file.refresh_from_db()
+        user = UserFactory()
+        self.client.force_login(user)
+        response = self.client.get(self.get_url())
         self.assertEqual(response["content-type"], "application/pdf")
-        pdf_reader = PdfReader(BytesIO(response.getvalue()))
-        self.assertEqual(len(pdf_reader.pages), 3)
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            escape_uri_path(
+                f"{settings.MEDIA_URL_NGINX}{self.repertoire_pdf_file.file.name}"
+            ),
+        )
+        self.assertIn(
+            self.repertoire.favorite_parts_pdf_filename(user),
+            response["Content-Disposition"],
+        )
+
+    def test_404_for_unknown_key(self):
+        self.client.force_login(UserFactory())
+        response = self.client.get(
+            reverse(
+                "repertoire:RepertoirePdfDownload",
+                args=[self.repertoire.slug, "ukjend"],
+            )
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -7,6 +7,7 @@ from .views import (
     RepertoireDelete,
     RepertoireDetail,
     RepertoirePdf,
+    RepertoirePdfDownload,
     RepertoireUpdate,
 )
 
@@ -21,4 +22,9 @@ urlpatterns = [
     path("<slug:slug>/endre/", RepertoireUpdate.as_view(), name="RepertoireUpdate"),
     path("<slug:slug>/slett/", RepertoireDelete.as_view(), name="RepertoireDelete"),
     path("<slug:slug>/pdf/", RepertoirePdf.as_view(), name="RepertoirePdf"),
+    path(
+        "<slug:slug>/pdf/<str:key>/",
+        RepertoirePdfDownload.as_view(),
+        name="RepertoirePdfDownload",
+    ),
 ]
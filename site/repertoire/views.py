@@ -1,16 +1,18 @@
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.db.models import F, Prefetch
-from django.http import FileResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView, DetailView, FormView, ListView, UpdateView
+from django.views.generic.base import TemplateResponseMixin
 from django.views.generic.detail import SingleObjectMixin
 
 from common.breadcrumbs.breadcrumbs import Breadcrumb, BreadcrumbsMixin
 from common.forms.views import DeleteViewCustom
+from serve_media_files.views import ServeMediaFiles
 from sheetmusic.models import Part, Score
 
 from .forms import RepertoireForm, RepertoirePdfFormset
-from .models import Repertoire
+from .models import Repertoire, RepertoirePdfFile
 
 
 class ActiveRepertoires(LoginRequiredMixin, BreadcrumbsMixin, ListView):
@@ -138,15 +140,17 @@ class RepertoirePdf(LoginRequiredMixin, BreadcrumbsMixin, SingleObjectMixin, For
         initial = self.get_initial()
         for i, form in enumerate(formset.forms):
             score = initial[i]["score"]
-            form.fields["part"].queryset = Part.objects.filter(pdf__score=score)
+            form.fields["part"].queryset = Part.objects.filter(
+                pdf__score=score
+            ).select_related("pdf")
         return formset
 
     def form_valid(self, form):
-        output_stream = form.save()
-        return FileResponse(
-            output_stream,
-            content_type="application/pdf",
-            filename=self.object.favorite_parts_pdf_filename(self.request.user),
+        repertoire_pdf_file = form.save()
+        return redirect(
+            "repertoire:RepertoirePdfDownload",
+            self.object.slug,
+            repertoire_pdf_file.key,
         )
 
     def get_context_data(self, **kwargs):
@@ -163,3 +167,43 @@ class RepertoirePdf(LoginRequiredMixin, BreadcrumbsMixin, SingleObjectMixin, For
 
     def get_breadcrumbs_kwargs(self):
         return {"repertoire": self.object}
+
+
+class RepertoirePdfDownload(
+    LoginRequiredMixin,
+    BreadcrumbsMixin,
+    SingleObjectMixin,
+    TemplateResponseMixin,
+    ServeMediaFiles,
+):
+    """
+    Serves a PDF generated by `RepertoirePdf` when it has been built.
+    Until then, shows the progress of building it.
+    """
+
+    model = Repertoire
+    template_name = "repertoire/repertoire_pdf_download.html"
+    content_type = "application/pdf"
+    breadcrumb_parent = RepertoireDetail
+
+    def get_file_path(self):
+        return self.repertoire_pdf_file.file.name
+
+    def get_file_name(self, file_path):
+        return self.object.favorite_parts_pdf_filename(self.request.user)
+
+    def get_breadcrumbs_kwargs(self):
+        return {"repertoire": self.object}
+
+    def get_context_data(self, **kwargs):
+        kwargs["job"] = self.repertoire_pdf_file.jobs.first()
+        return super().get_context_data(**kwargs)
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        self.repertoire_pdf_file = get_object_or_404(
+            RepertoirePdfFile, key=self.kwargs["key"]
+        )
+        if self.repertoire_pdf_file.file:
+            return super().get(request, *args, **kwargs)
+        return self.render_to_response(self.get_context_data())
@@ -1,11 +1,14 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core import exceptions
-from django.http.response import HttpResponse
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http.response import FileResponse, HttpResponse
 from django.utils.encoding import escape_uri_path
 from django.views import View
 from django.views.static import serve
 
+from common.utils import content_disposition
+
 
 class ServeMediaFiles(View):
     """
@@ -16,6 +19,8 @@ class ServeMediaFiles(View):
 
     http_method_names = ["get"]
     file_path = None
+    # Empty by default so that Nginx inserts it instead
+    content_type = ""
 
     def get_file_path(self):
         if self.file_path is None:
@@ -24,16 +29,27 @@ class ServeMediaFiles(View):
             )
         return self.file_path
 
+    def get_file_name(self, file_path):
+        """Returns the filename to put in the `Content-Disposition` header."""
+        return file_path.split("/")[-1]
+
     def serve_with_django(self, file_path):
         return serve(self.request, file_path, document_root=settings.MEDIA_ROOT)
 
+    def serve_with_storage(self, file_path):
+        """Streams the file from a storage that Nginx can't read from, like Azure."""
+        return FileResponse(
+            default_storage.open(file_path),
+            content_type=self.content_type or None,
+            filename=self.get_file_name(file_path),
+        )
+
     def serve_with_nginx(self, file_path):
-        file_name = file_path.split("/")[-1]
+        file_name = self.get_file_name(file_path)
         response = HttpResponse(
-            # Set content_type explicitly to "" so that Nginx inserts it instead
-            content_type="",
+            content_type=self.content_type,
             headers={
-                "Content-Disposition": f'inline; filename="{file_name}"',
+                "Content-Disposition": content_disposition(file_name),
                 "X-Accel-Redirect": escape_uri_path(
                     f"{settings.MEDIA_URL_NGINX}{file_path}"
                 ),
@@ -45,6 +61,8 @@ class ServeMediaFiles(View):
         file_path = self.get_file_path()
         if settings.DEBUG:
             return self.serve_with_django(file_path)
+        if not isinstance(default_storage, FileSystemStorage):
+            return self.serve_with_storage(file_path)
         return self.serve_with_nginx(file_path)
 
 
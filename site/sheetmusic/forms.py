@@ -1,5 +1,5 @@
 """Forms for the 'sheetmusic'-app"""
-import threading
+import os
 
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
@@ -13,11 +13,33 @@ from django.forms import (
     ValidationError,
     modelformset_factory,
 )
+from pypdf import PdfReader
 
 from common.forms.layouts import DynamicFormsetButton
 from common.forms.mixins import CleanAllFilesMixin
-
-from .models import EditFile, Part, Pdf, Score, pdf_file_validators
+from common.jobs.models import Job
+
+from .models import EditFile, Part, Pdf, Score, page_size, pdf_file_validators
+
+
+def validate_pdf_readable(file):
+    """
+    Raises a `ValidationError` if `file` can't be read as a PDF,
+    e.g. if it's truncated, corrupt or encrypted,
+    since the metadata of PDFs is read when they're saved.
+    """
+    if os.path.splitext(file.name)[1].lower() != ".pdf":
+        # Reported by `FileTypeValidator`
+        return
+    try:
+        pdf_reader = PdfReader(file, strict=False)
+        for page in pdf_reader.pages:
+            page_size(page)
+    except Exception as exception:
+        # pypdf raises many kinds of errors for malformed files
+        raise ValidationError(f"{file.name}: Kunne ikkje lese PDF-fila.") from exception
+    finally:
+        file.seek(0)
 
 
 class ScoreForm(ModelForm):
@@ -42,11 +64,36 @@ class ScoreForm(ModelForm):
         }
 
 
-class PartsUpdateForm(ModelForm):
+class PageRangeMixin:
+    """
+    Validates that the page range of a part is within its pdf.
+    Reads the number of pages of the pdf from the database, not the file.
+    """
+
+    def clean(self):
+        cleaned_data = super().clean()
+        from_page = cleaned_data.get("from_page")
+        to_page = cleaned_data.get("to_page")
+        pdf = cleaned_data.get(
+            "pdf", self.instance.pdf if self.instance.pdf_id else None
+        )
+        if from_page and to_page and from_page > to_page:
+            self.add_error("to_page", "Siste side kan ikkje vere før første side.")
+        if pdf and to_page and to_page > pdf.num_of_pages():
+            self.add_error("to_page", f"PDF-en har berre {pdf.num_of_pages()} sider.")
+        return cleaned_data
+
+
+class PartsUpdateForm(PageRangeMixin, ModelForm):
     """Form for editing a part for a given pdf"""
 
     helper = FormHelper()
 
+    def __init__(self, *args, pdf=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if pdf is not None:
+            self.instance.pdf = pdf
+
     class Meta:
         model = Part
         fields = ["from_page", "instrument_type", "part_number", "note", "to_page"]
@@ -78,7 +125,7 @@ PartsUpdateFormset = modelformset_factory(
 PartsUpdateFormset.helper = PartsUpdateFormsetHelper()
 
 
-class PartsUpdateAllForm(ModelForm):
+class PartsUpdateAllForm(PageRangeMixin, ModelForm):
     """Form for editing a part"""
 
     helper = FormHelper()
@@ -116,7 +163,7 @@ class UploadPdfForm(CleanAllFilesMixin, Form):
     files = FileField(
         widget=ClearableFileInput(attrs={"multiple": True}),
         label="Filer",
-        validators=pdf_file_validators,
+        validators=[*pdf_file_validators, validate_pdf_readable],
     )
     part_prediction = ChoiceField(
         choices=[
@@ -140,7 +187,7 @@ class UploadPdfForm(CleanAllFilesMixin, Form):
         """
         Saves the form
 
-        The sheatless processing is performed in another thread by default so that the
+        The sheatless processing is queued as a background job by default so that the
         view can return immediately. If it is desirable to complete the entire processing
         before the function returns this behavior can be overridden by setting plz_wait=True.
         This overrideability is very useful in the test framework.
@@ -154,10 +201,7 @@ class UploadPdfForm(CleanAllFilesMixin, Form):
                     if plz_wait:
                         pdf.find_parts_with_sheatless()
                     else:
-                        processPdfsThread = threading.Thread(
-                            target=pdf.find_parts_with_sheatless
-                        )
-                        processPdfsThread.start()
+                        Job.objects.enqueue(pdf, "find_parts_with_sheatless")
                 case "filename":
                     pdf.find_parts_from_original_filename()
                 case "none":
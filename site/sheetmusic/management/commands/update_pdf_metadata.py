@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from sheetmusic.models import Pdf
+
+
+class Command(BaseCommand):
+    help = (
+        "Stores the file hash, file size, page count and page sizes "
+        "of PDFs uploaded before they were stored on upload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Update all PDFs, not only those with missing metadata.",
+        )
+
+    def handle(self, all, **options):
+        pdfs = Pdf.objects.all()
+        if not all:
+            pdfs = pdfs.filter(Q(file_hash="") | Q(file_size=None) | Q(page_count=None))
+        num_of_pdfs = 0
+        for pdf in pdfs.iterator():
+            try:
+                pdf.update_file_metadata()
+            except Exception as exception:
+                self.stderr.write(f"{pdf.file.name}: {exception}")
+            else:
+                num_of_pdfs += 1
+        self.stdout.write(f"Updated metadata of {num_of_pdfs} PDFs.")
@@ -0,0 +1,20 @@
+# Generated by Django 4.1 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sheetmusic", "0007_alter_pdf_file_alter_score_sound_file_editfile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pdf",
+            name="file_hash",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, verbose_name="filhash"
+            ),
+        ),
+    ]
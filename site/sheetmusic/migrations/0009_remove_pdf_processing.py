@@ -0,0 +1,17 @@
+# Generated by Django 4.1 on 2026-10-18 11:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sheetmusic", "0008_pdf_file_hash"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="pdf",
+            name="processing",
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.1 on 2026-10-18 11:55
+
+from django.db import migrations
+
+import sheetmusic.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sheetmusic", "0009_remove_pdf_processing"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="part",
+            name="slug",
+            field=sheetmusic.models.PartSlugField(
+                always_update=True,
+                editable=True,
+                populate_from=sheetmusic.models.Part.__str__,
+                unique_with=("pdf__score__slug",),
+                verbose_name="lenkjenamn",
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.1 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sheetmusic", "0010_alter_part_slug"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pdf",
+            name="file_size",
+            field=models.PositiveBigIntegerField(
+                editable=False, null=True, verbose_name="filstorleik"
+            ),
+        ),
+        migrations.AddField(
+            model_name="pdf",
+            name="page_count",
+            field=models.PositiveIntegerField(
+                editable=False, null=True, verbose_name="sidetal"
+            ),
+        ),
+        migrations.AddField(
+            model_name="pdf",
+            name="page_sizes",
+            field=models.JSONField(
+                default=list, editable=False, verbose_name="sidestorleikar"
+            ),
+        ),
+    ]
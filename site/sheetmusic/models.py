@@ -2,14 +2,20 @@
 
 import io
 import os
-from zipfile import ZIP_DEFLATED, ZipFile
+from collections import defaultdict
+from contextlib import ExitStack
+from hashlib import sha256
 
 from autoslug import AutoSlugField
+from autoslug.utils import crop_slug
 from django.conf import settings
+from django.contrib.contenttypes.fields import GenericRelation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.validators import MinValueValidator
+from django.db import transaction
 from django.db.models import (
     CASCADE,
-    BooleanField,
     CharField,
     DateTimeField,
     Exists,
@@ -17,23 +23,61 @@ from django.db.models import (
     FileField,
     ForeignKey,
     IntegerField,
+    JSONField,
     Manager,
     Model,
     OuterRef,
+    PositiveBigIntegerField,
+    PositiveIntegerField,
     TextField,
     UniqueConstraint,
     URLField,
 )
 from django.urls import reverse
 from django.utils.text import get_valid_filename
-from pypdf import PdfMerger, PdfReader, PdfWriter
-from sheatless import PdfPredictor, predict_part_from_string
+from pypdf import PdfReader, PdfWriter
+from sheatless import predict_part_from_string
 
 from common.forms.validators import FileTypeValidator
+from common.jobs.models import Job
 from common.models import ArticleMixin
+from common.utils import stream_zip
 from instruments.models import InstrumentType
 from web.settings import TESSDATA_DIR
 
+from .part_detection import find_parts
+
+
+def parts_pdf_file(parts, on_progress=None):
+    """
+    Returns a PDF containing the pages of each part in `parts`, in order.
+    A part may occur several times in `parts`.
+
+    Each original PDF is opened and parsed only once,
+    no matter how many of `parts` that are from it,
+    and pages are copied directly from it to the result.
+    Make sure to `select_related("pdf")` on querysets of parts.
+
+    `on_progress` is called with the share of parts added after each part.
+    """
+    parts = list(parts)
+    pdf_readers = {}
+    pdf_writer = PdfWriter()
+    with ExitStack() as pdf_files:
+        for index, part in enumerate(parts):
+            if part.pdf_id not in pdf_readers:
+                pdf_file = pdf_files.enter_context(part.pdf.file.open())
+                pdf_readers[part.pdf_id] = PdfReader(pdf_file)
+            pdf_reader = pdf_readers[part.pdf_id]
+            for page_nr in range(part.from_page, part.to_page + 1):
+                pdf_writer.add_page(pdf_reader.pages[page_nr - 1])
+            if on_progress is not None:
+                on_progress((index + 1) / len(parts))
+        output_stream = io.BytesIO()
+        pdf_writer.write(output_stream)
+    output_stream.seek(0)
+    return output_stream
+
 
 class ScoreManager(Manager):
     def annotate_user_has_favorite_parts(self, user):
@@ -109,16 +153,12 @@ class Score(ArticleMixin):
 
     def favorite_parts_pdf_file(self, user):
         """Returns the PDF that contains user's favorite parts on this score"""
-        parts = Part.objects.filter(favoring_users__user=user, pdf__score=self)
+        parts = Part.objects.filter(
+            favoring_users__user=user, pdf__score=self
+        ).select_related("pdf")
         if not parts.exists():
             raise Exception(f"Fann inga favorittstemmer for {user} for nota {self}")
-        pdf_writer = PdfWriter()
-        for part in parts:
-            pdf_writer.append_pages_from_reader(PdfReader(part.pdf_file()))
-        output_stream = io.BytesIO()
-        pdf_writer.write(output_stream)
-        output_stream.seek(0)
-        return output_stream
+        return parts_pdf_file(parts)
 
     def favorite_parts_pdf_filename(self, user):
         return get_valid_filename(f"{self.title} {user}.pdf")
@@ -129,14 +169,9 @@ class Score(ArticleMixin):
 
     def pdf_file(self):
         """Returns a PDF containing all parts of this score."""
-        pdf_merger = PdfMerger()
-        for part in Part.objects.filter(pdf__score=self):
-            part_pdf_stream = part.pdf_file()
-            part_pdf_reader = PdfReader(part_pdf_stream)
-            pdf_merger.append(part_pdf_reader)
-        pdf_stream = io.BytesIO()
-        pdf_merger.write(pdf_stream)
-        pdf_stream.seek(0)
+        pdf_stream = parts_pdf_file(
+            Part.objects.filter(pdf__score=self).select_related("pdf")
+        )
         pdf_name = self.pdf_filename()
         return pdf_stream, pdf_name
 
@@ -145,19 +180,24 @@ class Score(ArticleMixin):
         return get_valid_filename(f"{self.title} Alle stemmer.zip")
 
     def zip_file(self):
-        """Returns a ZIP file containing all parts of this score."""
-        zip_stream = io.BytesIO()
-        with ZipFile(zip_stream, mode="w", compression=ZIP_DEFLATED) as zip:
-            for part in Part.objects.filter(pdf__score=self):
-                pdf_stream = part.pdf_file()
-                pdf_filename = part.pdf_filename()
-                zip.writestr(pdf_filename, pdf_stream.read())
-        zip_stream.seek(0)
+        """
+        Returns a ZIP file containing all parts of this score,
+        as a generator of bytes that reads the cached part PDFs one at a time.
+        """
+        parts = Part.objects.filter(pdf__score=self).select_related("pdf__score")
+        zip_stream = stream_zip(
+            (part.pdf_filename(), default_storage.open(part.pdf_file_cached()))
+            for part in parts
+        )
         zip_name = self.zip_filename()
         return zip_stream, zip_name
 
+    def processing_jobs(self):
+        """Returns queued or running background jobs for the PDFs of this score."""
+        return Job.objects.pending().filter(pdf__score=self)
+
     def is_processing(self):
-        return self.pdfs.filter(processing=True).exists()
+        return self.processing_jobs().exists()
 
 
 pdf_file_validators = [FileTypeValidator([".pdf"])]
@@ -167,6 +207,22 @@ def pdf_filename_no_extension(pdf):
     return pdf.filename_no_extension()
 
 
+def hash_file(file):
+    """Returns the SHA-256 hex digest of the contents of `file`."""
+    file_hash = sha256()
+    for chunk in file.chunks():
+        file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def page_size(page):
+    """Returns the width and height of `page` as displayed, in points."""
+    width, height = float(page.mediabox.width), float(page.mediabox.height)
+    if page.rotation % 180:
+        width, height = height, width
+    return [round(width, 2), round(height, 2)]
+
+
 class Pdf(Model):
     """Model representing an uploaded pdf"""
 
@@ -189,7 +245,12 @@ class Pdf(Model):
         unique_with="score__slug",
         editable=True,
     )
-    processing = BooleanField("prosessering pågår", default=False, editable=False)
+    jobs = GenericRelation(Job, object_id_field="object_pk", related_query_name="pdf")
+    file_hash = CharField("filhash", max_length=64, blank=True, editable=False)
+    file_size = PositiveBigIntegerField("filstorleik", null=True, editable=False)
+    page_count = PositiveIntegerField("sidetal", null=True, editable=False)
+    # Width and height of each page, in points
+    page_sizes = JSONField("sidestorleikar", default=list, editable=False)
     timestamp = DateTimeField("tidsmerke", auto_now_add=True)
 
     class Meta:
@@ -203,47 +264,95 @@ class Pdf(Model):
     def get_absolute_url(self):
         return reverse("sheetmusic:ScoreView", kwargs={"slug": self.score.slug})
 
+    def save(self, *args, **kwargs):
+        """
+        Stores metadata of the file whenever a new file is uploaded.
+        Since rendered parts are cached by `file_hash`,
+        this also invalidates the cache for parts of this PDF.
+        """
+        if self.file and not self.file._committed:
+            self.set_file_metadata(self.file)
+        super().save(*args, **kwargs)
+
+    def set_file_metadata(self, file):
+        """
+        Sets `file_hash`, `file_size`, `page_count` and `page_sizes` from `file`,
+        so that the file doesn't have to be read every time they're needed.
+        """
+        self.file_hash = hash_file(file)
+        self.file_size = file.size
+        file.seek(0)
+        pdf_reader = PdfReader(file, strict=False)
+        self.page_count = len(pdf_reader.pages)
+        self.page_sizes = [page_size(page) for page in pdf_reader.pages]
+
+    def update_file_metadata(self):
+        """Reads the stored file, and stores its metadata."""
+        with self.file.open() as file:
+            self.set_file_metadata(file)
+        Pdf.objects.filter(pk=self.pk).update(
+            file_hash=self.file_hash,
+            file_size=self.file_size,
+            page_count=self.page_count,
+            page_sizes=self.page_sizes,
+        )
+
+    def get_file_hash(self):
+        """
+        Returns `file_hash`, computing and storing it first
+        if it has not been computed yet.
+        """
+        if not self.file_hash:
+            self.update_file_metadata()
+        return self.file_hash
+
     def filename_no_extension(self):
         """Returns the original filename of the PDF, without a file extension."""
         return os.path.splitext(self.filename_original)[0]
 
     def num_of_pages(self):
-        pdf_reader = PdfReader(self.file.open(), strict=False)
-        return len(pdf_reader.pages)
-
-    def find_parts_with_sheatless(self):
-        self.processing = True
-        self.save()
-        try:
-            with self.file.open() as pdf_file:
-                pdf_predictor = PdfPredictor(
-                    pdf_file.read(),
-                    use_lstm=True,
-                    crop_to_left=True,
-                    crop_to_top=True,
-                    tessdata_dir=TESSDATA_DIR,
-                    tesseract_languages=["nor"],
-                    instruments=InstrumentType.objects.sheatless_format(),
-                    full_score_threshold=2,
-                    full_score_label="Partitur",
-                )
-
-            for part in pdf_predictor.parts():
-                for instrument_name in part["instruments"]:
-                    instrument_type = InstrumentType.objects.filter(
-                        name__iexact=instrument_name
-                    ).first()
-                    if not instrument_type:
-                        instrument_type = InstrumentType.unknown()
-                    self.create_part_auto_number(
-                        instrument_type=instrument_type,
-                        note="funne automatisk",
-                        from_page=part["fromPage"],
-                        to_page=part["toPage"],
-                    )
-        finally:
-            self.processing = False
-            self.save()
+        """
+        Returns `page_count`, computing and storing it first
+        if it has not been computed yet.
+        """
+        if self.page_count is None:
+            self.update_file_metadata()
+        return self.page_count
+
+    def find_parts_with_sheatless(self, job=None):
+        """
+        Finds parts with Sheatless. Takes a long time,
+        so it's usually run as a background job, which `job` is.
+        """
+        with self.file.open() as pdf_file:
+            pdf = pdf_file.read()
+        parts = find_parts(
+            pdf,
+            workers=settings.SHEATLESS_WORKERS,
+            pages_per_chunk=settings.SHEATLESS_PAGES_PER_CHUNK,
+            on_progress=job.set_progress if job is not None else None,
+            use_lstm=True,
+            crop_to_left=True,
+            crop_to_top=True,
+            tessdata_dir=TESSDATA_DIR,
+            tesseract_languages=["nor"],
+            instruments=InstrumentType.objects.sheatless_format(),
+            full_score_threshold=2,
+            full_score_label="Partitur",
+        )
+
+        self.create_parts_auto_number(
+            [
+                {
+                    "instrument_type": InstrumentType.objects.detected(instrument_name),
+                    "note": "funne automatisk",
+                    "from_page": part["fromPage"],
+                    "to_page": part["toPage"],
+                }
+                for part in parts
+                for instrument_name in part["instruments"]
+            ]
+        )
 
     def find_parts_from_original_filename(self):
         filename, _ = os.path.splitext(self.filename_original)
@@ -254,38 +363,110 @@ class Pdf(Model):
         if part is None:
             return
         part_number, instruments = part
-        for instrument_name in instruments:
-            instrument_type = InstrumentType.objects.filter(
-                name__iexact=instrument_name
-            ).first()
-            if not instrument_type:
-                instrument_type = InstrumentType.unknown()
-            self.create_part_auto_number(
-                instrument_type=instrument_type,
-                note="funne automatisk",
-                from_page=1,
-                to_page=self.num_of_pages(),
-            )
+        num_of_pages = self.num_of_pages()
+        self.create_parts_auto_number(
+            [
+                {
+                    "instrument_type": InstrumentType.objects.detected(instrument_name),
+                    "note": "funne automatisk",
+                    "from_page": 1,
+                    "to_page": num_of_pages,
+                }
+                for instrument_name in instruments
+            ]
+        )
 
     def create_part_auto_number(self, **kwargs):
         """
         Creates a new Part with part_number caclulated automatically.
         """
-        part_number = None
-        other_parts_for_same_instrument = Part.objects.filter(
-            pdf__score=self.score, instrument_type=kwargs["instrument_type"]
-        ).order_by(F("part_number").asc(nulls_first=True))
-        if other_parts_for_same_instrument.exists():
-            if other_parts_for_same_instrument.count() == 1:
-                part_one = other_parts_for_same_instrument.first()
-                part_one.part_number = 1
-                part_one.save()
-            part_number = (other_parts_for_same_instrument.last().part_number or 0) + 1
-        Part(
-            part_number=part_number,
-            pdf=self,
-            **kwargs,
-        ).save()
+        self.create_parts_auto_number([kwargs])
+
+    def create_parts_auto_number(self, parts):
+        """
+        Creates a new Part for each dict of fields in `parts`,
+        with part_number caclulated automatically.
+
+        The first part of an instrument type is unnumbered.
+        When a second part of the same instrument type is created,
+        the first one becomes number 1 and the new one number 2, and so on.
+
+        Part numbers and slugs are calculated from a single query
+        of the parts of the score, and the parts are created in bulk,
+        while the score is locked.
+        """
+        with transaction.atomic():
+            # Lock the score, so parts created at the same time for the score
+            # are numbered after each other, and don't get the same number
+            Score.objects.select_for_update().get(pk=self.score_id)
+            score_parts = list(Part.objects.filter(pdf__score=self.score))
+            parts_by_instrument_type = defaultdict(list)
+            for part in score_parts:
+                parts_by_instrument_type[part.instrument_type_id].append(part)
+            slugs = {part.slug for part in score_parts}
+
+            renumbered_parts = []
+            new_parts = []
+            for fields in parts:
+                part = Part(pdf=self, **fields)
+                other_parts_for_same_instrument = parts_by_instrument_type[
+                    part.instrument_type_id
+                ]
+                if len(other_parts_for_same_instrument) == 1:
+                    part_one = other_parts_for_same_instrument[0]
+                    part_one.part_number = 1
+                    slugs.discard(part_one.slug)
+                    part_one.slug = unique_slug(part_one, slugs)
+                    if part_one.pk is not None:
+                        renumbered_parts.append(part_one)
+                if other_parts_for_same_instrument:
+                    part.part_number = (
+                        max(
+                            other_part.part_number or 0
+                            for other_part in other_parts_for_same_instrument
+                        )
+                        + 1
+                    )
+                part.slug = unique_slug(part, slugs)
+                part.slug_is_unique = True
+                other_parts_for_same_instrument.append(part)
+                new_parts.append(part)
+
+            Part.objects.bulk_update(renumbered_parts, ["part_number", "slug"])
+            Part.objects.bulk_create(new_parts)
+
+
+def unique_slug(part, slugs):
+    """
+    Returns the slug `AutoSlugField` would give `part`, if `slugs` were
+    the slugs of the other parts of its score, and adds it to `slugs`.
+    """
+    slug_field = Part._meta.get_field("slug")
+    slug = slug_field.slugify(str(part)) or Part._meta.model_name
+    slug = original_slug = slug_field.slugify(crop_slug(slug_field, slug))
+    index = 1
+    while slug in slugs:
+        index += 1
+        tail = f"{slug_field.index_sep}{index}"
+        original_slug = original_slug[: slug_field.max_length - len(tail)]
+        slug = f"{original_slug}{tail}"
+    slugs.add(slug)
+    return slug
+
+
+class PartSlugField(AutoSlugField):
+    """
+    An `AutoSlugField` that keeps slugs set by `Pdf.create_parts_auto_number`,
+    which makes sure they are unique without a query for each part.
+    """
+
+    def pre_save(self, instance, add):
+        if getattr(instance, "slug_is_unique", False):
+            return instance.slug
+        return super().pre_save(instance, add)
+
+
+part_pdf_cache_dir = "sheetmusic/part_pdfs/"
 
 
 class PartManager(Manager):
@@ -332,7 +513,7 @@ class Part(Model):
             result += f" ({self.note})"
         return result
 
-    slug = AutoSlugField(
+    slug = PartSlugField(
         verbose_name="lenkjenamn",
         populate_from=__str__,
         unique_with="pdf__score__slug",
@@ -365,19 +546,39 @@ class Part(Model):
 
     def pdf_file(self):
         """Returns the PDF that contains only this part"""
-        pdf = PdfReader(self.pdf.file.open())
-        pdf_writer = PdfWriter()
-        for page_nr in range(self.from_page, self.to_page + 1):
-            pdf_writer.add_page(pdf.pages[page_nr - 1])
-        output_stream = io.BytesIO()
-        pdf_writer.write(output_stream)
-        output_stream.seek(0)
-        return output_stream
+        return parts_pdf_file([self])
 
     def pdf_filename(self):
         """Returns a nice filename for the PDF that contains only this part"""
         return get_valid_filename(f"{self.pdf.score.title} {self}.pdf")
 
+    def pdf_file_cache_path(self):
+        """
+        Returns the storage path of the cached PDF that contains only this part.
+
+        The path is derived from the contents of the original PDF and the page range,
+        so that it changes whenever either of them changes.
+        """
+        return os.path.join(
+            part_pdf_cache_dir,
+            self.pdf.get_file_hash(),
+            f"{self.from_page}-{self.to_page}.pdf",
+        )
+
+    def pdf_file_cached(self):
+        """
+        Returns the storage path of the cached PDF that contains only this part,
+        rendering it and storing it in the cache first if it does not exist.
+        """
+        path = self.pdf_file_cache_path()
+        if not default_storage.exists(path):
+            path_saved = default_storage.save(path, ContentFile(self.pdf_file().read()))
+            # Another request rendered the same part concurrently,
+            # so the storage gave ours an alternative name
+            if path_saved != path:
+                default_storage.delete(path_saved)
+        return path
+
 
 class FavoritePart(Model):
     """Model representing a favorite part of a user"""
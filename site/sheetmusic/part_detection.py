@@ -0,0 +1,140 @@
+"""
+Automatic part detection with Sheatless, split across processes.
+
+Kept free of Django imports so that worker processes
+can import it without setting up Django.
+"""
+
+import atexit
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+from pypdf import PdfReader, PdfWriter
+from sheatless import PdfPredictor, pdf_predictor
+
+# Directory of this process' Sheatless words file, see `use_own_words_file`
+words_dir = None
+
+
+def split_pdf(pdf, pages_per_chunk):
+    """
+    Splits `pdf` into chunks of at most `pages_per_chunk` pages.
+    Returns the number of pages in `pdf`, and a list of `(page_offset, chunk)` tuples,
+    where `page_offset` is the number of pages before the chunk.
+    """
+    pdf_reader = PdfReader(io.BytesIO(pdf))
+    num_of_pages = len(pdf_reader.pages)
+    chunks = []
+    for page_offset in range(0, num_of_pages, pages_per_chunk):
+        pdf_writer = PdfWriter()
+        for page in pdf_reader.pages[page_offset : page_offset + pages_per_chunk]:
+            pdf_writer.add_page(page)
+        chunk = io.BytesIO()
+        pdf_writer.write(chunk)
+        chunks.append((page_offset, chunk.getvalue()))
+    return num_of_pages, chunks
+
+
+def use_own_words_file():
+    """
+    Makes Sheatless write its words file to a directory of this process.
+
+    While predicting, Sheatless writes the instrument keywords to `user_words.txt`
+    next to its module, and deletes the file when done.
+    Processes predicting at the same time would share that file,
+    and the first to finish would delete it while the others still use it.
+    Sheatless finds the file from its module's `__file__`,
+    so that is pointed to a temporary directory of this process.
+    """
+    global words_dir
+    if words_dir is None:
+        words_dir = tempfile.mkdtemp(prefix="sheatless-")
+        atexit.register(shutil.rmtree, words_dir, ignore_errors=True)
+    pdf_predictor.__file__ = os.path.join(words_dir, "pdf_predictor.py")
+
+
+def predict_parts(pdf, **predictor_kwargs):
+    """Returns the parts Sheatless finds in `pdf`."""
+    use_own_words_file()
+    return list(PdfPredictor(pdf, **predictor_kwargs).parts())
+
+
+def merge_parts(chunk_parts, num_of_pages):
+    """
+    Merges parts predicted for each chunk of a PDF into parts for the whole PDF.
+    `chunk_parts` is a list of `(page_offset, parts)` tuples, in page order.
+
+    Sheatless ends the last part of a chunk at the last page of the chunk,
+    so a part continuing into the next chunk is split in two.
+    Such parts are joined if the next chunk starts with a part of the same name.
+    Otherwise, the part ends right before the first part of the next chunk.
+    """
+    merged = []
+    for page_offset, parts in chunk_parts:
+        for index, part in enumerate(parts):
+            part = {
+                **part,
+                "fromPage": part["fromPage"] + page_offset,
+                "toPage": part["toPage"] + page_offset,
+            }
+            if index == 0 and merged:
+                previous = merged[-1]
+                if previous["name"].lower() == part["name"].lower():
+                    previous["toPage"] = part["toPage"]
+                    continue
+                previous["toPage"] = part["fromPage"] - 1
+            merged.append(part)
+    if merged:
+        merged[-1]["toPage"] = num_of_pages
+    return merged
+
+
+def find_parts(pdf, workers=1, pages_per_chunk=4, on_progress=None, **predictor_kwargs):
+    """
+    Finds parts in `pdf` with Sheatless.
+    Returns the same list of parts as `PdfPredictor.parts()` would.
+
+    The PDF is split into chunks of `pages_per_chunk` pages,
+    which are predicted by up to `workers` processes in parallel.
+    Sheatless reads each page on its own, and applies `full_score_threshold`
+    to the parts of a single page, so chunks find the same parts as the whole PDF.
+    Pages at the start of a chunk before its first part name belong to the last part
+    of the chunk before, which `merge_parts` extends to them.
+    With a single worker, the chunks are predicted in this process.
+    `on_progress` is called with the share of pages predicted
+    each time a chunk is finished.
+    """
+    num_of_pages, chunks = split_pdf(pdf, pages_per_chunk)
+    workers = min(workers, len(chunks))
+
+    with ExitStack() as stack:
+        if workers > 1:
+            # Spawn instead of fork, since forking a process
+            # with open database connections isn't safe
+            executor = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            )
+            futures = [
+                executor.submit(predict_parts, chunk, **predictor_kwargs)
+                for _, chunk in chunks
+            ]
+            results = (future.result() for future in futures)
+        else:
+            results = (predict_parts(chunk, **predictor_kwargs) for _, chunk in chunks)
+
+        chunk_parts = []
+        for (page_offset, _), parts in zip(chunks, results):
+            chunk_parts.append((page_offset, parts))
+            if on_progress is not None:
+                pages_done = min(page_offset + pages_per_chunk, num_of_pages)
+                on_progress(pages_done / num_of_pages)
+
+    return merge_parts(chunk_parts, num_of_pages)
@@ -1,13 +1,27 @@
+import hashlib
 import os
 from http import HTTPStatus
-
+from io import BytesIO, StringIO
+from time import perf_counter
+from unittest import skipUnless
+from unittest.mock import patch
+from zipfile import ZIP_STORED, ZipFile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.db import IntegrityError
 from django.test import TestCase
 from django.urls import reverse
+from django.utils.encoding import escape_uri_path
 from django.utils.text import slugify
-from pypdf import PdfReader
+from pypdf import PdfReader, PdfWriter
+from sheatless import pdf_predictor
 
 from accounts.factories import SuperUserFactory, UserFactory
+from common.jobs.factories import JobFactory
+from common.jobs.models import Job
 from common.mixins import TestMixin
 from common.test_utils import (
     create_formset_post_data,
@@ -32,6 +46,7 @@ from .forms import (
     PartsUpdateFormset,
 )
 from .models import EditFile, Part, Pdf, Score
+from .part_detection import find_parts, merge_parts, split_pdf, use_own_words_file
 from .views import nav_tabs_score_edit
 
 
@@ -136,19 +151,50 @@ class ScoreTestSuite(TestMixin, TestCase):
         result = self.score.favorite_parts_pdf_filename(user)
         self.assertEquals(result, "Chirp_Kul_Type.pdf")
 
+    def test_pdf_file(self):
+        """Should return a PDF with the pages of all parts."""
+        pdf = PdfFactory(file=test_pdf_multipage(["Fløyte", "Tuba", "Horn"]))
+        score = pdf.score
+        PartFactory(pdf=pdf, instrument_type__name="B", from_page=2, to_page=3)
+        PartFactory(pdf=pdf, instrument_type__name="A", from_page=1, to_page=1)
+        PartFactory(pdf__score=score, instrument_type__name="C")
+        pdf_stream, pdf_name = score.pdf_file()
+        self.assertEqual(len(PdfReader(pdf_stream).pages), 4)
+        self.assertEqual(pdf_name, score.pdf_filename())
+
+    def test_pdf_file_parses_each_pdf_once(self):
+        """Should only parse each original PDF once, no matter the amount of parts."""
+        with patch("sheetmusic.models.PdfReader", wraps=PdfReader) as pdf_reader:
+            self.score.pdf_file()
+        self.assertEqual(pdf_reader.call_count, 2)
+
+    def test_zip_file(self):
+        """Should return a ZIP file with the PDF of each part, without compression."""
+        zip_stream, zip_name = self.score.zip_file()
+        zip_file = ZipFile(BytesIO(b"".join(zip_stream)))
+        parts = Part.objects.filter(pdf__score=self.score)
+        self.assertEqual(
+            sorted(zip_file.namelist()), sorted(part.pdf_filename() for part in parts)
+        )
+        for zip_info in zip_file.infolist():
+            self.assertEqual(zip_info.compress_type, ZIP_STORED)
+            self.assertEqual(len(PdfReader(BytesIO(zip_file.read(zip_info))).pages), 1)
+        self.assertEqual(zip_name, self.score.zip_filename())
+
     def test_is_processing(self):
         """
         Checks that `is_processing` returns True if any of its pdfs are being processed.
         """
-        score = PdfFactory(processing=False).score
-        PdfFactory(score=score, processing=True)
+        score = PdfFactory().score
+        JobFactory(content_object=PdfFactory(score=score), status=Job.Status.RUNNING)
         self.assertTrue(score.is_processing())
 
     def test_is_not_processing(self):
         """
         Checks that `is_processing` returns False if none of its pdfs are being processed.
         """
-        score = PdfFactory(processing=False).score
+        score = PdfFactory().score
+        JobFactory(content_object=PdfFactory(score=score), status=Job.Status.DONE)
         self.assertFalse(score.is_processing())
 
 
@@ -177,12 +223,73 @@ class PdfTestSuite(TestMixin, TestCase):
             reverse("sheetmusic:ScoreView", kwargs={"slug": self.pdf.score.slug}),
         )
 
+    def test_file_hash_computed_on_upload(self):
+        """Should compute `file_hash` from the contents of the uploaded file."""
+        with self.pdf.file.open() as file:
+            self.assertEqual(
+                self.pdf.file_hash, hashlib.sha256(file.read()).hexdigest()
+            )
+
+    def test_file_hash_recomputed_on_new_file(self):
+        """Should recompute `file_hash` when a new file is uploaded."""
+        file_hash_old = self.pdf.file_hash
+        self.pdf.file = test_pdf_multipage(["Fløyte", "Tuba"])
+        self.pdf.save()
+        self.assertNotEqual(self.pdf.file_hash, file_hash_old)
+
+    def test_get_file_hash_computes_if_missing(self):
+        """Should compute and store `file_hash` if it's missing."""
+        file_hash = self.pdf.file_hash
+        Pdf.objects.filter(pk=self.pdf.pk).update(file_hash="")
+        self.pdf.refresh_from_db()
+        self.assertEqual(self.pdf.get_file_hash(), file_hash)
+        self.pdf.refresh_from_db()
+        self.assertEqual(self.pdf.file_hash, file_hash)
+
     def test_num_of_pages(self):
         """
         Checks that there is 1 page in the default PDF.
         """
         self.assertEqual(self.pdf.num_of_pages(), 1)
 
+    def test_file_metadata_stored_on_upload(self):
+        """Should store the size, page count and page sizes of uploaded files."""
+        self.pdf.file = test_pdf_multipage(["Fløyte", "Tuba"])
+        self.pdf.save()
+        self.pdf.refresh_from_db()
+        self.assertEqual(self.pdf.file_size, self.pdf.file.size)
+        self.assertEqual(self.pdf.page_count, 2)
+        self.assertEqual(self.pdf.page_sizes, [[537.31, 759.76], [537.31, 759.76]])
+
+    @patch("sheetmusic.models.PdfReader")
+    def test_num_of_pages_reads_database(self, pdf_reader):
+        """Should return the stored page count, without reading the file."""
+        self.pdf.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.pdf.num_of_pages(), 1)
+        pdf_reader.assert_not_called()
+
+    def test_num_of_pages_computes_if_missing(self):
+        """Should compute and store file metadata if it's missing."""
+        Pdf.objects.filter(pk=self.pdf.pk).update(page_count=None, file_size=None)
+        self.pdf.refresh_from_db()
+        self.assertEqual(self.pdf.num_of_pages(), 1)
+        self.pdf.refresh_from_db()
+        self.assertEqual(self.pdf.page_count, 1)
+        self.assertEqual(self.pdf.file_size, self.pdf.file.size)
+
+    def test_update_pdf_metadata_command(self):
+        """Should store metadata of PDFs that are missing it."""
+        Pdf.objects.filter(pk=self.pdf.pk).update(
+            file_hash="", file_size=None, page_count=None, page_sizes=[]
+        )
+        call_command("update_pdf_metadata", stdout=StringIO())
+        self.pdf.refresh_from_db()
+        self.assertEqual(len(self.pdf.file_hash), 64)
+        self.assertEqual(self.pdf.file_size, self.pdf.file.size)
+        self.assertEqual(self.pdf.page_count, 1)
+        self.assertEqual(len(self.pdf.page_sizes), 1)
+
     def test_find_parts_with_sheatless(self):
         """
         Checks that sheatless understands that there is written tuba inside the PDF.
@@ -226,6 +333,328 @@ class PdfTestSuite(TestMixin, TestCase):
         self.assertEqual(self.pdf.parts.first().part_number, 1)
         self.assertEqual(self.pdf.parts.last().part_number, 2)
 
+    def test_create_parts_auto_number(self):
+        """Should number parts of the same instrument type, in order."""
+        flute = InstrumentTypeFactory(name="Fløyte")
+        tuba = InstrumentTypeFactory(name="Tuba")
+        self.pdf.create_parts_auto_number(
+            [
+                {"instrument_type": flute, "from_page": 1, "to_page": 1},
+                {"instrument_type": tuba, "from_page": 2, "to_page": 2},
+                {"instrument_type": flute, "from_page": 3, "to_page": 3},
+                {"instrument_type": flute, "from_page": 4, "to_page": 4},
+            ]
+        )
+        self.assertQuerysetEqual(
+            self.pdf.parts.order_by("from_page"),
+            [
+                (flute, 1, 1, "floyte-1"),
+                (tuba, None, 2, "tuba"),
+                (flute, 2, 3, "floyte-2"),
+                (flute, 3, 4, "floyte-3"),
+            ],
+            lambda part: (
+                part.instrument_type,
+                part.part_number,
+                part.from_page,
+                part.slug,
+            ),
+        )
+
+    def test_create_parts_auto_number_renumbers_existing_part(self):
+        """
+        Should number an existing part of the same instrument type in the score 1,
+        and update its slug.
+        """
+        flute = InstrumentTypeFactory(name="Fløyte")
+        part = PartFactory(
+            pdf=PdfFactory(score=self.pdf.score),
+            instrument_type=flute,
+            part_number=None,
+        )
+        self.pdf.create_parts_auto_number(
+            [{"instrument_type": flute, "from_page": 1, "to_page": 1}]
+        )
+        part.refresh_from_db()
+        self.assertEqual(part.part_number, 1)
+        self.assertEqual(part.slug, "floyte-1")
+        self.assertEqual(self.pdf.parts.get().part_number, 2)
+        self.assertEqual(self.pdf.parts.get().slug, "floyte-2")
+
+    def test_create_parts_auto_number_unique_slugs(self):
+        """Should give parts unique slugs within the score."""
+        flute = InstrumentTypeFactory(name="Fløyte")
+        PartFactory(
+            pdf=PdfFactory(score=self.pdf.score),
+            instrument_type=InstrumentTypeFactory(name="Fløyte 2"),
+            part_number=None,
+        )
+        self.pdf.create_parts_auto_number(
+            [
+                {"instrument_type": flute, "from_page": 1, "to_page": 1},
+                {"instrument_type": flute, "from_page": 2, "to_page": 2},
+            ]
+        )
+        self.assertEqual(
+            list(self.pdf.parts.order_by("from_page").values_list("slug", flat=True)),
+            ["floyte-1", "floyte-2-2"],
+        )
+
+    def test_create_parts_auto_number_num_queries(self):
+        """Should use the same number of queries no matter how many parts are created."""
+        flute = InstrumentTypeFactory(name="Fløyte")
+        with self.assertNumQueries(5):
+            self.pdf.create_parts_auto_number(
+                [{"instrument_type": flute, "from_page": 1, "to_page": 1}] * 20
+            )
+        self.assertEqual(self.pdf.parts.count(), 20)
+
+
+class PartDetectionTestSuite(TestMixin, TestCase):
+    def part(self, name, from_page, to_page):
+        return {
+            "name": name,
+            "partNumber": None,
+            "instruments": [name],
+            "fromPage": from_page,
+            "toPage": to_page,
+        }
+
+    def test_split_pdf(self):
+        """Should split the PDF into chunks of at most `pages_per_chunk` pages."""
+        pdf = test_pdf_multipage(["1", "2", "3", "4", "5"]).read()
+        num_of_pages, chunks = split_pdf(pdf, 2)
+        self.assertEqual(num_of_pages, 5)
+        self.assertEqual([page_offset for page_offset, _ in chunks], [0, 2, 4])
+        self.assertEqual(
+            [len(PdfReader(BytesIO(chunk)).pages) for _, chunk in chunks], [2, 2, 1]
+        )
+
+    def test_merge_parts_offsets_pages(self):
+        """Should offset the pages of each chunk by the pages before it."""
+        parts = merge_parts(
+            [
+                (0, [self.part("Fløyte", 1, 2)]),
+                (2, [self.part("Tuba", 1, 2)]),
+            ],
+            4,
+        )
+        self.assertEqual(parts, [self.part("Fløyte", 1, 2), self.part("Tuba", 3, 4)])
+
+    def test_merge_parts_joins_part_across_chunks(self):
+        """Should join a part split across chunks into a single part."""
+        parts = merge_parts(
+            [
+                (0, [self.part("Fløyte", 1, 1), self.part("Tuba", 2, 2)]),
+                (2, [self.part("tuba", 1, 1), self.part("Horn", 2, 2)]),
+            ],
+            4,
+        )
+        self.assertEqual(
+            parts,
+            [
+                self.part("Fløyte", 1, 1),
+                self.part("Tuba", 2, 3),
+                self.part("Horn", 4, 4),
+            ],
+        )
+
+    def test_merge_parts_extends_part_to_next_part(self):
+        """
+        Should extend the last part of a chunk to the first part of the next chunk,
+        and the last part to the last page.
+        """
+        parts = merge_parts(
+            [
+                (0, [self.part("Fløyte", 1, 2)]),
+                (2, []),
+                (4, [self.part("Tuba", 2, 2)]),
+            ],
+            8,
+        )
+        self.assertEqual(parts, [self.part("Fløyte", 1, 5), self.part("Tuba", 6, 8)])
+
+    def test_merge_parts_no_parts(self):
+        self.assertEqual(merge_parts([(0, []), (4, [])], 8), [])
+
+    def find_parts_without_ocr(self, page_parts, pages_per_chunk):
+        """
+        Runs `find_parts` with Sheatless finding the parts `page_parts[i]`
+        on page `i`, instead of reading the pages.
+        Only the reading is patched, so Sheatless still predicts the parts
+        of each chunk from the parts of each page, like on real PDFs.
+        """
+        titles = [f"Side {page}" for page in range(1, len(page_parts) + 1)]
+        pdf = test_pdf_multipage(titles).read()
+        pages = {
+            hashlib.sha256(page.images[0].data).digest(): index
+            for index, page in enumerate(PdfReader(BytesIO(pdf)).pages)
+        }
+
+        def convert_from_bytes(chunk, first_page, **kwargs):
+            page = PdfReader(BytesIO(chunk)).pages[first_page - 1]
+            return [pages[hashlib.sha256(page.images[0].data).digest()]]
+
+        with patch.object(
+            pdf_predictor.pdf2image, "convert_from_bytes", convert_from_bytes
+        ), patch.object(pdf_predictor, "PyTessBaseAPI") as api, patch.object(
+            pdf_predictor,
+            "TesserocrDetections",
+            lambda _: api().__enter__().SetImage.call_args.args[0],
+        ), patch.object(
+            pdf_predictor, "predict_parts", lambda page, _: page_parts[page]
+        ), patch.object(
+            pdf_predictor, "__file__", pdf_predictor.__file__
+        ):
+            return find_parts(
+                pdf,
+                pages_per_chunk=pages_per_chunk,
+                instruments={},
+                crop_to_left=False,
+                log_stream=None,
+                full_score_threshold=2,
+                full_score_label="Partitur",
+            )
+
+    def test_find_parts_chunks_match_whole_pdf(self):
+        """
+        Should find the same parts when splitting the PDF into chunks
+        as when predicting the whole PDF at once, also for parts crossing chunks,
+        chunks starting without a part name, and full scores.
+        """
+        page_parts = [
+            [("Fløyte", None, ["Fløyte"])],
+            [],
+            # Starts the second chunk in the middle of the flute part
+            [],
+            [("Klarinett", 1, ["Klarinett"])],
+            [("Tuba", None, ["Tuba"]), ("Horn", None, ["Horn"])],
+            [],
+            [("Tuba", None, ["Tuba"])],
+            [("tuba", None, ["Tuba"])],
+        ]
+        whole_pdf = self.find_parts_without_ocr(page_parts, pages_per_chunk=8)
+        self.assertEqual(
+            [(part["name"], part["fromPage"], part["toPage"]) for part in whole_pdf],
+            [
+                ("Fløyte", 1, 3),
+                ("Klarinett", 4, 4),
+                ("Partitur", 5, 6),
+                ("Tuba", 7, 8),
+            ],
+        )
+        for pages_per_chunk in [1, 2, 3]:
+            with self.subTest(pages_per_chunk=pages_per_chunk):
+                self.assertEqual(
+                    self.find_parts_without_ocr(page_parts, pages_per_chunk),
+                    whole_pdf,
+                )
+
+    @patch("sheetmusic.part_detection.predict_parts")
+    def test_find_parts(self, predict_parts):
+        """Should predict each chunk, report progress, and merge the results."""
+        predict_parts.side_effect = [
+            [self.part("Fløyte", 1, 2)],
+            [self.part("Fløyte", 1, 1), self.part("Tuba", 2, 2)],
+            [self.part("Tuba", 1, 1)],
+        ]
+        pdf = test_pdf_multipage(["1", "2", "3", "4", "5"]).read()
+        progress = []
+        parts = find_parts(
+            pdf, workers=1, pages_per_chunk=2, on_progress=progress.append
+        )
+        self.assertEqual(parts, [self.part("Fløyte", 1, 3), self.part("Tuba", 4, 5)])
+        self.assertEqual(progress, [2 / 5, 4 / 5, 1])
+        self.assertEqual(predict_parts.call_count, 3)
+
+    def test_use_own_words_file(self):
+        """Should make Sheatless write its words file to a directory of this process."""
+        original_file = pdf_predictor.__file__
+        try:
+            use_own_words_file()
+            words_dir = os.path.dirname(pdf_predictor.__file__)
+            self.assertNotEqual(words_dir, os.path.dirname(original_file))
+            self.assertTrue(os.path.isdir(words_dir))
+            use_own_words_file()
+            self.assertEqual(os.path.dirname(pdf_predictor.__file__), words_dir)
+        finally:
+            pdf_predictor.__file__ = original_file
+
+
+class ScorePdfFileTestSuite(TestMixin, TestCase):
+    """Tests of `Score.pdf_file` for a score with large PDFs split into many parts."""
+
+    def setUp(self):
+        self.score = ScoreFactory()
+        self.pdfs = []
+        for pdf_number, num_of_pages, pages_per_part in [(1, 40, 2), (2, 6, 3)]:
+            titles = [
+                f"PDF {pdf_number} side {page}" for page in range(1, num_of_pages + 1)
+            ]
+            pdf = PdfFactory(score=self.score, file=test_pdf_multipage(titles))
+            for from_page in range(1, num_of_pages + 1, pages_per_part):
+                PartFactory(
+                    pdf=pdf, from_page=from_page, to_page=from_page + pages_per_part - 1
+                )
+            self.pdfs.append(pdf)
+
+    def page_contents(self, pdf_reader, pages):
+        return [pdf_reader.pages[page - 1].images[0].data for page in pages]
+
+    def test_pages(self):
+        """Should contain the pages of each part, in the order of the parts."""
+        pdf_readers = {}
+        for pdf in self.pdfs:
+            with pdf.file.open() as pdf_file:
+                pdf_readers[pdf.pk] = PdfReader(BytesIO(pdf_file.read()))
+        expected_pages = []
+        for part in Part.objects.filter(pdf__score=self.score):
+            expected_pages += self.page_contents(
+                pdf_readers[part.pdf_id], range(part.from_page, part.to_page + 1)
+            )
+
+        pdf_stream, _ = self.score.pdf_file()
+        pdf_reader = PdfReader(pdf_stream)
+        self.assertEqual(len(pdf_reader.pages), 46)
+        self.assertEqual(
+            self.page_contents(pdf_reader, range(1, 47)),
+            expected_pages,
+        )
+
+    def test_parses_each_pdf_once(self):
+        """Should parse each PDF once, no matter how many parts are from it."""
+        with patch("sheetmusic.models.PdfReader", wraps=PdfReader) as pdf_reader:
+            self.score.pdf_file()
+        self.assertEqual(pdf_reader.call_count, len(self.pdfs))
+
+    @skipUnless(os.environ.get("BENCHMARK"), "Set BENCHMARK=1 to run benchmarks.")
+    def test_benchmark(self):
+        """
+        Reports the number of parses and wall time of `Score.pdf_file`,
+        compared to rendering each part separately and merging the results.
+        """
+        with patch("sheetmusic.models.PdfReader", wraps=PdfReader) as pdf_reader:
+            start = perf_counter()
+            pdf_writer = PdfWriter()
+            for part in Part.objects.filter(pdf__score=self.score):
+                pdf_writer.append_pages_from_reader(pdf_reader(part.pdf_file()))
+            pdf_writer.write(BytesIO())
+            per_part_time = perf_counter() - start
+        per_part_parses = pdf_reader.call_count
+
+        with patch("sheetmusic.models.PdfReader", wraps=PdfReader) as pdf_reader:
+            start = perf_counter()
+            self.score.pdf_file()
+            score_time = perf_counter() - start
+        score_parses = pdf_reader.call_count
+
+        print(
+            f"\nScore.pdf_file with {Part.objects.count()} parts: "
+            f"{score_parses} parses in {score_time:.3f} s, "
+            f"compared to {per_part_parses} parses in {per_part_time:.3f} s "
+            "when rendering each part separately"
+        )
+
 
 class PartTestSuite(TestMixin, TestCase):
     def setUp(self):
@@ -312,6 +741,38 @@ class PartTestSuite(TestMixin, TestCase):
         pdf_reader = PdfReader(pdf_stream)
         self.assertEqual(len(pdf_reader.pages), 1)
 
+    def test_pdf_file_cached(self):
+        """Should store the PDF of the part in the cache and return its path."""
+        path = self.part.pdf_file_cached()
+        self.assertEqual(path, self.part.pdf_file_cache_path())
+        with default_storage.open(path) as file:
+            self.assertEqual(len(PdfReader(file).pages), 1)
+
+    def test_pdf_file_cached_uses_existing(self):
+        """Should not render the PDF again if it's already in the cache."""
+        self.part.pdf_file_cached()
+        with patch.object(Part, "pdf_file") as pdf_file:
+            self.part.pdf_file_cached()
+        pdf_file.assert_not_called()
+
+    def test_pdf_file_cache_path_shared_by_same_file_and_page_range(self):
+        """Parts from identical files with the same page range should share a path."""
+        part = PartFactory(from_page=self.part.from_page, to_page=self.part.to_page)
+        self.assertEqual(part.pdf_file_cache_path(), self.part.pdf_file_cache_path())
+
+    def test_pdf_file_cache_path_changes_with_page_range(self):
+        """Should change when the page range changes."""
+        path_old = self.part.pdf_file_cache_path()
+        self.part.to_page = 2
+        self.assertNotEqual(self.part.pdf_file_cache_path(), path_old)
+
+    def test_pdf_file_cache_path_changes_with_file(self):
+        """Should change when the file of the PDF changes."""
+        path_old = self.part.pdf_file_cache_path()
+        self.pdf.file = test_pdf_multipage(["Fløyte"])
+        self.pdf.save()
+        self.assertNotEqual(self.part.pdf_file_cache_path(), path_old)
+
     def test_pdf_filename(self):
         """
         Checks that `pdf_filename` returns an appropriate filename for the PDF.
@@ -408,6 +869,31 @@ class ScoreViewTestSuite(TestMixin, TestCase):
         self.assertTrue(list(context["parts"])[0].is_favorite)
 
 
+class ScoreZipTestSuite(TestMixin, TestCase):
+    def setUp(self):
+        self.part = PartFactory()
+        self.score = self.part.pdf.score
+
+    def get_url(self):
+        return reverse("sheetmusic:ScoreZip", args=[self.score.slug])
+
+    def test_requires_login(self):
+        self.assertLoginRequired(self.get_url())
+
+    def test_streams_zip(self):
+        """Should stream a ZIP file containing the parts of the score."""
+        self.client.force_login(UserFactory())
+        response = self.client.get(self.get_url())
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'inline; filename="{self.score.zip_filename()}"',
+        )
+        zip_file = ZipFile(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(zip_file.namelist(), [self.part.pdf_filename()])
+
+
 class ScoreCreateTestSuite(TestMixin, TestCase):
     def test_create_score(self):
         user = SuperUserFactory()
@@ -656,6 +1142,30 @@ class PartsUpdateTestSuite(TestMixin, TestCase):
         self.score.refresh_from_db()
         self.assertEqual(self.score.modified_by, user)
 
+    def test_to_page_within_pdf(self):
+        """Should not allow parts to end after the last page of the pdf."""
+        self.client.force_login(SuperUserFactory())
+        response = self.client.post(
+            self.get_url(), self.create_post_data([{"to_page": "3"}])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.context["form"].forms[0].errors["to_page"],
+            ["PDF-en har berre 2 sider."],
+        )
+
+    def test_to_page_not_before_from_page(self):
+        """Should not allow parts to end before they start."""
+        self.client.force_login(SuperUserFactory())
+        response = self.client.post(
+            self.get_url(), self.create_post_data([{"from_page": "2", "to_page": "1"}])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.context["form"].forms[0].errors["to_page"],
+            ["Siste side kan ikkje vere før første side."],
+        )
+
 
 class PartsUpdateAllTestSuite(TestMixin, TestCase):
     def create_post_data(self, data=[]):
@@ -764,6 +1274,30 @@ class PartsUpdateAllTestSuite(TestMixin, TestCase):
         self.score.refresh_from_db()
         self.assertEqual(self.score.modified_by, user)
 
+    def test_to_page_within_pdf(self):
+        """Should not allow parts to end after the last page of the pdf."""
+        self.client.force_login(SuperUserFactory())
+        response = self.client.post(
+            self.get_url(), self.create_post_data([{"to_page": "3"}])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.context["form"].forms[0].errors["to_page"],
+            ["PDF-en har berre 2 sider."],
+        )
+
+    def test_to_page_not_before_from_page(self):
+        """Should not allow parts to end before they start."""
+        self.client.force_login(SuperUserFactory())
+        response = self.client.post(
+            self.get_url(), self.create_post_data([{"from_page": "2", "to_page": "1"}])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.context["form"].forms[0].errors["to_page"],
+            ["Siste side kan ikkje vere før første side."],
+        )
+
 
 class PdfsUpdateTestSuite(TestMixin, TestCase):
     def create_post_data(self, data=[]):
@@ -918,6 +1452,32 @@ class PdfsUploadTestSuite(TestMixin, TestCase):
             Part.objects.get(instrument_type=self.tuba).instrument_type, self.tuba
         )
 
+    def test_upload_pdf_sheatless_queues_job(self):
+        """Should queue a background job for Sheatless if not told to wait."""
+        self.test_data["part_prediction"] = "sheatless"
+        del self.test_data["plz_wait"]
+        self.client.force_login(SuperUserFactory())
+        self.upload_pdf()
+        pdf = Pdf.objects.get()
+        self.assertEqual(pdf.parts.count(), 0)
+        job = Job.objects.get()
+        self.assertEqual(job.content_object, pdf)
+        self.assertEqual(job.method, "find_parts_with_sheatless")
+        self.assertEqual(job.status, Job.Status.QUEUED)
+
+    def test_upload_unreadable_pdf(self):
+        """Should show a form error instead of saving PDFs that can't be read."""
+        self.client.force_login(SuperUserFactory())
+        self.test_data["files"] = SimpleUploadedFile(
+            "ødelagd.pdf", b"%PDF-1.4 truncated", content_type="application/pdf"
+        )
+        response = self.upload_pdf()
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFormError(
+            response.context["form"], "files", "ødelagd.pdf: Kunne ikkje lese PDF-fila."
+        )
+        self.assertEqual(Pdf.objects.count(), 0)
+
     def test_upload_pdf_no_part_prediction(self):
         self.client.force_login(SuperUserFactory())
         self.test_data["part_prediction"] = "none"
@@ -980,6 +1540,27 @@ class PartPdfTestSuite(TestMixin, TestCase):
         )
         self.assertEqual(response["content-type"], "application/pdf")
 
+    def test_x_sendfile_headers(self):
+        """Should let Nginx serve the cached PDF, with the filename of the part."""
+        self.client.force_login(UserFactory())
+        response = self.client.get(
+            reverse(
+                "sheetmusic:PartPdf",
+                args=[self.part.pdf.score.slug, self.part.slug],
+            )
+        )
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'inline; filename="{self.part.pdf_filename()}"',
+        )
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            escape_uri_path(
+                f"{settings.MEDIA_URL_NGINX}{self.part.pdf_file_cache_path()}"
+            ),
+        )
+        self.assertTrue(default_storage.exists(self.part.pdf_file_cache_path()))
+
 
 class FavoritePartPdfTestSuite(TestMixin, TestCase):
     def setUp(self):
@@ -7,7 +7,7 @@ import django
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db import transaction
 from django.forms import BaseModelForm
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.http.response import FileResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse, reverse_lazy
@@ -19,6 +19,8 @@ from common.breadcrumbs.breadcrumbs import Breadcrumb, BreadcrumbsMixin
 from common.forms.views import DeleteViewCustom
 from common.mixins import PermissionOrCreatedMixin
 from common.pdfs.views import PdfReadMinimalMixin
+from common.utils import content_disposition
+from serve_media_files.views import ServeMediaFiles
 
 from .forms import (
     EditEditFileFormset,
@@ -128,8 +130,10 @@ class ScoreZip(LoginRequiredMixin, DetailView):
 
     def render_to_response(self, _):
         zip_stream, zip_name = self.get_object().zip_file()
-        return FileResponse(
-            zip_stream, content_type=self.content_type, filename=zip_name
+        return StreamingHttpResponse(
+            zip_stream,
+            content_type=self.content_type,
+            headers={"Content-Disposition": content_disposition(zip_name)},
         )
 
 
@@ -259,6 +263,7 @@ class PartsUpdate(
         kwargs["queryset"] = Part.objects.filter(pdf=self.object).order_by(
             "from_page", "to_page", "instrument_type", "part_number"
         )
+        kwargs["form_kwargs"] = {"pdf": self.object}
         return kwargs
 
     def form_valid(self, form):
@@ -269,8 +274,6 @@ class PartsUpdate(
             # Update `modified` and `modified_by`
             self.object.score.save()
 
-            for subform in form.forms:
-                subform.instance.pdf = self.object
             form.save()
             return super().form_valid(form)
 
@@ -436,8 +439,13 @@ class PartDetail(LoginRequiredMixin, PdfReadMinimalMixin, DetailView):
         return queryset.get(**{self.slug_field: slug}, pdf__score__slug=score_slug)
 
 
-class PartPdf(LoginRequiredMixin, DetailView):
-    model = Part
+class PartPdf(LoginRequiredMixin, SingleObjectMixin, ServeMediaFiles):
+    """
+    Serves the cached PDF of a part, so that the original PDF only has to be parsed
+    the first time a page range of it is requested.
+    """
+
+    queryset = Part.objects.select_related("pdf__score")
     content_type = "application/pdf"
 
     def get_object(self, queryset=None):
@@ -447,12 +455,15 @@ class PartPdf(LoginRequiredMixin, DetailView):
         slug = self.kwargs[self.slug_url_kwarg]
         return queryset.get(**{self.slug_field: slug}, pdf__score__slug=score_slug)
 
-    def render_to_response(self, _):
-        pdf_stream = self.get_object().pdf_file()
-        filename = self.get_object().pdf_filename()
-        return FileResponse(
-            pdf_stream, content_type=self.content_type, filename=filename
-        )
+    def get_file_path(self):
+        return self.object.pdf_file_cached()
+
+    def get_file_name(self, file_path):
+        return self.object.pdf_filename()
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super().get(request, *args, **kwargs)
 
 
 class FavoritePartPdf(LoginRequiredMixin, DetailView):
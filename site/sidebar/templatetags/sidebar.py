@@ -1,8 +1,8 @@
 from django import template
-from django.db.models.query_utils import Q
 
 from accounts.forms import ImageSharingConsentForm
 from authentication.forms import LoginForm
+from brewing.models import Balance
 from polls.models import Poll
 
 register = template.Library()
@@ -10,17 +10,8 @@ register = template.Library()
 
 @register.inclusion_tag("sidebar/sidebar.html")
 def sidebar(user, request_path):
-    poll_filter = poll_filter = (
-        Q(public=True) if not (user and user.is_authenticated) else Q()
-    )
-    try:
-        poll = Poll.objects.filter(poll_filter).latest()
-    except Poll.DoesNotExist:
-        poll = None
-
-    brewing_balance = (
-        user.brewing_transactions.balance() if user.is_authenticated else 0
-    )
+    poll = Poll.objects.latest_cached(public_only=not (user and user.is_authenticated))
+    brewing_balance = Balance.objects.of(user) if user.is_authenticated else 0
 
     return {
         "user": user,
@@ -5,12 +5,13 @@ from accounts.factories import UserFactory
 from authentication.forms import LoginForm
 from brewing.factories import TransactionFactory
 from brewing.models import TransactionType
+from common.mixins import TestMixin
 from polls.factories import PollFactory
 
 from .templatetags.sidebar import sidebar
 
 
-class SidebarTestSuite(TestCase):
+class SidebarTestSuite(TestMixin, TestCase):
     def setUp(self):
         self.user = UserFactory()
         self.request_path = "/this-is/a-path/"
@@ -54,3 +55,25 @@ class SidebarTestSuite(TestCase):
     def test_poll_none_when_no_poll(self):
         """Should set `poll` to `None` when there are no polls."""
         self.assertIsNone(self.get_sidebar()["poll"])
+
+    def test_latest_poll_updated_when_creating_poll(self):
+        """Should include new polls."""
+        self.get_sidebar()
+        poll = PollFactory()
+        self.assertEqual(self.get_sidebar()["poll"], poll)
+
+    def test_latest_poll_updated_when_deleting_poll(self):
+        """Should not include deleted polls."""
+        poll = PollFactory()
+        self.get_sidebar()
+        poll.delete()
+        self.assertIsNone(self.get_sidebar()["poll"])
+
+    def test_no_queries_when_cached(self):
+        """Should not query the database for the poll and balance when they are cached."""
+        PollFactory()
+        TransactionFactory(user=self.user, amount=20, type=TransactionType.DEPOSIT)
+        self.get_sidebar()
+        with self.assertNumQueries(0):
+            context = self.get_sidebar()
+        self.assertEqual(context["brewing_balance"], 20)
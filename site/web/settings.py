@@ -97,6 +97,7 @@ INSTALLED_APPS = [
     "common.markdown",
     "common.breadcrumbs",
     "common.pdfs",
+    "common.jobs",
     "sidebar",
     "articles",
     "storage",
@@ -188,6 +189,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Cached data is cleared when it changes, so processes that change data,
+# like the web server's workers and the jobs process, must share the cache.
+# Without `CACHE_DIR`, each process has its own cache in memory.
+
+if os.environ.get("CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["CACHE_DIR"],
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+
 AUTH_USER_MODEL = "accounts.UserCustom"
 
 # Allow inactive users to authenticate in the auth backend, but block login in the login form.
@@ -292,6 +309,27 @@ USE_L10N = True
 
 USE_TZ = True
 
+# Background jobs
+# Run by `manage.py run_jobs`, see `common.jobs`
+
+JOBS_WORKERS = int(os.environ.get("JOBS_WORKERS", "2"))
+JOBS_MAX_ATTEMPTS = 3
+# Seconds a running job can go without reporting progress before it's assumed
+# that its worker process has died
+JOBS_TIMEOUT = 60 * 60
+
+# Automatic part detection with Sheatless
+# The pages of a PDF are split into chunks that are predicted in parallel
+# by `SHEATLESS_WORKERS` processes in each job worker,
+# so by default the CPUs are shared between the job workers
+
+SHEATLESS_WORKERS = int(
+    os.environ.get(
+        "SHEATLESS_WORKERS", max(1, (os.cpu_count() or 1) // max(1, JOBS_WORKERS))
+    )
+)
+SHEATLESS_PAGES_PER_CHUNK = 4
+
 # Search
 # https://github.com/etianen/django-watson/wiki
 